@@ -23,7 +23,7 @@ STEP_.add_component("test_data/Test_filter_2.xlsx", "test_2")
 # STEP_.add_component("test_data/FGL280.xls", "FGL280")
 print(STEP_.metadata)
 
-uc.convert_percentage(STEP_.df, "transmission")
+STEP_.convert_percentage("transmission")
 STEP_.generate_throughput("transmission")
 
 print(STEP_.df)
@@ -54,7 +54,8 @@ result[sourceBB.sourceID] = source_col
 
 print(result)
 
-save_telescope_model(STEP_, "test_model_data.json")
+save_telescope_model(STEP_, "test_model_data.sea")
+export_telescope_model_json(STEP_, "test_model_data.json")
 
 
 # # print(STEP_.metadata)
@@ -62,7 +63,12 @@ fig, ax = plt.subplots()
 
 res = result.prod(axis=1)
 
-print("Integral of resulting spectrum: \n", np.trapz(res, res.index))
+band_flux = STEP_.integrate_bands(
+    [[lambda_[0], lambda_[-1]]],
+    columns=["transmission_throughput"],
+    source=sourceBB
+)
+print("Integral of resulting spectrum: \n", band_flux)
 
 ax.plot(result.index, result[sourceBB.sourceID], '--k')
 ax.plot(result.index, res, 'k')
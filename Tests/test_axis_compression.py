@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.source_model import SourceModel
+from method_lib.telescope_model import TelescopeModel
+from utils.axis_compression import compress_axis, decimate_axis
+from utils.spectrum_axis import make_spectrum_axis
+
+
+class TestAxisCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.axis = make_spectrum_axis(0.2, 13, 0.001)
+        self.curves = np.vstack([
+            0.9 / (1.0 + np.exp(-(self.axis - 3.0) / 0.05)),
+            0.5 + 0.4 * np.sin(self.axis / 2.0) ** 2,
+            np.exp(-((self.axis - 6.0) / 0.3) ** 2),
+        ])
+        self.curves[2, :1000] = np.nan
+
+    def _max_error(self, axis, curves, keep):
+        errors = []
+        for row in curves:
+            finite = np.isfinite(row)
+            rebuilt = np.interp(axis[finite], axis[keep], row[keep])
+            errors.append(np.max(np.abs(rebuilt - row[finite])))
+        return max(errors)
+
+    def test_error_bound_and_ratio(self):
+        for max_error in (1e-2, 1e-3, 1e-5):
+            keep = compress_axis(self.axis, self.curves, max_error)
+            self.assertEqual(keep[0], 0)
+            self.assertEqual(keep[-1], self.axis.size - 1)
+            self.assertLessEqual(self._max_error(self.axis, self.curves,
+                                                 keep), max_error)
+        keep = compress_axis(self.axis, self.curves, 1e-3)
+        self.assertGreater(self.axis.size / keep.size, 10)
+        # The span of the partial curve is kept exactly
+        self.assertIn(999, keep)
+        self.assertIn(1000, keep)
+
+        noisy = np.random.default_rng(1).uniform(0.0, 1.0, 2000)
+        self.assertEqual(compress_axis(np.arange(2000.0), noisy, 1e-6).size,
+                         2000)
+        relative = compress_axis(self.axis, self.curves[1] * 100.0, 1e-3,
+                                 relative=True)
+        self.assertTrue(np.array_equal(
+            relative, compress_axis(self.axis, self.curves[1], 1e-3,
+                                    relative=True)))
+
+    def test_models_on_compressed_axis(self):
+        tel = TelescopeModel(wavelength_unit="um")
+        tel.df = pd.DataFrame({
+            "transmission_a": self.curves[0],
+            "transmission_b": self.curves[1],
+        }, index=self.axis)
+        grid = np.linspace(0.5, 12.5, 997)
+        before = tel.map_spectra(grid, ["transmission_a", "transmission_b"])
+        band = tel.integrate_bands([(1.0, 4.0), (5.0, 12.0)])
+
+        tel.generate_throughput("transmission")
+        compressed = tel.compress_axis(1e-4)
+        self.assertLess(compressed.size, self.axis.size / 10)
+        self.assertTrue(np.array_equal(
+            compressed, decimate_axis(tel, 1e-4)))
+        after = tel.map_spectra(grid, ["transmission_a", "transmission_b"])
+        self.assertLessEqual(np.max(np.abs(after - before)), 1e-4)
+        self.assertTrue(np.allclose(
+            tel.integrate_bands([(1.0, 4.0), (5.0, 12.0)])[band.columns],
+            band, atol=1e-3))
+        self.assertTrue(np.allclose(
+            tel.column("transmission_throughput"),
+            tel.column("transmission_a") * tel.column("transmission_b")))
+
+        source = SourceModel(wavelength_unit="um", sourceID="sun")
+        source.generateSourceData_BB(self.axis.copy(), 5800,
+                                     spectrum_unit="um")
+        peak = source.df["sun"].max()
+        full = source.df.copy()
+        kept = source.compress_axis(1e-3)
+        self.assertLess(kept.size, self.axis.size / 10)
+        rebuilt = np.interp(full.index, kept, source.df["sun"])
+        self.assertLessEqual(np.max(np.abs(rebuilt - full["sun"])),
+                             1e-3 * peak)
+
+
+if __name__ == "__main__":
+    unittest.main()
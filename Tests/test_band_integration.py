@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from utils.band_integration import CumulativeIntegral
+from method_lib.telescope_model import TelescopeModel
+from method_lib.source_model import SourceModel
+
+
+class TestBandIntegration(unittest.TestCase):
+
+    def setUp(self):
+        self.x = np.linspace(1.0, 5.0, 401)
+        self.Y = np.vstack([np.sin(self.x) ** 2, self.x ** 2])
+
+    def _reference(self, y, lo, hi):
+        # Trapezoid over the samples plus interpolated window edges
+        inner = (self.x > lo) & (self.x < hi)
+        x = np.concatenate([[lo], self.x[inner], [hi]])
+        return np.trapezoid(np.interp(x, self.x, y), x)
+
+    def test_windows_match_trapezoid(self):
+        integral = CumulativeIntegral(self.x, self.Y)
+        windows = np.array([[1.0, 5.0], [1.234, 3.001], [2.5, 2.5],
+                            [4.9999, 5.0]])
+        result = integral.integrate(windows)
+
+        self.assertEqual(result.shape, (2, 4))
+        for k in range(2):
+            for m, (lo, hi) in enumerate(windows):
+                self.assertAlmostEqual(
+                    result[k, m], self._reference(self.Y[k], lo, hi),
+                    places=10)
+        self.assertTrue(np.allclose(integral.total(), result[:, 0]))
+
+    def test_single_curve_and_clamped_edges(self):
+        integral = CumulativeIntegral(self.x, self.Y[1])
+        result = integral.integrate([0.0, 2.0], [10.0, 3.0])
+
+        self.assertEqual(result.shape, (2,))
+        self.assertAlmostEqual(result[0], integral.total())
+
+    def test_telescope_times_source(self):
+        telescope = TelescopeModel("um")
+        telescope.df = pd.DataFrame({
+            "transmission_a": [0.5, 0.5, 0.5],
+            "transmission_b": [1.0, 0.0, 1.0],
+        }, index=[1.0, 3.0, 5.0])
+        source = SourceModel("um", "flat")
+        source.df = pd.DataFrame({"flat": np.full(self.x.size, 2.0)},
+                                 index=self.x)
+
+        table = telescope.integrate_bands([[1.0, 5.0], [1.0, 3.0]],
+                                          source=source)
+
+        self.assertListEqual(list(table.columns),
+                             ["transmission_a*flat", "transmission_b*flat"])
+        self.assertTrue(np.allclose(table["transmission_a*flat"], [4.0, 2.0]))
+        self.assertTrue(np.allclose(table["transmission_b*flat"], [4.0, 2.0]))
+
+        same = source.integrate_bands([[1.0, 5.0], [1.0, 3.0]],
+                                      telescope=telescope)
+        self.assertTrue(np.allclose(same.values, table.values))
+
+    def test_source_wider_than_model(self):
+        telescope = TelescopeModel("nm")
+        telescope.df = pd.DataFrame({"transmission_a": [0.5, 0.5, 0.5]},
+                                    index=[2000.0, 3000.0, 4000.0])
+        x = np.linspace(0.5, 6.0, 1101)
+        source = SourceModel("um", "flat")
+        source.df = pd.DataFrame({"flat": np.full(x.size, 2.0)}, index=x)
+
+        # Nothing is transmitted outside 2-4 um (clamping gave 5.5, 1.5)
+        table = telescope.integrate_bands([[0.5, 6.0], [0.5, 2.0]],
+                                          source=source)
+        self.assertTrue(np.allclose(table["transmission_a*flat"], [2.0, 0.0],
+                                    atol=0.01))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.run_benchmarks import compare, main, run
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_run_reports_every_case(self):
+        report = run(sizes=[200], components=[2], repeats=1)
+        names = {r["name"] for r in report["results"]}
+        self.assertSetEqual(names, {
+            "read_data_file_csv", "read_data_file_txt",
+            "load_excel_autoheader", "add_component", "generate_throughput",
+            "map_spectrum", "nplanck_micron", "save_telescope_model"})
+        for result in report["results"]:
+            self.assertGreater(result["seconds_min"], 0.0)
+            self.assertGreaterEqual(result["peak_bytes"], 0)
+
+    def test_float32_cases_report_accuracy(self):
+        report = run(sizes=[200], components=[2], repeats=1,
+                     only=["nplanck", "throughput"],
+                     dtypes=["float64", "float32"])
+        keys = {r["key"] for r in report["results"]}
+        self.assertIn("nplanck_micron[n=200]", keys)
+        self.assertIn("nplanck_micron[dtype=float32,n=200]", keys)
+        self.assertIn("generate_throughput[components=2,dtype=float32,n=200]",
+                      keys)
+        quantities = {r["quantity"] for r in report["accuracy"]}
+        self.assertSetEqual(quantities, {
+            "components", "throughput", "map_spectrum", "blackbody_flux",
+            "band_flux"})
+        for row in report["accuracy"]:
+            self.assertLess(row["max_rel_error"], 1e-6)
+            self.assertEqual(row["memory_ratio"], 0.5)
+
+    def test_compare_flags_slowdowns(self):
+        baseline = {"results": [
+            {"key": "a", "seconds_min": 1.0, "peak_bytes": 10},
+            {"key": "b", "seconds_min": 1.0, "peak_bytes": 10}]}
+        report = {"results": [
+            {"key": "a", "seconds_min": 1.1, "peak_bytes": 10},
+            {"key": "b", "seconds_min": 1.5, "peak_bytes": 20},
+            {"key": "c", "seconds_min": 9.0, "peak_bytes": 10}]}
+        rows = {r["key"]: r for r in compare(report, baseline, 0.2)}
+        self.assertSetEqual(set(rows), {"a", "b"})
+        self.assertFalse(rows["a"]["regression"])
+        self.assertTrue(rows["b"]["regression"])
+        self.assertEqual(rows["b"]["memory_ratio"], 2.0)
+
+    def test_cli_writes_json_and_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "now.json")
+            args = ["--sizes", "200", "--only", "nplanck", "--repeats", "1"]
+            self.assertEqual(main(args + ["--output", output]), 0)
+            with open(output) as file:
+                report = json.load(file)
+            for result in report["results"]:
+                result["seconds_min"] /= 100.0
+            baseline = os.path.join(tmp, "fast.json")
+            with open(baseline, "w") as file:
+                json.dump(report, file)
+            status = main(args + ["--output", output, "--baseline", baseline])
+        self.assertEqual(status, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
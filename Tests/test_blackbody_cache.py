@@ -0,0 +1,78 @@
+import tempfile
+import unittest
+import numpy as np
+
+from method_lib.blackbody_cache import BlackbodyCache
+from method_lib.source_model import SourceModel
+from method_lib.source_templates import nplanck_micron
+
+
+class TestBlackbodyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.lam = np.linspace(0.5, 10, 200)
+        self.cache = BlackbodyCache()
+
+    def test_repeat_request_is_a_hit(self):
+        first, units = self.cache.get(self.lam, 5000, SI=True)
+        second, _ = self.cache.get(self.lam.copy(), 5000, SI=True)
+
+        self.assertIs(first, second)
+        self.assertEqual(units, "W/m^2/µm")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+        expected, _ = nplanck_micron(self.lam, 5000, SI=True)
+        self.assertTrue(np.allclose(first, expected))
+
+    def test_options_are_part_of_the_key(self):
+        self.cache.get(self.lam, 5000)
+        self.cache.get(self.lam, 5000, SI=True)
+        self.cache.get(self.lam, 5000, NPHOTONS=True)
+        self.cache.get(self.lam[:-1], 5000)
+
+        self.assertEqual(self.cache.stats()["misses"], 4)
+
+    def test_cached_arrays_are_read_only(self):
+        flux, _ = self.cache.get(self.lam, 3000)
+        with self.assertRaises(ValueError):
+            flux[0] = 1.0
+
+    def test_grid_reuses_cached_rows(self):
+        self.cache.get(self.lam, 3000)
+        grid, _ = self.cache.get_grid(self.lam, [3000, 4000, 5000])
+
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 3)
+        expected, _ = nplanck_micron(self.lam, 4000)
+        self.assertTrue(np.allclose(grid[1], expected))
+
+    def test_memory_budget_evicts(self):
+        budget = 2 * self.lam.nbytes
+        cache = BlackbodyCache(max_bytes=budget)
+        for temp in (3000, 4000, 5000):
+            cache.get(self.lam, temp)
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_disk_tier_survives_new_instance(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            BlackbodyCache(disk_dir=tmp).get(self.lam, 6000)
+            fresh = BlackbodyCache(disk_dir=tmp)
+            flux, _ = fresh.get(self.lam, 6000)
+
+            self.assertEqual(fresh.stats()["disk_hits"], 1)
+            self.assertEqual(fresh.stats()["misses"], 0)
+            self.assertFalse(flux.flags.writeable)
+
+    def test_source_model_uses_cache(self):
+        src = SourceModel("um", "BB", bb_cache=self.cache)
+        src.generateSourceData_BB(self.lam, 5000)
+        src.generateSourceData_BB(self.lam, [5000, 6000])
+
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertListEqual(list(src.df.columns), ["BB_5000K", "BB_6000K"])
+
+
+if __name__ == "__main__":
+    unittest.main()
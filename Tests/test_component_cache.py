@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+from method_lib.component_cache import ComponentCache
+from method_lib.telescope_model import TelescopeModel
+
+
+class TestComponentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ComponentCache(os.path.join(self.tmp.name, "cache"))
+        self.path = os.path.join(self.tmp.name, "filter.csv")
+        self._write_component(self.path, [0.9, 0.8, 0.7])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write_component(self, path, values):
+        pd.DataFrame({
+            "Wavelength (nm)": [500.0, 510.0, 520.0],
+            "Transmission (%)": values,
+        }).to_csv(path, index=False)
+
+    # -----------------------------
+    # Round trip through the model
+    # -----------------------------
+
+    def test_second_load_skips_parsing(self):
+        tel = TelescopeModel("nm", component_cache=self.cache)
+        tel.add_component(self.path, "filter")
+
+        with patch("method_lib.telescope_model.read_data_file") as reader:
+            other = TelescopeModel("nm", component_cache=self.cache)
+            other.add_component(self.path, "filter")
+            reader.assert_not_called()
+
+        self.assertEqual(self.cache.hits, 1)
+        self.assertTrue(np.allclose(other.df.values, tel.df.values))
+        self.assertEqual(other.metadata["units"]["transmission"], "%")
+        self.assertTrue(other.has_transmission)
+
+    def test_options_are_part_of_the_key(self):
+        TelescopeModel("nm", component_cache=self.cache).add_component(
+            self.path, "filter")
+        TelescopeModel("um", component_cache=self.cache).add_component(
+            self.path, "filter")
+
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_other_options_are_not_evicted(self):
+        for unit in ("nm", "um", "nm", "um"):
+            TelescopeModel(unit, component_cache=self.cache).add_component(
+                self.path, "filter")
+
+        # Both readings of the file stay cached side by side
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(len(self.cache.store.entries()), 2)
+
+    # -----------------------------
+    # Invalidation and eviction
+    # -----------------------------
+
+    def test_modified_file_is_reparsed(self):
+        tel = TelescopeModel("nm", component_cache=self.cache)
+        tel.add_component(self.path, "filter")
+
+        self._write_component(self.path, [0.1, 0.2, 0.3])
+        # Make sure the mtime moves even on coarse file systems
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns,
+                                stat.st_mtime_ns + 1_000_000_000))
+
+        other = TelescopeModel("nm", component_cache=self.cache)
+        other.add_component(self.path, "filter")
+
+        self.assertTrue(np.allclose(
+            other.df["transmission_filter"].values, [0.1, 0.2, 0.3]))
+        # Stale entry replaced rather than kept next to the new one
+        self.assertEqual(len(self.cache.store.entries()), 1)
+
+    def test_invalidate_path(self):
+        self.cache.warm([self.path], "nm")
+        self.assertEqual(self.cache.invalidate(self.path), 1)
+        self.assertTrue(self.cache.info().empty)
+
+    def test_lru_eviction(self):
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.tmp.name, f"filter_{i}.csv")
+            self._write_component(path, [0.5, 0.5, 0.5 + i / 10])
+            paths.append(path)
+
+        self.cache.warm(paths[:2], "nm")
+        entry_size = self.cache.store.entries()[0]["size"]
+        self.cache.store.max_bytes = 2 * entry_size
+
+        # Touch the first entry so the second becomes the oldest
+        self.cache.warm(paths[:1], "nm")
+        self.cache.warm(paths[2:], "nm")
+
+        sources = set(self.cache.info()["source"])
+        self.assertIn(os.path.abspath(paths[0]), sources)
+        self.assertIn(os.path.abspath(paths[2]), sources)
+        self.assertNotIn(os.path.abspath(paths[1]), sources)
+
+    def test_warm_reports_parsed_files(self):
+        self.assertEqual(self.cache.warm([self.path], "nm"), 1)
+        self.assertEqual(self.cache.warm([self.path], "nm"), 0)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
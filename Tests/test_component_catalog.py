@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.component_catalog import ComponentCatalog
+from method_lib.telescope_model import TelescopeModel
+from utils.band_integration import CumulativeIntegral
+
+
+class TestComponentCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.wavelength = np.linspace(2000.0, 6000.0, 4001)
+        self.files = {
+            # Flat 90 %, covers 3-5 um
+            "window": ("Transmission (%)", np.full(4001, 90.0)),
+            # Ramp from 0.5 to 1.0 as a fraction
+            "lens": ("Transmission", np.linspace(0.5, 1.0, 4001)),
+            # OD 1 everywhere, i.e. 10 %
+            "blocker": ("OD", np.ones(4001)),
+        }
+        self.paths = {}
+        for name, (header, values) in self.files.items():
+            path = os.path.join(self.tmp.name, f"{name}.csv")
+            pd.DataFrame({"Wavelength (nm)": self.wavelength,
+                          header: values}).to_csv(path, index=False)
+            self.paths[name] = path
+        # Short coverage, never matches a 3-5 um query
+        path = os.path.join(self.tmp.name, "short.csv")
+        pd.DataFrame({"Wavelength (nm)": [3500.0, 4000.0, 4500.0],
+                      "Transmission": [1.0, 1.0, 1.0]}).to_csv(path,
+                                                               index=False)
+        self.paths["short"] = path
+        self.db = os.path.join(self.tmp.name, "catalog.sqlite")
+        with ComponentCatalog(self.db) as catalog:
+            for name, path in self.paths.items():
+                catalog.add(path, name, metadata={"vendor": "test"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_band_coverage_query(self):
+        with ComponentCatalog(self.db) as catalog:
+            self.assertEqual(len(catalog), 4)
+            found = catalog.query(3, 5, unit="um")
+            self.assertListEqual(list(found["component_id"]),
+                                 ["window", "lens", "blocker"])
+            means = dict(zip(found["component_id"], found["mean"]))
+            self.assertAlmostEqual(means["window"], 0.9)
+            self.assertAlmostEqual(means["blocker"], 0.1)
+            lens = np.linspace(0.5, 1.0, 4001)
+            exact = CumulativeIntegral(self.wavelength, lens).integrate(
+                3000.0, 5000.0)[0] / 2000.0
+            self.assertAlmostEqual(means["lens"], exact, places=6)
+
+            good = catalog.query(3000, 5000, column="transmission",
+                                 min_mean=0.8)
+            self.assertListEqual(list(good["component_id"]), ["window"])
+            self.assertEqual(len(catalog.query(1, 3, unit="um")), 0)
+
+    def test_telescope_loads_by_id(self):
+        with ComponentCatalog(self.db) as catalog:
+            info = catalog.info("window")
+            self.assertEqual(info["metadata"], {"vendor": "test"})
+            self.assertEqual(info["spectral_bounds"], (2000.0, 6000.0))
+
+            for unit in ("nm", "um"):
+                from_file = TelescopeModel(wavelength_unit=unit)
+                from_catalog = TelescopeModel(wavelength_unit=unit)
+                for name in ("window", "blocker"):
+                    from_file.add_component(self.paths[name], name)
+                    from_catalog.add_catalog_component(catalog, name)
+                self.assertTrue(np.array_equal(from_catalog.axis,
+                                               from_file.axis))
+                self.assertTrue(np.array_equal(from_catalog.matrix,
+                                               from_file.matrix))
+                # Only file components can be refreshed
+                self.assertIn("provenance", from_file.metadata)
+                from_file.metadata.pop("provenance")
+                self.assertEqual(from_catalog.metadata, from_file.metadata)
+
+            catalog.remove("lens")
+            self.assertNotIn("lens", catalog)
+            self.assertNotIn("lens", set(
+                catalog.query(3, 5, unit="um")["component_id"]))
+            with self.assertRaises(ValueError):
+                catalog.load("lens")
+            with self.assertRaises(ValueError):
+                catalog.add(self.paths["window"], "window", replace=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import itertools
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.configuration_sweep import ConfigurationSweep
+from method_lib.source_model import SourceModel
+from utils.band_integration import CumulativeIntegral
+
+
+class TestConfigurationSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.wavelength = np.linspace(500.0, 700.0, 101)
+        self.sweep = ConfigurationSweep(wavelength_unit="nm")
+        self.expected = {}
+        slots = {
+            "filter": {"fa": 0.9, "fb": 0.5, "fc": 0.7},
+            "window": {"w1": 0.95, "w2": 0.8},
+            "coating": {"c1": 0.1, "c2": 0.02},
+        }
+        for slot, candidates in slots.items():
+            paths = {}
+            for name, level in candidates.items():
+                path = os.path.join(self.tmp.name, f"{name}.csv")
+                ramp = level * (1.0 + 0.001 * (self.wavelength - 600.0))
+                header = "Reflectance" if slot == "coating" else \
+                    "Transmission (%)"
+                scale = 1.0 if slot == "coating" else 100.0
+                pd.DataFrame({
+                    "Wavelength (nm)": self.wavelength,
+                    header: ramp * scale,
+                    "OD": -np.log10(ramp),
+                }).to_csv(path, index=False)
+                paths[name] = path
+                self.expected[name] = 1.0 - ramp if slot == "coating" \
+                    else ramp
+            self.sweep.add_slot(slot, paths,
+                                column=None if slot == "coating"
+                                else "transmission",
+                                complement=slot == "coating")
+        self.source = SourceModel(wavelength_unit="um", sourceID="lamp")
+        self.source.df = pd.DataFrame(
+            {"lamp": np.linspace(1.0, 3.0, 50)},
+            index=np.linspace(0.45, 0.75, 50))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_brute_force(self):
+        windows = [(520.0, 580.0), (600.0, 690.0)]
+        table = self.sweep.run(self.source, windows=windows)
+        self.assertEqual(len(table), self.sweep.n_configurations)
+        self.assertListEqual(list(table.index), list(range(1, 13)))
+        self.assertTrue(table["score"].is_monotonic_decreasing)
+
+        flux = np.interp(self.wavelength / 1000.0,
+                         self.source.df.index.to_numpy(),
+                         self.source.df["lamp"].to_numpy())
+        rows = {tuple(row[["filter", "window", "coating"]]): row
+                for _, row in table.iterrows()}
+        for combo in itertools.product(["fa", "fb", "fc"], ["w1", "w2"],
+                                       ["c1", "c2"]):
+            throughput = np.prod([self.expected[c] for c in combo], axis=0)
+            self.assertTrue(np.allclose(
+                self.sweep.throughput(combo), throughput))
+            signal = CumulativeIntegral(
+                self.wavelength, throughput * flux).integrate(windows)
+            mean = CumulativeIntegral(self.wavelength, throughput).integrate(
+                windows) / np.diff(windows, axis=1).ravel()
+            row = rows[combo]
+            self.assertTrue(np.allclose(
+                row[["signal_520_580", "signal_600_690"]].to_numpy(
+                    dtype=float), signal))
+            self.assertTrue(np.allclose(
+                row[["throughput_520_580", "throughput_600_690"]].to_numpy(
+                    dtype=float), mean))
+        self.assertEqual(tuple(table.iloc[0][["filter", "window",
+                                              "coating"]]),
+                         ("fa", "w1", "c2"))
+
+    def test_workers_and_ranking_options(self):
+        serial = self.sweep.run(self.source)
+        parallel = self.sweep.run(self.source, n_workers=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+        top = self.sweep.run(rank_by="throughput_500_700", top=3)
+        self.assertEqual(len(top), 3)
+        self.assertNotIn("signal_500_700", top.columns)
+        self.assertTrue(top["throughput_500_700"].is_monotonic_decreasing)
+
+        with self.assertRaises(ValueError):
+            self.sweep.add_slot("filter", {"fx": "missing.csv"})
+
+    def test_slot_name_ending_another(self):
+        sweep = ConfigurationSweep(wavelength_unit="nm")
+        for slot, level in (("ir_filter", 0.2), ("filter", 0.9)):
+            path = os.path.join(self.tmp.name, f"{slot}_a.csv")
+            pd.DataFrame({
+                "Wavelength (nm)": self.wavelength,
+                "Transmission": np.full(self.wavelength.size, level),
+            }).to_csv(path, index=False)
+            sweep.add_slot(slot, {"a": path}, column="transmission")
+
+        sweep.load()
+        self.assertTrue(np.allclose(sweep.curves[0], 0.2))
+        self.assertTrue(np.allclose(sweep.curves[1], 0.9))
+
+
+if __name__ == "__main__":
+    unittest.main()
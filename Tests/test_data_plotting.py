@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.data_plotting import plot_telescope_data
+from method_lib.telescope_model import TelescopeModel
+
+
+class TestDataPlotting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        axis = np.linspace(300.0, 2500.0, 100_001)
+        self.telescope = TelescopeModel(wavelength_unit="nm")
+        self.telescope.df = pd.DataFrame({
+            "transmission_a": 0.5 + 0.4 * np.sin(axis / 50.0),
+            "transmission_b": np.exp(-((axis - 1200.0) / 300.0) ** 2),
+        }, index=axis)
+        self.telescope.metadata["components"] = ["_a", "_b"]
+        self.telescope.metadata["component_columns"] = {
+            "_a": ["transmission_a"], "_b": ["transmission_b"]}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_decimated_plot_to_file(self):
+        output = os.path.join(self.tmp.name, "model.png")
+        fig = plot_telescope_data(self.telescope, show_total=True,
+                                  decimation="minmax", output=output)
+        self.assertGreater(os.path.getsize(output), 0)
+
+        ax = fig.axes[0]
+        self.assertEqual(len(ax.lines), 3)
+        width = ax.get_window_extent().width
+        for line in ax.lines:
+            self.assertLessEqual(len(line.get_xdata()), 2 * width + 4)
+        expected = np.nanprod(self.telescope.matrix[:2], axis=0)
+        self.assertTrue(np.allclose(self.telescope.total_throughput(),
+                                    expected))
+
+        # Zooming in decimates again, at full resolution for few samples
+        ax.set_xlim(1000.0, 1010.0)
+        x = ax.lines[0].get_xdata()
+        self.assertLess(x[0], 1000.0)
+        self.assertGreater(x[-1], 1010.0)
+        self.assertEqual(len(x), np.count_nonzero(
+            (self.telescope.axis >= x[0]) & (self.telescope.axis <= x[-1])))
+
+    def test_total_does_not_change_the_model(self):
+        output = os.path.join(self.tmp.name, "model.svg")
+        metadata = repr(self.telescope.metadata)
+        plot_telescope_data(self.telescope, show_total=True, output=output)
+        self.assertListEqual(self.telescope.columns,
+                             ["transmission_a", "transmission_b"])
+        self.assertEqual(repr(self.telescope.metadata), metadata)
+
+        # A generated total is maintained and not drawn twice
+        self.telescope.generate_throughput("", output="total_throughput")
+        self.telescope.remove_component("b")
+        self.assertTrue(np.allclose(
+            self.telescope.total_throughput(),
+            self.telescope.column("transmission_a")))
+        fig = plot_telescope_data(self.telescope, show_total=True,
+                                  output=output)
+        self.assertEqual(len(fig.axes[0].lines), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+
+from utils.decimation import decimate, lttb_indices, minmax_indices
+
+
+class TestDecimation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.linspace(300.0, 2500.0, 200_001)
+        self.y = np.exp(-((self.x - 1200.0) / 200.0) ** 2) \
+            + rng.normal(0.0, 0.01, self.x.size)
+        self.y[5000] = 3.0  # single-sample spike
+        self.y[100_000:100_050] = np.nan
+
+    def test_minmax_keeps_every_bin_extreme(self):
+        keep = minmax_indices(self.x, self.y, 500)
+        self.assertLessEqual(keep.size, 2 * 500 + 4)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], self.x.size - 1)
+        self.assertIn(5000, keep)
+        self.assertIn(100_000, keep)
+
+        edges = np.linspace(self.x[0], self.x[-1], 501)
+        bins = np.clip(np.searchsorted(edges, self.x, side="right") - 1,
+                       0, 499)
+        kept = np.zeros(500, dtype=bool)
+        for b in np.unique(bins):
+            values = self.y[bins == b]
+            chosen = self.y[keep[bins[keep] == b]]
+            self.assertEqual(np.nanmax(values), np.nanmax(chosen))
+            self.assertEqual(np.nanmin(values), np.nanmin(chosen))
+            kept[b] = True
+        self.assertTrue(kept.all())
+
+    def test_lttb_and_view_range(self):
+        keep = lttb_indices(self.x, self.y, 800)
+        self.assertLessEqual(keep.size, 800 + 1)
+        self.assertEqual(keep[0], 0)
+        self.assertEqual(keep[-1], self.x.size - 1)
+        self.assertIn(5000, keep)
+        self.assertIn(100_000, keep)
+        self.assertTrue(np.isfinite(self.y[keep]).sum() >= 790)
+
+        # Zoomed in, every visible sample is kept plus one on each side
+        keep = decimate(self.x, self.y, 500, "lttb", x_range=(1000.0, 1001.0))
+        visible = np.flatnonzero((self.x >= 1000.0) & (self.x <= 1001.0))
+        self.assertTrue(np.array_equal(
+            keep, np.arange(visible[0] - 1, visible[-1] + 2)))
+        with self.assertRaises(ValueError):
+            decimate(self.x, self.y, 500, "every_other")
+
+
+if __name__ == "__main__":
+    unittest.main()
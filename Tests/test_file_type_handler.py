@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+
+from method_lib import file_type_handler
+from method_lib.file_type_handler import (
+    SheetLayout,
+    detect_sheet_layout,
+    load_excel_autoheader,
+    register_sheet_layout,
+)
+
+
+class TestFileTypeHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "vendor.xlsx")
+        wavelength = np.arange(200.0, 1200.0, 2.0)
+        rows = [[None, None, "Vendor filter", None, None],
+                [None, None, "Wavelength (nm)", "Transmission (%)", None]]
+        rows += [[None, None, w, 50.0 + w / 100.0, None] for w in wavelength]
+        rows[6][0] = "Product Raw Data"
+        rows[8][0] = "Some filter"
+        pd.DataFrame(rows).to_excel(self.path, header=False, index=False)
+        self.wavelength = wavelength
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        file_type_handler.SHEET_LAYOUTS.clear()
+
+    def test_detect_sheet_layout(self):
+        layout = detect_sheet_layout(self.path)
+        self.assertEqual(layout.header_row, 1)
+        self.assertListEqual(layout.usecols, [2, 3])
+        self.assertListEqual(layout.names,
+                             ["Wavelength (nm)", "Transmission (%)"])
+
+    def test_load_excel_autoheader(self):
+        df = load_excel_autoheader(self.path)
+        self.assertListEqual(list(df.columns),
+                             ["Wavelength (nm)", "Transmission (%)"])
+        self.assertTrue((df.dtypes == np.float64).all())
+        self.assertTrue(np.array_equal(df["Wavelength (nm)"], self.wavelength))
+
+    def test_registered_layout_skips_detection(self):
+        register_sheet_layout("vendor", SheetLayout(1, [2, 3]))
+        with patch.object(file_type_handler, "detect_sheet_layout") as detect:
+            df = load_excel_autoheader(self.path, layout="vendor")
+        detect.assert_not_called()
+        self.assertListEqual(list(df.columns),
+                             ["Wavelength (nm)", "Transmission (%)"])
+        self.assertEqual(len(df), self.wavelength.size)
+
+    def test_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            load_excel_autoheader(self.path, layout="missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from utils.header_parsing import (
+    classify_header,
+    classify_headers,
+    clear_header_cache,
+    detect_aliases,
+    parse_header_list,
+)
+
+
+class TestHeaderParsing(unittest.TestCase):
+
+    def setUp(self):
+        clear_header_cache()
+
+    def test_classify_header(self):
+        header = classify_header("Wavelength (µm)")
+        self.assertEqual(header.clean, "wavelength")
+        self.assertEqual(header.unit, "um")
+        self.assertEqual(header.alias, "wavelength")
+
+        header = classify_header("Optical Density")
+        self.assertEqual(header.unit, None)
+        self.assertEqual(header.alias, "optical_density")
+
+    def test_unit_priority_follows_definitions(self):
+        # "%" comes before "nm" in UNIT_KEYWORDS even though "nm" is first
+        clean, unit, _, _ = classify_header("nm Transmission %")
+        self.assertEqual(unit, "%")
+        self.assertEqual(clean, "nm transmission")
+
+    def test_all_aliases_reported(self):
+        header = classify_header("Transmission intensity")
+        self.assertEqual(header.alias, "transmission")
+        self.assertEqual(header.aliases, {"transmission", "intensity"})
+        found = detect_aliases([header.clean, "wavelength"])
+        self.assertTrue(found["wavelength"])
+        self.assertTrue(found["intensity"])
+        self.assertFalse(found["reflection"])
+
+    def test_results_are_memoized(self):
+        classify_headers(["% Reflectance", "Wavelength (nm)"])
+        hits = classify_header.cache_info().hits
+        headers, units = parse_header_list(["% Reflectance",
+                                            "Wavelength (nm)"])
+        self.assertEqual(classify_header.cache_info().hits, hits + 2)
+        self.assertListEqual(headers, ["reflectance", "wavelength"])
+        self.assertDictEqual(units, {"reflectance": "%", "wavelength": "nm"})
+
+
+if __name__ == "__main__":
+    unittest.main()
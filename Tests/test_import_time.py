@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from definitions import ROOT_DIR
+
+# Cold import budget for the library entry point, in seconds. Most of it
+# is numpy and pandas; scipy, matplotlib and the Excel engines must only
+# load on first use.
+IMPORT_TIME_BUDGET = 2.0
+LAZY_MODULES = ["scipy", "matplotlib", "openpyxl", "xlrd"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import method_lib.telescope_model
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+
+    def _probe(self):
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+        result = subprocess.run(
+            [sys.executable, "-c", _PROBE % LAZY_MODULES],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_heavy_dependencies_load_lazily(self):
+        self.assertListEqual(self._probe()["loaded"], [])
+
+    def test_import_time_budget(self):
+        # Best of three to keep a busy machine from failing the check
+        elapsed = min(self._probe()["elapsed"] for _ in range(3))
+        self.assertLess(elapsed, IMPORT_TIME_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.telescope_model import TelescopeModel
+from utils import instrumentation
+from utils.instrumentation import instrumented, recording, registry, span
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "filter.csv")
+        wavelength = np.arange(400.0, 800.0, 0.5)
+        pd.DataFrame({
+            "Wavelength (nm)": wavelength,
+            "Transmission (%)": np.linspace(10.0, 90.0, wavelength.size),
+        }).to_csv(self.path, index=False)
+        registry.clear()
+
+    def tearDown(self):
+        instrumentation.disable()
+        self.tmp.cleanup()
+
+    def test_disabled_records_nothing(self):
+        tel = TelescopeModel(wavelength_unit="nm")
+        tel.add_component(self.path, "filter")
+        self.assertDictEqual(registry.stats, {})
+
+        noop = span("anything")
+        self.assertIs(noop, span("other"))
+        start = time.perf_counter()
+        for _ in range(100_000):
+            with span("loop"):
+                pass
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_pipeline_stages_are_recorded(self):
+        with recording() as metrics:
+            tel = TelescopeModel(wavelength_unit="nm")
+            tel.add_component(self.path, "filter")
+            tel.map_spectra(np.linspace(450.0, 750.0, 11))
+        for name in ["TelescopeModel.add_component", "read_data_file",
+                     "sniff_text_layout", "standardize_header",
+                     "index_wavelength", "align_components",
+                     "TelescopeModel.map_spectra"]:
+            self.assertIn(name, metrics.stats)
+        self.assertEqual(metrics.stats["read_data_file"]["rows"], 800)
+        self.assertIn("TelescopeModel.add_component", metrics.report())
+        self.assertEqual(metrics.summary().index[0],
+                         "TelescopeModel.add_component")
+        self.assertFalse(instrumentation.is_enabled())
+
+    def test_memory_and_trace_export(self):
+        @instrumented("allocate")
+        def allocate():
+            with span("inner"):
+                block = np.ones(1_000_000)
+            return block.sum()
+
+        with recording(trace_memory=True) as metrics:
+            allocate()
+        self.assertGreaterEqual(metrics.stats["inner"]["peak_bytes"], 8e6)
+        self.assertGreaterEqual(metrics.stats["allocate"]["peak_bytes"], 8e6)
+
+        trace_path = os.path.join(self.tmp.name, "trace.json")
+        metrics.export_chrome_trace(trace_path)
+        with open(trace_path) as file:
+            events = json.load(file)["traceEvents"]
+        self.assertListEqual(sorted(e["name"] for e in events),
+                             ["allocate", "inner"])
+        self.assertTrue(all(e["ph"] == "X" for e in events))
+
+        json_path = os.path.join(self.tmp.name, "metrics.json")
+        metrics.export_json(json_path)
+        with open(json_path) as file:
+            self.assertEqual(json.load(file)["spans"]["allocate"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
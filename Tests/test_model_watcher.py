@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.model_watcher import ModelWatcher
+from method_lib.read_write_data_models import (
+    load_telescope_model,
+    save_telescope_model,
+)
+from method_lib.telescope_model import TelescopeModel
+
+
+class TestModelWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stamp = 10 ** 9
+        self.paths = [self._write(f"filter_{i}", 0.5 + 0.1 * i)
+                      for i in range(3)]
+        self.telescope = TelescopeModel(wavelength_unit="nm")
+        for i, path in enumerate(self.paths):
+            self.telescope.add_component(path, f"f{i}")
+        self.telescope.generate_throughput("transmission")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, level, text=None):
+        path = os.path.join(self.tmp.name, f"{name}.csv")
+        if text is None:
+            pd.DataFrame({
+                "Wavelength (nm)": [500.0, 510.0, 520.0],
+                "Transmission": [level] * 3,
+            }).to_csv(path, index=False)
+        else:
+            with open(path, "w") as file:
+                file.write(text)
+        # Distinct stamps whatever the file system's time resolution
+        self.stamp += 10 ** 9
+        os.utime(path, ns=(self.stamp, self.stamp))
+        return path
+
+    def test_poll_refreshes_and_retries_broken_files(self):
+        events = []
+        errors = []
+        watcher = ModelWatcher(
+            self.telescope, directory=self.tmp.name,
+            on_refresh=lambda model, suffixes: events.append(suffixes),
+            on_error=lambda suffix, error: errors.append(suffix))
+        self.assertListEqual(watcher.poll(), [])
+
+        self._write("filter_1", 0.25)
+        self._write("filter_2", 0, text="")
+        self.assertListEqual(watcher.poll(), ["_f1"])
+        self.assertListEqual(events, [["_f1"]])
+        self.assertListEqual(errors, ["_f2"])
+        self.assertIn("_f2", watcher.errors)
+        self.assertTrue(np.allclose(
+            self.telescope.column("transmission_throughput"),
+            0.5 * 0.25 * 0.7))
+
+        # The half-written file is picked up once it is complete
+        self._write("filter_2", 0.4)
+        self.assertListEqual(watcher.poll(), ["_f2"])
+        self.assertDictEqual(watcher.errors, {})
+        self.assertTrue(np.allclose(
+            self.telescope.column("transmission_throughput"),
+            0.5 * 0.25 * 0.4))
+
+    def test_loaded_model_keeps_provenance(self):
+        path = os.path.join(self.tmp.name, "model.sea")
+        save_telescope_model(self.telescope, path)
+        model = load_telescope_model(path)
+        self._write("filter_0", 0.9)
+
+        watcher = ModelWatcher(model, interval=0.01)
+        watcher.run(max_polls=2)
+        self.assertEqual(watcher.polls, 2)
+        self.assertTrue(np.allclose(model.column("transmission_f0"), 0.9))
+        self.assertFalse(watcher.running)
+        with ModelWatcher(self.telescope, directory=os.path.dirname(
+                self.tmp.name) + "/elsewhere", interval=0.01) as idle:
+            self.assertTrue(idle.running)
+        self.assertFalse(idle.running)
+        self.assertListEqual(idle._watched(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
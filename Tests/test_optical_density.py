@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+
+from utils.optical_density import (
+    column_unit,
+    from_optical_density,
+    to_optical_density,
+)
+from utils.throughput import RunningOpticalDensity, ThroughputGroup
+
+
+class TestOpticalDensity(unittest.TestCase):
+
+    def test_unit_conversions(self):
+        fraction = np.array([1.0, 0.1, 1e-6, 0.0, np.nan])
+        od = to_optical_density(fraction)
+        self.assertTrue(np.allclose(od[:3], [0.0, 1.0, 6.0]))
+        self.assertEqual(od[3], np.inf)
+        self.assertTrue(np.isnan(od[4]))
+
+        self.assertTrue(np.allclose(to_optical_density([50.0, 1.0], "%"),
+                                    to_optical_density([0.5, 0.01])))
+        self.assertTrue(np.array_equal(to_optical_density([3.0], "OD"),
+                                       [3.0]))
+        self.assertTrue(np.allclose(from_optical_density(od[:3]),
+                                    fraction[:3]))
+        self.assertTrue(np.allclose(from_optical_density([2.0], "%"), [1.0]))
+
+    def test_column_unit(self):
+        self.assertEqual(column_unit("od_blocker"), "OD")
+        self.assertEqual(column_unit("optical density_nd"), "OD")
+        self.assertEqual(column_unit("transmission_a", "%"), "%")
+        self.assertIsNone(column_unit("transmission_a"))
+        self.assertIsNone(column_unit("transmission_a", "nm"))
+
+    def test_running_sum_handles_deep_blocking(self):
+        rows = np.full((40, 4), 9.0)
+        rows[3, 1] = np.inf
+        rows[5, 2] = np.nan
+        total = RunningOpticalDensity(4)
+        for row in rows:
+            total.add(row)
+        self.assertTrue(np.allclose(total.od(), [360.0, np.inf, 351.0, 360.0]))
+        # The linear product of these curves underflows to zero
+        self.assertEqual(np.prod(np.power(10.0, -rows[:, 0])), 0.0)
+
+        total.remove(rows[3])
+        total.replace(rows[5], np.zeros(4))
+        self.assertTrue(np.allclose(total.od(), 342.0))
+        self.assertFalse(total.needs_rebuild)
+
+    def test_group_domain(self):
+        group = ThroughputGroup("transmission", "out", 2, domain="od")
+        self.assertTrue(np.allclose(group.terms([10.0, 1.0], "%"), [1.0, 2.0]))
+        with self.assertRaises(ValueError):
+            ThroughputGroup("transmission", "out", 2, domain="log")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.data_importer import read_data_file, detect_data_start
+from utils.preamble_detection import (
+    find_data_start,
+    sniff_file_layout,
+    sniff_text_layout,
+)
+
+
+class TestPreambleDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, text, encoding="utf-8"):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding=encoding, newline="") as file:
+            file.write(text)
+        return path
+
+    def test_find_data_start_needs_a_run(self):
+        numeric = np.array([0, 1, 0, 2, 2, 2])
+        nonempty = np.array([1, 2, 2, 2, 2, 2])
+        self.assertEqual(find_data_start(numeric, nonempty), 3)
+        self.assertIsNone(find_data_start(np.zeros(3), np.full(3, 2)))
+
+    def test_csv_with_vendor_preamble(self):
+        text = ("Vendor XYZ\nPart 12, rev 3\n\n"
+                "Wavelength (nm),Transmission (%)\n"
+                + "".join(f"{w},{w / 10}\n" for w in range(400, 500, 10)))
+        layout = sniff_text_layout(text)
+        self.assertEqual(layout.delimiter, ",")
+        self.assertEqual(layout.header_row, 3)
+        self.assertEqual(layout.data_start, 4)
+
+        df = read_data_file(self._write("vendor.csv", text))
+        self.assertListEqual(list(df.columns),
+                             ["Wavelength (nm)", "Transmission (%)"])
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df.iloc[0, 1], 40.0)
+
+    def test_txt_delimiters(self):
+        tab = ("Wavelength (um)\tReflectance (%)\n"
+               "0.4\t50\n0.5\t60\n0.6\t70\n")
+        self.assertEqual(sniff_text_layout(tab).delimiter, "\t")
+
+        spaces = ("# measured 2024\nWavelength (um)   Reflectance (%)\n"
+                  "0.4  50\n0.5   60\n0.6 70\n")
+        layout = sniff_file_layout(self._write("spaces.txt", spaces))
+        self.assertEqual(layout.delimiter, " ")
+        self.assertListEqual(layout.names,
+                             ["Wavelength (um)", "Reflectance (%)"])
+        df = read_data_file(self._write("spaces.txt", spaces))
+        self.assertListEqual(df["Reflectance (%)"].tolist(), [50, 60, 70])
+
+    def test_trailing_delimiter(self):
+        text = ("Wavelength (nm),Transmission,\n"
+                + "".join(f"{w},{w / 1000},\n" for w in range(400, 450, 10)))
+        layout = sniff_text_layout(text)
+        self.assertListEqual(layout.names, ["Wavelength (nm)", "Transmission"])
+        self.assertEqual(layout.n_columns, 2)
+
+        df = read_data_file(self._write("trailing.csv", text))
+        self.assertListEqual(list(df.columns),
+                             ["Wavelength (nm)", "Transmission"])
+        self.assertListEqual(df["Transmission"].tolist(),
+                             [0.4, 0.41, 0.42, 0.43, 0.44])
+
+    def test_quoted_header_with_delimiter(self):
+        text = ('"Wavelength, nm","Transmission, %"\n'
+                + "".join(f"{w},{w / 10}\n" for w in range(400, 450, 10)))
+        layout = sniff_text_layout(text)
+        self.assertEqual(layout.delimiter, ",")
+        self.assertListEqual(layout.names,
+                             ["Wavelength, nm", "Transmission, %"])
+
+        df = read_data_file(self._write("quoted.csv", text))
+        self.assertListEqual(list(df.columns),
+                             ["Wavelength, nm", "Transmission, %"])
+        self.assertListEqual(df["Transmission, %"].tolist(),
+                             [40.0, 41.0, 42.0, 43.0, 44.0])
+
+    def test_bounded_sample_and_latin1(self):
+        rows = "".join(f"{w};{w % 7}\n" for w in range(100000))
+        path = self._write("large.csv", "Wavelength (µm);Flux\n" + rows,
+                           encoding="latin-1")
+        layout = sniff_file_layout(path, max_bytes=4096)
+        self.assertEqual(layout.delimiter, ";")
+        self.assertEqual(layout.encoding, "latin-1")
+        self.assertListEqual(layout.names, ["Wavelength (µm)", "Flux"])
+
+    def test_detect_data_start(self):
+        df = pd.DataFrame([["title", None], ["a", "b"], [1, 2], [3, 4]],
+                          index=[10, 11, 12, 13])
+        self.assertEqual(detect_data_start(df), 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
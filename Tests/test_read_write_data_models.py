@@ -0,0 +1,246 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.file_type_handler import SheetLayout
+from method_lib.telescope_model import TelescopeModel
+from method_lib.read_write_data_models import (
+    save_telescope_model,
+    open_telescope_model,
+    load_telescope_model,
+    load_telescope,
+    load_telescope_json,
+    TelescopeModelFile,
+    stream_component_to_model_file,
+)
+
+
+class TestReadWriteDataModels(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.telescope = TelescopeModel(wavelength_unit="nm", ID="scope")
+        self.telescope.df = pd.DataFrame({
+            "transmission_a": [0.8, 0.9, np.nan],
+            "reflectance_b": [0.5, 0.6, 0.7],
+        }, index=[500.0, 510.0, 520.0])
+        self.telescope.metadata["components"] = ["_a", "_b"]
+        self.telescope.metadata["spectral_bounds"] = (500.0, 520.0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    # -----------------------------
+    # Binary format
+    # -----------------------------
+
+    def test_binary_round_trip(self):
+        save_telescope_model(self.telescope, self._path("model.sea"))
+        loaded = load_telescope_model(self._path("model.sea"))
+
+        self.assertListEqual(list(loaded.df.columns),
+                             ["transmission_a", "reflectance_b"])
+        self.assertTrue(np.allclose(loaded.df.values,
+                                    self.telescope.df.values,
+                                    equal_nan=True))
+        self.assertTrue(np.array_equal(loaded.df.index, [500, 510, 520]))
+        self.assertEqual(loaded.ID, "scope")
+        self.assertEqual(loaded.wavelength_unit, "nm")
+        self.assertEqual(loaded.metadata["components"], ["_a", "_b"])
+
+    def test_open_is_memory_mapped(self):
+        save_telescope_model(self.telescope, self._path("model.sea"))
+        model_file = open_telescope_model(self._path("model.sea"))
+
+        self.assertIsInstance(model_file.matrix, np.memmap)
+        self.assertTrue(np.allclose(model_file["reflectance_b"],
+                                    [0.5, 0.6, 0.7]))
+        self.assertEqual(len(model_file), 3)
+
+    def test_stream_component_to_model_file(self):
+        source = self._path("large.txt")
+        wavelength = np.arange(0.4, 0.9, 0.001)
+        pd.DataFrame({
+            "Wavelength (um)": wavelength,
+            "Reflectance (%)": np.linspace(80.0, 95.0, wavelength.size),
+        }).to_csv(source, sep="\t", index=False)
+
+        path = stream_component_to_model_file(
+            source, self._path("streamed.sea"), "mirror", "nm",
+            chunksize=64, ID="scope", txtDelim="\t")
+        reference = TelescopeModel(wavelength_unit="nm", ID="scope")
+        reference.add_component(source, "mirror", txtDelim="\t")
+
+        model = open_telescope_model(path)
+        self.assertListEqual(model.columns, reference.columns)
+        self.assertTrue(np.array_equal(model.axis, reference.axis))
+        self.assertTrue(np.allclose(model.matrix, reference.matrix))
+        self.assertEqual(model.metadata["spectral_bounds"],
+                         list(reference.metadata["spectral_bounds"]))
+
+    def test_float32_round_trip(self):
+        telescope = TelescopeModel(wavelength_unit="nm", ID="scope",
+                                   dtype=np.float32)
+        telescope.df = self.telescope.df
+        save_telescope_model(telescope, self._path("model32.sea"))
+        save_telescope_model(self.telescope, self._path("model64.sea"))
+
+        model_file = open_telescope_model(self._path("model32.sea"))
+        self.assertEqual(model_file.header["dtype"], "<f4")
+        self.assertEqual(model_file.axis.dtype, np.float64)
+        self.assertLess(os.path.getsize(self._path("model32.sea")),
+                        os.path.getsize(self._path("model64.sea")))
+        loaded = model_file.to_telescope_model()
+        self.assertEqual(loaded.dtype, np.float32)
+        self.assertTrue(np.array_equal(loaded.matrix, telescope.matrix,
+                                       equal_nan=True))
+
+        # Changes stay in float32 once the memmap is copied
+        loaded.convert_percentage("transmission")
+        self.assertEqual(loaded.matrix.dtype, np.float32)
+
+    def test_save_loaded_model_to_same_path(self):
+        path = self._path("model.sea")
+        save_telescope_model(self.telescope, path)
+        loaded = load_telescope_model(path)
+        loaded.metadata["note"] = "saved twice"
+
+        save_telescope_model(loaded, path)
+
+        # The saved model is still readable after its file was replaced
+        self.assertTrue(np.allclose(loaded.df.values,
+                                    self.telescope.df.values,
+                                    equal_nan=True))
+        again = load_telescope_model(path)
+        self.assertEqual(again.metadata["note"], "saved twice")
+        self.assertTrue(np.allclose(again.df.values,
+                                    self.telescope.df.values,
+                                    equal_nan=True))
+
+    def test_failed_save_keeps_existing_model(self):
+        path = self._path("model.sea")
+        save_telescope_model(self.telescope, path)
+        self.telescope.metadata["bad"] = object()
+
+        with self.assertRaises(TypeError):
+            save_telescope_model(self.telescope, path)
+
+        loaded = load_telescope_model(path)
+        self.assertNotIn("bad", loaded.metadata)
+        self.assertTrue(np.allclose(loaded.df.values,
+                                    self.telescope.df.values,
+                                    equal_nan=True))
+        self.assertEqual(os.listdir(self.tmp.name), ["model.sea"])
+
+    def test_loaded_model_keeps_component_columns(self):
+        telescope = TelescopeModel(wavelength_unit="nm", ID="scope")
+        for name, values in (("a", [0.9, 0.8, 0.7]),
+                             ("filter_a", [0.5, 0.6, 0.7])):
+            path = self._path(f"{name}.csv")
+            pd.DataFrame({"Wavelength (nm)": [500.0, 510.0, 520.0],
+                          "Transmission": values}).to_csv(path, index=False)
+            telescope.add_component(path, name)
+        save_telescope_model(telescope, self._path("model.sea"))
+
+        loaded = load_telescope_model(self._path("model.sea"))
+        loaded.remove_component("a")
+
+        self.assertListEqual(loaded.columns, ["transmission_filter_a"])
+        self.assertEqual(loaded.metadata["components"], ["_filter_a"])
+        self.assertEqual(loaded.metadata["component_columns"],
+                         {"_filter_a": ["transmission_filter_a"]})
+
+        # Files without the column lists are split on the longest suffix
+        del telescope.metadata["component_columns"]
+        save_telescope_model(telescope, self._path("old.sea"))
+        loaded = load_telescope_model(self._path("old.sea"))
+        self.assertEqual(loaded.metadata["component_columns"],
+                         {"_a": ["transmission_a"],
+                          "_filter_a": ["transmission_filter_a"]})
+
+    def test_loaded_model_keeps_throughput(self):
+        def write(name, values):
+            path = self._path(f"{name}.csv")
+            pd.DataFrame({"Wavelength (nm)": [500.0, 510.0, 520.0],
+                          "Transmission": values}).to_csv(path, index=False)
+            return path
+
+        telescope = TelescopeModel(wavelength_unit="nm", ID="scope")
+        telescope.add_component(write("a", [0.9, 0.8, 0.5]), "a")
+        telescope.add_component(write("b", [0.5, 0.5, 0.5]), "b")
+        telescope.generate_throughput("", output="total_throughput")
+        telescope.generate_throughput("transmission")
+        save_telescope_model(telescope, self._path("model.sea"))
+        save_telescope_model(telescope, self._path("model.json"))
+        extra = write("c", [0.5, 1.0, 2.0])
+
+        for loaded in (load_telescope_model(self._path("model.sea")),
+                       load_telescope_json(self._path("model.json"))):
+            self.assertEqual(loaded.metadata["throughput"],
+                             telescope.metadata["throughput"])
+            loaded.add_component(extra, "c")
+
+            # The outputs are neither members nor stale after the load
+            expected = [0.225, 0.4, 0.5]
+            self.assertTrue(np.allclose(loaded.total_throughput(), expected))
+            self.assertTrue(np.allclose(
+                loaded.column("transmission_throughput"), expected))
+            loaded.generate_throughput("_[ab]$", output="ab")
+            self.assertTrue(np.allclose(loaded.column("ab"),
+                                        [0.45, 0.4, 0.25]))
+
+    def test_refresh_sheet_layout_component_after_load(self):
+        path = self._path("vendor.xlsx")
+
+        def write_sheet(values):
+            rows = [["Vendor filter", None, None],
+                    [None, "Wavelength (nm)", "Transmission"]]
+            rows += [[None, w, v] for w, v in zip([500.0, 510.0, 520.0],
+                                                    values)]
+            pd.DataFrame(rows).to_excel(path, header=False, index=False)
+
+        write_sheet([0.9, 0.8, 0.7])
+        telescope = TelescopeModel(wavelength_unit="nm", ID="scope")
+        telescope.add_component(path, "vendor",
+                                sheet_layout=SheetLayout(1, [1, 2]))
+        save_telescope_model(telescope, self._path("model.sea"))
+
+        loaded = load_telescope_model(self._path("model.sea"))
+        self.assertEqual(
+            loaded.provenance("vendor")["reader_options"]["sheet_layout"],
+            {"header_row": 1, "usecols": [1, 2], "names": None,
+             "sheet_name": 0})
+
+        write_sheet([0.1, 0.2, 0.3])
+        os.utime(path, ns=(1, 1))
+        self.assertListEqual(loaded.refresh(), ["_vendor"])
+        self.assertTrue(np.allclose(loaded.column("transmission_vendor"),
+                                    [0.1, 0.2, 0.3]))
+        save_telescope_model(loaded, self._path("model.sea"))
+
+    def test_rejects_foreign_file(self):
+        with open(self._path("model.sea"), "wb") as file:
+            file.write(b"not a model at all")
+        with self.assertRaises(ValueError):
+            TelescopeModelFile(self._path("model.sea"))
+
+    # -----------------------------
+    # JSON export
+    # -----------------------------
+
+    def test_json_export_round_trip(self):
+        save_telescope_model(self.telescope, self._path("model.json"))
+        df, metadata = load_telescope(self._path("model.json"))
+
+        self.assertTrue(np.allclose(df.values, self.telescope.df.values,
+                                    equal_nan=True))
+        self.assertEqual(metadata["Telescope ID"], "scope")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import numpy as np
+
+from utils.resampling import (
+    ResamplingCache,
+    StreamingResampler,
+    build_resampling_operator,
+    resample,
+)
+
+
+class TestResampling(unittest.TestCase):
+
+    def setUp(self):
+        self.source = np.array([1.0, 2.0, 4.0, 5.0])
+        self.values = np.array([
+            [0.0, 1.0, 3.0, 4.0],
+            [1.0, np.nan, 0.5, 0.5],
+        ])
+        self.target = np.array([0.5, 1.0, 1.5, 3.0, 4.0, 6.0])
+
+    # -----------------------------
+    # Operator construction
+    # -----------------------------
+
+    def test_linear_matches_np_interp(self):
+        op = build_resampling_operator(self.source, self.target)
+        result = op.apply(self.values[0])
+
+        self.assertTrue(np.allclose(
+            result, np.interp(self.target, self.source, self.values[0])))
+        self.assertEqual(op.matrix.nnz, 8)
+
+    def test_nan_only_reaches_neighbours(self):
+        op = build_resampling_operator(self.source, self.target,
+                                       extrapolate="nan")
+        result = op.apply(self.values)
+
+        self.assertEqual(result.shape, (2, 6))
+        self.assertTrue(np.isnan(result[:, 0]).all())
+        self.assertTrue(np.isnan(result[:, -1]).all())
+        # Exact hit on a valid sample next to a NaN stays valid
+        self.assertEqual(result[1, 1], 1.0)
+        self.assertEqual(result[1, 4], 0.5)
+        self.assertTrue(np.isnan(result[1, 2]))
+
+    def test_step_methods(self):
+        target = np.array([1.4, 1.6, 3.0])
+        nearest = build_resampling_operator(self.source, target, "nearest")
+        previous = build_resampling_operator(self.source, target, "previous")
+        following = build_resampling_operator(self.source, target, "next")
+
+        self.assertTrue(np.allclose(nearest.apply(self.values[0]),
+                                    [0.0, 1.0, 1.0]))
+        self.assertTrue(np.allclose(previous.apply(self.values[0]),
+                                    [0.0, 0.0, 1.0]))
+        self.assertTrue(np.allclose(following.apply(self.values[0]),
+                                    [1.0, 1.0, 3.0]))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            build_resampling_operator(self.source, self.target, "cubic")
+
+    # -----------------------------
+    # Cache
+    # -----------------------------
+
+    def test_cache_reuses_operator_for_equal_axes(self):
+        cache = ResamplingCache()
+        first = cache.get(self.source, self.target)
+        second = cache.get(self.source.copy(), self.target.copy())
+
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        resample(self.source, self.values, self.target, cache=cache)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_cache_evicts_least_recently_used(self):
+        # Targets without exact hits so every operator has the same size
+        cache = ResamplingCache()
+        target = np.array([1.25, 2.5, 4.5])
+        size = cache.get(self.source, target).nbytes
+        cache.resize(2 * size)
+
+        cache.get(self.source, target + 0.1)
+        cache.get(self.source, target)
+        cache.get(self.source, target + 0.2)
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        hits = cache.stats()["hits"]
+        cache.get(self.source, target)
+        self.assertEqual(cache.stats()["hits"], hits + 1)
+
+    def test_streaming_matches_single_pass(self):
+        x = np.linspace(400.0, 900.0, 101)
+        Y = np.vstack([np.sin(x / 40.0), np.cos(x / 70.0)])
+        target = np.linspace(350.0, 950.0, 77)
+        expected = np.vstack([np.interp(target, x, y) for y in Y])
+        inside = (target >= x[0]) & (target <= x[-1])
+
+        for order in (slice(None), slice(None, None, -1)):
+            streamer = StreamingResampler(target, 2)
+            xs, Ys = x[order], Y[:, order]
+            for start in range(0, xs.size, 13):
+                streamer.feed(xs[start:start + 13], Ys[:, start:start + 13])
+            out = streamer.result()
+            self.assertTrue(np.allclose(out[:, inside], expected[:, inside]))
+            self.assertTrue(np.isnan(out[:, ~inside]).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import pandas as pd
 from unittest.mock import patch
 
 from method_lib.source_model import SourceModel
+from method_lib.source_templates import nplanck_micron
 
 
 class TestSourceModel(unittest.TestCase):
@@ -134,3 +135,50 @@ class TestSourceModel(unittest.TestCase):
 
         self.assertTrue(np.allclose(src.df.index, spectrum))
         self.assertTrue(np.allclose(src.df["default"], [5, 6, 7]))
+
+    def test_resample_onto_other_grid(self):
+        src = SourceModel(wavelength_unit="um", sourceID="BB")
+        src.df = pd.DataFrame({"BB": [1.0, 3.0, 5.0]},
+                              index=[1.0, 2.0, 3.0])
+
+        result = src.resample([1500, 2500, 3500], spectrum_unit="nm")
+
+        self.assertListEqual(list(result.index), [1500, 2500, 3500])
+        self.assertTrue(np.allclose(result["BB"].values[:2], [2.0, 4.0]))
+        self.assertTrue(np.isnan(result["BB"].values[2]))
+
+    def test_generate_source_bb_temperature_list(self):
+        src = SourceModel(wavelength_unit="um", sourceID="BB")
+        spectrum = np.linspace(0.5, 5.0, 10)
+
+        src.generateSourceData_BB(spectrum, [3000, 5800.5], unitsSI=True)
+
+        self.assertListEqual(list(src.df.columns),
+                             ["BB_3000K", "BB_5800.5K"])
+        for temp in (3000, 5800.5):
+            expected, _ = nplanck_micron(spectrum, temp, SI=True)
+            self.assertTrue(np.allclose(src.df[f"BB_{temp:g}K"], expected))
+
+    def test_float32_storage(self):
+        spectrum = np.linspace(0.5, 5.0, 200)
+        reference = SourceModel(wavelength_unit="um", sourceID="BB")
+        reference.generateSourceData_BB(spectrum, 5800.0,
+                                        spectrum_unit="um")
+        for temperature in (5800.0, [3000.0, 5800.0]):
+            src = SourceModel(wavelength_unit="um", sourceID="BB",
+                              dtype=np.float32)
+            src.generateSourceData_BB(spectrum, temperature,
+                                      spectrum_unit="um")
+            self.assertTrue((src.df.dtypes == np.float32).all())
+            self.assertEqual(src.df.index.dtype, np.float64)
+
+        self.assertTrue(np.allclose(src.df["BB_5800K"],
+                                    reference.df["BB"], rtol=1e-7, atol=0))
+        resampled = src.resample([1.0, 2.0], spectrum_unit="um")
+        self.assertTrue((resampled.dtypes == np.float32).all())
+        flux = src.integrate_bands([(1.0, 2.0)], columns=["BB_5800K"])
+        expected = reference.integrate_bands([(1.0, 2.0)])
+        self.assertTrue(np.allclose(flux.to_numpy(), expected.to_numpy(),
+                                    rtol=1e-6))
+        with self.assertRaises(ValueError):
+            SourceModel(dtype="float16")
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+
+from method_lib.source_templates import nplanck_micron, planck_grid
+
+
+class TestSourceTemplates(unittest.TestCase):
+
+    def setUp(self):
+        self.lam = np.linspace(0.2, 13, 500)
+        self.temps = np.array([80.0, 300.0, 5000.0, 30000.0])
+
+    def test_grid_matches_scalar_planck(self):
+        for si in (False, True):
+            for photons in (False, True):
+                grid, units = planck_grid(self.lam, self.temps, SI=si,
+                                          NPHOTONS=photons)
+                self.assertEqual(grid.shape, (4, 500))
+                for row, temp in zip(grid, self.temps):
+                    expected, expected_units = nplanck_micron(
+                        self.lam, temp, SI=si, NPHOTONS=photons)
+                    self.assertEqual(units, expected_units)
+                    self.assertTrue(np.allclose(row, expected, rtol=1e-12,
+                                                atol=0))
+
+    def test_chunking_and_float32(self):
+        full, _ = planck_grid(self.lam, self.temps)
+        chunked, _ = planck_grid(self.lam, self.temps, dtype=np.float32,
+                                 max_chunk_bytes=self.lam.size * 8)
+
+        self.assertEqual(chunked.dtype, np.float32)
+        self.assertTrue(np.allclose(chunked, full, rtol=1e-6, atol=0))
+
+    def test_cold_body_underflows_to_zero(self):
+        grid, _ = planck_grid(self.lam, [5.0])
+        self.assertTrue(np.all(grid == 0.0))
+        self.assertTrue(np.all(np.isfinite(grid)))
+
+    def test_spectrum_unit_and_out(self):
+        out = np.empty((1, 3))
+        grid, _ = planck_grid([500, 1000, 2000], 5000,
+                              spectrum_unit="nm", out=out)
+
+        self.assertIs(grid, out)
+        expected, _ = nplanck_micron(np.array([0.5, 1.0, 2.0]), 5000)
+        self.assertTrue(np.allclose(grid[0], expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
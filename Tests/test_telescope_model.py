@@ -1,9 +1,14 @@
+import hashlib
+import os
+import tempfile
 import unittest
 import pandas as pd
 import numpy as np
 from unittest.mock import patch
 
+from method_lib.component_cache import ComponentCache
 from method_lib.telescope_model import TelescopeModel
+from utils.tolerance import ComponentTolerance
 
 
 class TestTelescopeModel(unittest.TestCase):
@@ -53,6 +58,200 @@ class TestTelescopeModel(unittest.TestCase):
         # Index is float precision
         self.assertIsInstance(self.telescope.df.index[0], float)
 
+    @patch("method_lib.telescope_model.read_data_file")
+    def test_add_component_aligns_on_shared_axis(self, mock_reader):
+        mock_reader.side_effect = [
+            self.sample_df.copy(),
+            pd.DataFrame({
+                "wavelength": [505, 515, 530],
+                "transmission %": [0.5, 0.7, 0.9],
+            }),
+        ]
+
+        self.telescope.add_component("a.txt", "mirror")
+        self.telescope.add_component("b.txt", "filter")
+
+        df = self.telescope.df
+        self.assertListEqual(list(df.index), [500, 505, 510, 515, 520, 530])
+        # Each curve is interpolated inside its own span only
+        self.assertAlmostEqual(df.loc[505, "reflectance_mirror"], 0.825)
+        self.assertAlmostEqual(df.loc[510, "transmission_filter"], 0.6)
+        self.assertTrue(np.isnan(df.loc[530, "reflectance_mirror"]))
+        self.assertTrue(np.isnan(df.loc[500, "transmission_filter"]))
+
+    @patch("method_lib.telescope_model.read_data_file")
+    def test_duplicate_component_is_rejected(self, mock_reader):
+        mock_reader.side_effect = lambda *args, **kwargs: self.sample_df.copy()
+        self.telescope.add_component("a.txt", "mirror")
+        metadata = repr(self.telescope.metadata)
+
+        with self.assertRaises(ValueError):
+            self.telescope.add_component("a.txt", "mirror")
+        with self.assertRaises(ValueError):
+            self.telescope.add_components([("a.txt", "twin"),
+                                           ("a.txt", "twin")], n_workers=1)
+
+        # The model is left as it was
+        self.assertEqual(repr(self.telescope.metadata), metadata)
+        self.assertListEqual(list(self.telescope.df.columns),
+                             ["reflectance_mirror"])
+        self.assertEqual(self.telescope.df.shape, (3, 1))
+
+    def test_add_components_matches_add_component(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            specs = []
+            for i in range(3):
+                path = os.path.join(tmp, f"part_{i}.csv")
+                wavelength = np.arange(500.0 + i, 600.0, 2 + i)
+                pd.DataFrame({
+                    "Wavelength (nm)": wavelength,
+                    "Transmission (%)": np.cos(wavelength / (50 + i)) ** 2,
+                }).to_csv(path, index=False)
+                specs.append((path, f"part{i}"))
+            specs[-1] = {"filePath": specs[-1][0], "componentID": "part2",
+                         "suffix": "_last"}
+
+            sequential = TelescopeModel(wavelength_unit="nm")
+            for entry in specs[:-1]:
+                sequential.add_component(*entry)
+            sequential.add_component(specs[-1]["filePath"], "part2",
+                                     suffix="_last")
+
+            bulk = TelescopeModel(wavelength_unit="nm")
+            bulk.add_components(specs, n_workers=2)
+
+        self.assertListEqual(list(bulk.df.columns),
+                             list(sequential.df.columns))
+        self.assertTrue(np.allclose(bulk.df.values, sequential.df.values,
+                                    equal_nan=True))
+        self.assertEqual(bulk.metadata, sequential.metadata)
+
+    def test_add_component_streaming(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "large.csv")
+            wavelength = np.arange(900.0, 400.0, -0.5)
+            pd.DataFrame({
+                "Wavelength (nm)": wavelength,
+                "Transmission (%)": np.sin(wavelength / 60.0) ** 2,
+            }).to_csv(path, index=False)
+
+            whole = TelescopeModel(wavelength_unit="nm")
+            whole.add_component(path, "big")
+            streamed = TelescopeModel(wavelength_unit="nm")
+            streamed.add_component_streaming(path, "big", chunksize=97)
+
+            target = np.linspace(450.0, 850.0, 321)
+            resampled = TelescopeModel(wavelength_unit="nm")
+            resampled.add_component_streaming(path, "big", chunksize=97,
+                                              target_axis=target)
+
+        self.assertTrue(np.array_equal(streamed.axis, whole.axis))
+        self.assertTrue(np.allclose(streamed.matrix, whole.matrix))
+        self.assertEqual(streamed.provenance("big")["loader"], "stream")
+        self.assertEqual(streamed.provenance("big")["digest"],
+                         whole.provenance("big")["digest"])
+        streamed.metadata.pop("provenance")
+        whole.metadata.pop("provenance")
+        self.assertEqual(streamed.metadata, whole.metadata)
+        expected = np.interp(target, whole.axis,
+                             whole.column("transmission_big"))
+        self.assertTrue(np.allclose(resampled.column("transmission_big"),
+                                    expected))
+
+    def test_digest_taken_while_reading(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "component.csv")
+            wavelength = np.arange(400.0, 900.0, 0.5)
+            pd.DataFrame({
+                "Wavelength (nm)": wavelength,
+                "Transmission": np.cos(wavelength / 90.0) ** 2,
+            }).to_csv(path, index=False)
+            with open(path, "rb") as file:
+                expected = hashlib.sha256(file.read()).hexdigest()
+
+            models = [TelescopeModel(wavelength_unit="nm"),
+                      TelescopeModel(wavelength_unit="nm"),
+                      TelescopeModel(wavelength_unit="nm",
+                                     component_cache=ComponentCache(
+                                         os.path.join(tmp, "cache")))]
+            # No separate hashing pass over the file
+            with patch("utils.provenance.file_digest",
+                       side_effect=AssertionError):
+                models[0].add_component(path, "a")
+                models[1].add_component_streaming(path, "a", chunksize=50)
+                models[2].add_components([(path, "a")], n_workers=1)
+
+        for model in models:
+            self.assertEqual(model.provenance("a")["digest"], expected)
+
+    # -----------------------------
+    # Matrix storage
+    # -----------------------------
+
+    def test_df_is_view_of_matrix(self):
+        self.telescope.df = pd.DataFrame({
+            "mirror_a": [0.8, 0.9],
+            "mirror_b": [0.5, 0.6],
+        }, index=[510.0, 500.0])
+
+        df = self.telescope.df
+        self.assertTrue(np.shares_memory(df.values, self.telescope.matrix))
+        self.assertListEqual(list(self.telescope.axis), [500.0, 510.0])
+        self.assertTrue(np.allclose(self.telescope.column("mirror_a"),
+                                    [0.9, 0.8]))
+        self.assertFalse(self.telescope.matrix.flags.writeable)
+        with self.assertRaises(AttributeError):
+            self.telescope.extra_attribute = 1
+
+    def test_convert_percentage(self):
+        self.telescope.df = pd.DataFrame({
+            "transmission_a": [80.0, 90.0],
+            "reflectance_b": [0.5, 0.6],
+        }, index=[500.0, 510.0])
+
+        self.telescope.convert_percentage("transmission")
+
+        self.assertTrue(np.allclose(
+            self.telescope.column("transmission_a"), [0.8, 0.9]))
+        self.assertTrue(np.allclose(
+            self.telescope.column("reflectance_b"), [0.5, 0.6]))
+
+    def test_float32_storage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {
+                "blocker": ([500.0, 510.0, 520.0], "OD", [6.0, 8.0, 10.0]),
+                "window": ([500.0, 505.0, 520.0], "Transmission (%)",
+                           [50.0, 70.0, 100.0]),
+            }
+            models = [TelescopeModel(wavelength_unit="nm", dtype=dtype)
+                      for dtype in (np.float64, "float32")]
+            for name, (wavelength, header, values) in files.items():
+                path = os.path.join(tmp, f"{name}.csv")
+                pd.DataFrame({"Wavelength (nm)": wavelength,
+                              header: values}).to_csv(path, index=False)
+                for tel in models:
+                    tel.add_component(path, name)
+            reference, tel = models
+
+        self.assertEqual(tel.matrix.dtype, np.float32)
+        self.assertEqual(tel.axis.dtype, np.float64)
+        self.assertTrue(np.array_equal(tel.axis, reference.axis))
+        self.assertTrue(np.allclose(tel.matrix, reference.matrix,
+                                    rtol=1e-6, atol=0, equal_nan=True))
+
+        for model in models:
+            model.generate_throughput("_(blocker|window)$", domain="od")
+        od = tel.throughput_od("_(blocker|window)$")
+        self.assertEqual(od.dtype, np.float64)
+        self.assertTrue(np.allclose(
+            od, reference.throughput_od("_(blocker|window)$"), rtol=1e-7))
+        self.assertTrue(np.allclose(
+            tel.column("_(blocker|window)$_throughput"),
+            reference.column("_(blocker|window)$_throughput"),
+            rtol=1e-6, atol=0))
+        with self.assertRaises(ValueError):
+            TelescopeModel(wavelength_unit="nm", dtype=np.int32)
+
     # -----------------------------
     # Throughput generation
     # -----------------------------
@@ -70,6 +269,174 @@ class TestTelescopeModel(unittest.TestCase):
 
         self.assertTrue(np.allclose(expected, actual))
 
+        # Regenerating does not fold the previous result back in
+        self.telescope.generate_throughput("mirror")
+        actual = self.telescope.df["mirror_throughput"].values
+        self.assertTrue(np.allclose(expected, actual))
+
+    def _write_filters(self, tmp, values):
+        paths = []
+        for i, transmission in enumerate(values):
+            path = os.path.join(tmp, f"filter_{i}.csv")
+            pd.DataFrame({
+                "Wavelength (nm)": [500.0, 510.0, 520.0, 530.0],
+                "Transmission": transmission,
+            }).to_csv(path, index=False)
+            paths.append(path)
+        return paths
+
+    def _expected_throughput(self, tel):
+        rows = [tel.column(c) for c in tel.columns
+                if c.startswith("transmission_f")]
+        return np.nanprod(rows, axis=0)
+
+    def test_throughput_follows_component_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b, c, d = self._write_filters(tmp, [
+                [0.5, 0.0, 0.8, 0.9],
+                [0.9, 0.7, 0.0, 0.6],
+                [0.2, 0.4, 0.6, np.nan],
+                [0.3, 0.3, 0.3, 0.3],
+            ])
+            tel = TelescopeModel(wavelength_unit="nm")
+            tel.add_component(a, "fa")
+            tel.add_component(b, "fb")
+            tel.generate_throughput("transmission")
+
+            tel.add_component(c, "fc")
+            self.assertTrue(np.allclose(tel.column("transmission_throughput"),
+                                        self._expected_throughput(tel)))
+
+            # Removing the component holding a zero restores the product
+            tel.remove_component("fa")
+            self.assertNotIn("transmission_fa", tel.columns)
+            self.assertListEqual(tel.metadata["components"], ["_fb", "_fc"])
+            self.assertTrue(np.allclose(tel.column("transmission_throughput"),
+                                        [0.18, 0.28, 0.0, 0.6]))
+
+            tel.replace_component("fb", d)
+            self.assertTrue(np.allclose(tel.column("transmission_fb"), 0.3))
+            self.assertTrue(np.allclose(tel.column("transmission_throughput"),
+                                        self._expected_throughput(tel)))
+            self.assertListEqual(tel.columns, [
+                "transmission_fb", "transmission_throughput",
+                "transmission_fc"])
+
+            with self.assertRaises(ValueError):
+                tel.remove_component("missing")
+
+    def test_percentage_conversion_updates_throughput(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b = self._write_filters(tmp, [[50, 60, 70, 80],
+                                             [90, 90, 90, 90]])
+            tel = TelescopeModel(wavelength_unit="nm")
+            tel.add_component(a, "fa")
+            tel.add_component(b, "fb")
+            tel.generate_throughput("transmission")
+            tel.convert_percentage("transmission")
+        self.assertTrue(np.allclose(tel.column("transmission_throughput"),
+                                    [0.45, 0.54, 0.63, 0.72]))
+
+    def test_optical_density_throughput(self):
+        wavelength = [500.0, 510.0, 520.0]
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {
+                "blocker": ("OD", [6.0, 8.0, 10.0]),
+                "window": ("Transmission (%)", [50.0, 90.0, 100.0]),
+                "coating": ("Transmission", [0.5, 0.1, 0.0]),
+                "filter OD3": ("Transmission", [0.5, 0.5, 0.5]),
+            }
+            tel = TelescopeModel(wavelength_unit="nm")
+            for name, (header, values) in files.items():
+                path = os.path.join(tmp, f"{name}.csv")
+                pd.DataFrame({"Wavelength (nm)": wavelength,
+                              header: values}).to_csv(path, index=False)
+                tel.add_component(path, name)
+            # Units come from the headers, never from the component ID
+            self.assertEqual(tel.metadata["column_units"], {
+                "od_blocker": "OD", "transmission_window": "%",
+                "transmission_coating": None,
+                "transmission_filter OD3": None})
+
+            tel.generate_throughput("_(blocker|window|coating)$", domain="od")
+            output = "_(blocker|window|coating)$_throughput"
+            self.assertTrue(np.allclose(
+                tel.column(output), [0.25e-6, 0.9e-9, 0.0], rtol=1e-12,
+                atol=0))
+            od = tel.throughput_od("_(blocker|window|coating)$")
+            self.assertTrue(np.allclose(od[:2], [6.60206, 9.045757]))
+            self.assertEqual(od[2], np.inf)
+
+            # Converting the percentages does not change the stack
+            tel.convert_percentage("window")
+            self.assertIsNone(tel.metadata["column_units"][
+                "transmission_window"])
+            self.assertTrue(np.allclose(
+                tel.column(output), [0.25e-6, 0.9e-9, 0.0], rtol=1e-12,
+                atol=0))
+
+    def test_monte_carlo_throughput(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b = self._write_filters(tmp, [[50.0, 60.0, 70.0, 80.0],
+                                             [0.9, 0.9, 0.9, 0.9]])
+            tel = TelescopeModel(wavelength_unit="nm")
+            tel.add_component(a, "fa")
+            tel.add_component(b, "fb")
+            tel.metadata["column_units"]["transmission_fa"] = "%"
+
+            result = tel.monte_carlo_throughput(
+                "transmission", {"fb": ComponentTolerance(scale=0.1)},
+                n_realizations=2000, windows=[(500.0, 530.0)], seed=0)
+
+            nominal = [0.45, 0.54, 0.63, 0.72]
+            self.assertTrue(np.allclose(result.nominal, nominal))
+            self.assertTrue(np.allclose(result.std, 0.1 * np.array(nominal),
+                                        rtol=0.1))
+            self.assertEqual(result.integrated.shape, (2000, 1))
+            with self.assertRaises(ValueError):
+                tel.monte_carlo_throughput("transmission", {"fz": None})
+
+    # -----------------------------
+    # Provenance and refresh
+    # -----------------------------
+
+    def test_refresh_reingests_changed_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            a, b, c = self._write_filters(tmp, [[0.5, 0.6, 0.7, 0.8],
+                                                [0.9, 0.9, 0.9, 0.9],
+                                                [0.2, 0.4, 0.6, 0.8]])
+            tel = TelescopeModel(wavelength_unit="nm")
+            tel.add_components([(a, "fa"), (b, "fb")], n_workers=1)
+            tel.add_component(c, "fc")
+            tel.generate_throughput("transmission")
+            record = tel.provenance("fb")
+            self.assertEqual(record["path"], os.path.abspath(b))
+            self.assertEqual(record["loader"], "file")
+            self.assertListEqual(tel.refresh(), [])
+
+            # A touched file with the same content is not re-read
+            os.utime(a, ns=(1, 1))
+            self.assertListEqual(tel.refresh(), [])
+            self.assertEqual(tel.provenance("fa")["mtime_ns"], 1)
+
+            self._write_filters(tmp, [[0.5, 0.6, 0.7, 0.8],
+                                      [0.1, 0.2, 0.3, 0.4]])
+            os.utime(b, ns=(2, 2))
+            untouched = tel.column("transmission_fc").copy()
+            self.assertListEqual(tel.refresh(), ["_fb"])
+
+            self.assertTrue(np.allclose(tel.column("transmission_fb"),
+                                        [0.1, 0.2, 0.3, 0.4]))
+            self.assertTrue(np.array_equal(tel.column("transmission_fc"),
+                                           untouched))
+            self.assertTrue(np.allclose(
+                tel.column("transmission_throughput"),
+                self._expected_throughput(tel)))
+            self.assertNotEqual(tel.provenance("fb")["digest"],
+                                record["digest"])
+            with self.assertRaises(ValueError):
+                tel.refresh(["fz"])
+
     # -----------------------------
     # Spectrum mapping / interpolation
     # -----------------------------
@@ -88,6 +455,28 @@ class TestTelescopeModel(unittest.TestCase):
         self.assertAlmostEqual(result.loc[520, "Throughput"], 0.48, places=6)
         self.assertAlmostEqual(result.loc[560, "Throughput"], 0.64, places=6)
 
+    def test_map_spectra_batches_columns_and_grids(self):
+        self.telescope.df = pd.DataFrame({
+            "mirror_a": [0.4, 0.6, 0.8],
+            "mirror_b": [1.0, np.nan, 0.0],
+        }, index=[500, 550, 600])
+
+        nm_grid, um_grid = self.telescope.map_spectra(
+            [[520, 600, 650], np.array([0.5, 0.575])],
+            columns=["mirror_a", "mirror_b"]
+        )
+
+        self.assertEqual(nm_grid.shape, (2, 3))
+        # Points beyond the axis are clamped to the end values
+        self.assertTrue(np.allclose(nm_grid[0], [0.48, 0.8, 0.8]))
+        self.assertEqual(nm_grid[1, 1], 0.0)
+        self.assertTrue(np.allclose(um_grid[0], [0.4, 0.7]))
+        self.assertEqual(um_grid[1, 0], 1.0)
+
+        cubic = self.telescope.map_spectra([520, 560], ["mirror_a"],
+                                           method="quadratic")
+        self.assertTrue(np.allclose(cubic, [[0.48, 0.64]]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+
+from utils.throughput import RunningProduct
+
+
+class TestThroughput(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.rows = rng.uniform(0.5, 1.0, (6, 50))
+        self.rows[1, :10] = 0.0
+        self.rows[2, 5:15] = np.nan
+
+    def test_matches_nanprod(self):
+        product = RunningProduct(50)
+        for row in self.rows:
+            product.add(row)
+        self.assertTrue(np.allclose(product.value(),
+                                    np.nanprod(self.rows, axis=0)))
+
+    def test_remove_and_replace_without_recompute(self):
+        product = RunningProduct(50)
+        product.rebuild(self.rows)
+        product.remove(self.rows[1])
+        replacement = np.full(50, 0.25)
+        product.replace(self.rows[3], replacement)
+
+        expected_rows = np.vstack([self.rows[[0, 2, 4, 5]], replacement])
+        self.assertTrue(np.allclose(product.value(),
+                                    np.nanprod(expected_rows, axis=0)))
+        self.assertEqual(product.count, 5)
+        self.assertFalse(product.needs_rebuild)
+
+    def test_needs_rebuild(self):
+        product = RunningProduct(3, rebuild_after=2)
+        product.add(np.array([1e-200, 1.0, 1.0]))
+        product.add(np.array([1e-200, 1.0, 1.0]))
+        # Underflow is not a real zero and cannot be divided back out
+        self.assertTrue(product.needs_rebuild)
+
+        product.rebuild(np.ones((2, 3)))
+        product.remove(np.ones(3))
+        self.assertFalse(product.needs_rebuild)
+        product.remove(np.ones(3))
+        self.assertTrue(product.needs_rebuild)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from method_lib.telescope_model import TelescopeModel
+from utils.band_integration import CumulativeIntegral
+from utils.tolerance import (
+    ComponentTolerance,
+    monte_carlo_throughput,
+    window_weights,
+)
+
+
+class TestTolerance(unittest.TestCase):
+
+    def setUp(self):
+        self.axis = np.linspace(500.0, 700.0, 201)
+        self.curves = np.vstack([
+            0.5 + 0.002 * (self.axis - 500.0),
+            np.full(self.axis.size, 0.8),
+        ])
+        self.curves[1, :20] = np.nan
+
+    def test_window_weights_match_cumulative_integral(self):
+        rng = np.random.default_rng(0)
+        axis = np.sort(rng.uniform(0.0, 10.0, 50))
+        y = rng.uniform(0.0, 1.0, 50)
+        windows = [(1.3, 7.9), (-1.0, 4.2), (axis[3], axis[20]), (8.0, 8.0)]
+        expected = CumulativeIntegral(axis, y).integrate(windows)
+        self.assertTrue(np.allclose(window_weights(axis, windows) @ y,
+                                    expected))
+
+        # Blocks build their own columns, which add up to the whole
+        blocks = [window_weights(axis, windows, start, min(start + 7, 50))
+                  for start in range(0, 50, 7)]
+        self.assertTrue(np.allclose(np.hstack(blocks),
+                                    window_weights(axis, windows)))
+        self.assertEqual(blocks[-1].shape, (4, 1))
+
+    def test_exact_components_give_nominal(self):
+        result = monte_carlo_throughput(self.axis, self.curves, [None, None],
+                                        n_realizations=20, seed=1)
+        nominal = np.nanprod(self.curves, axis=0)
+        self.assertTrue(np.allclose(result.nominal, nominal))
+        self.assertTrue(np.allclose(result.percentiles, nominal))
+        self.assertTrue(np.allclose(result.std, 0.0))
+        # Uncovered samples are not integrated
+        covered = np.where(np.isnan(self.curves[1]), 0.0, nominal)
+        total = CumulativeIntegral(self.axis, covered).total()
+        self.assertTrue(np.allclose(result.integrated, total))
+        self.assertEqual(result.integrated.shape, (20, 1))
+
+    def test_integrals_match_band_integration(self):
+        telescope = TelescopeModel("nm")
+        telescope.df = pd.DataFrame(
+            {"product": self.curves[0] * self.curves[1]}, index=self.axis)
+        windows = [(500.0, 700.0), (500.0, 530.0), (600.0, 650.0)]
+
+        result = monte_carlo_throughput(self.axis, self.curves, [None, None],
+                                        n_realizations=5, windows=windows,
+                                        seed=3)
+        table = telescope.integrate_bands(windows)
+        self.assertTrue(np.allclose(result.integrated,
+                                    table["product"].to_numpy()))
+
+    def test_scale_and_shift_statistics(self):
+        tolerances = [ComponentTolerance(shift=2.0),
+                      ComponentTolerance(scale=0.05)]
+        result = monte_carlo_throughput(
+            self.axis, self.curves, tolerances, n_realizations=4000,
+            windows=[(550.0, 650.0)], seed=7, block_size=64)
+        frame = result.percentile_frame()
+        self.assertListEqual(list(frame.columns), [
+            "nominal", "mean", "std", "p2.5", "p16", "p50", "p84", "p97.5"])
+
+        # A 2 nm shift of a 0.002/nm slope is a 0.004 change, times 0.8
+        inside = slice(50, 150)
+        expected_std = np.hypot(0.004 * 0.8,
+                                0.05 * result.nominal[inside])
+        self.assertTrue(np.allclose(result.std[inside], expected_std,
+                                    rtol=0.1))
+        self.assertTrue(np.allclose(result.mean[inside],
+                                    result.nominal[inside], rtol=0.01))
+
+        summary = result.integrated_summary()
+        flux = CumulativeIntegral(self.axis, result.nominal).integrate(
+            550.0, 650.0)[0]
+        self.assertAlmostEqual(summary["mean"].iloc[0] / flux, 1.0,
+                               places=2)
+
+    def test_reproducible_across_blocks_and_workers(self):
+        tolerances = [ComponentTolerance(scale=0.02, shift=1.0), None]
+        runs = [monte_carlo_throughput(self.axis, self.curves, tolerances,
+                                       n_realizations=50, seed=3,
+                                       block_size=block, n_workers=workers)
+                for block, workers in [(201, 1), (40, 1), (40, 2)]]
+        for run in runs[1:]:
+            self.assertTrue(np.allclose(run.percentiles, runs[0].percentiles))
+            self.assertTrue(np.allclose(run.integrated, runs[0].integrated))
+
+        scatter = [ComponentTolerance(scatter=0.1), None]
+        a, b = [monte_carlo_throughput(self.axis, self.curves, scatter,
+                                       n_realizations=50, seed=3,
+                                       block_size=40, n_workers=workers)
+                for workers in (1, 2)]
+        self.assertTrue(np.array_equal(a.percentiles, b.percentiles))
+        self.assertFalse(np.allclose(a.std, 0.0))
+
+        with self.assertRaises(ValueError):
+            monte_carlo_throughput(self.axis, self.curves, [None])
+        with self.assertRaises(ValueError):
+            ComponentTolerance(scale=-0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,415 @@
+"""
+Benchmarks of the ingestion, alignment, mapping and source hot paths.
+
+Every case is timed over a few repeats and run once more under
+tracemalloc for its peak memory. Results are written as JSON; with
+``--baseline`` they are compared against an earlier run and any case
+slower than ``--threshold`` is flagged (exit code 1).
+
+With ``--dtypes float64 float32`` the model and source cases are also
+run with float32 storage, and the report gets an ``accuracy`` section
+with the error of every float32 result against float64.
+
+    python -m benchmarks.run_benchmarks --sizes 1e3 1e5 --output now.json
+    python -m benchmarks.run_benchmarks --baseline before.json
+    python -m benchmarks.run_benchmarks --dtypes float64 float32
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import (
+    write_components,
+    write_vendor_csv,
+    write_vendor_excel,
+)
+from method_lib.data_importer import read_data_file
+from method_lib.file_type_handler import load_excel_autoheader
+from method_lib.read_write_data_models import save_telescope_model
+from method_lib.source_model import SourceModel
+from method_lib.source_templates import nplanck_micron
+from method_lib.telescope_model import TelescopeModel
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+DEFAULT_COMPONENTS = [1, 4, 16]
+DEFAULT_DTYPES = ["float64"]
+# Larger spreadsheets take minutes to write and hit the Excel row limit
+EXCEL_MAX_POINTS = 10 ** 5
+# Multi-component cases above this size are skipped to bound disk use
+COMPONENTS_MAX_POINTS = 10 ** 6
+DEFAULT_THRESHOLD = 0.2
+MIN_REPEAT_SECONDS = 0.05
+
+
+class Case:
+    """
+    One benchmark: ``setup`` prepares inputs and returns the callable
+    that is timed.
+    """
+
+    def __init__(self, name: str, params: dict, setup):
+        self.name = name
+        self.params = params
+        self.setup = setup
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]"
+
+
+def _model_with_components(paths, dtype="float64"):
+    tel = TelescopeModel(wavelength_unit="nm", dtype=dtype)
+    for i, path in enumerate(paths):
+        tel.add_component(path, f"c{i}")
+    return tel
+
+
+def _params(dtype: str, **params) -> dict:
+    # float64 cases keep their original keys, so older baselines compare
+    if dtype != "float64":
+        params["dtype"] = dtype
+    return params
+
+
+def build_cases(
+        directory: str,
+        sizes: list[int],
+        components: list[int],
+        dtypes: list[str] = None
+) -> list[Case]:
+    dtypes = DEFAULT_DTYPES if dtypes is None else dtypes
+    cases = []
+    for n in sizes:
+        def csv_setup(n=n):
+            path = write_vendor_csv(os.path.join(directory, f"s{n}.csv"), n)
+            return lambda: read_data_file(path)
+
+        def txt_setup(n=n):
+            path = write_vendor_csv(os.path.join(directory, f"s{n}.txt"), n,
+                                    delimiter="\t")
+            return lambda: read_data_file(path)
+
+        def excel_setup(n=n):
+            path = write_vendor_excel(
+                os.path.join(directory, f"s{n}.xlsx"), n)
+            return lambda: load_excel_autoheader(path)
+
+        cases += [
+            Case("read_data_file_csv", {"n": n}, csv_setup),
+            Case("read_data_file_txt", {"n": n}, txt_setup),
+        ]
+        if n <= EXCEL_MAX_POINTS:
+            cases.append(Case("load_excel_autoheader", {"n": n}, excel_setup))
+
+        for dtype in dtypes:
+            def map_setup(n=n, dtype=dtype):
+                tel = _model_with_components(
+                    write_components(directory, n, 1), dtype)
+                grid = np.linspace(400.0, 2400.0, max(n // 2, 2))
+                return lambda: tel.map_spectrum(grid, "transmission_c0")
+
+            def planck_setup(n=n, dtype=dtype):
+                lam = np.linspace(0.1, 30.0, n)
+                return lambda: nplanck_micron(lam, 5800.0, dtype=dtype)
+
+            def save_setup(n=n, dtype=dtype):
+                tel = _model_with_components(
+                    write_components(directory, n, 4), dtype)
+                path = os.path.join(directory, f"model_{n}_{dtype}.sea")
+                return lambda: save_telescope_model(tel, path)
+
+            cases += [
+                Case("map_spectrum", _params(dtype, n=n), map_setup),
+                Case("nplanck_micron", _params(dtype, n=n), planck_setup),
+                Case("save_telescope_model",
+                     _params(dtype, n=n, components=4), save_setup),
+            ]
+            if n > COMPONENTS_MAX_POINTS:
+                continue
+            for k in components:
+                def add_setup(n=n, k=k, dtype=dtype):
+                    paths = write_components(directory, n, k)
+                    return lambda: _model_with_components(paths, dtype)
+
+                def throughput_setup(n=n, k=k, dtype=dtype):
+                    tel = _model_with_components(
+                        write_components(directory, n, k), dtype)
+                    return lambda: tel.generate_throughput("transmission")
+
+                cases += [
+                    Case("add_component", _params(dtype, n=n, components=k),
+                         add_setup),
+                    Case("generate_throughput",
+                         _params(dtype, n=n, components=k),
+                         throughput_setup),
+                ]
+    return cases
+
+
+def _errors(quantity: str, reference, value) -> dict:
+    reference = np.asarray(reference, dtype=np.float64)
+    error = np.abs(np.asarray(value, dtype=np.float64) - reference)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        relative = error / np.abs(reference)
+    relative = relative[np.isfinite(relative) & (reference != 0)]
+    return {
+        "quantity": quantity,
+        "max_abs_error": float(np.nanmax(error)) if error.size else 0.0,
+        "max_rel_error": float(relative.max()) if relative.size else 0.0,
+    }
+
+
+def accuracy(
+        directory: str,
+        sizes: list[int],
+        components: list[int],
+        dtype: str = "float32"
+) -> list[dict]:
+    """
+    Error of results computed from ``dtype`` storage against float64, for
+    the largest component count and every size up to
+    COMPONENTS_MAX_POINTS: the stored components, their product, a
+    mapped spectrum, blackbody fluxes and integrated band fluxes through
+    the telescope. ``memory_ratio`` is the matrix size relative to
+    float64.
+    """
+    k = max(components)
+    windows = [(500.0, 900.0), (1000.0, 1700.0), (300.0, 2500.0)]
+    rows = []
+    for n in sizes:
+        if n > COMPONENTS_MAX_POINTS:
+            continue
+        paths = write_components(directory, n, k)
+        models, stored, sources = [], [], []
+        for storage in ("float64", dtype):
+            tel = _model_with_components(paths, storage)
+            stored.append(np.array(tel.matrix))
+            tel.generate_throughput("transmission")
+            source = SourceModel(wavelength_unit="nm", sourceID="bb",
+                                 dtype=storage)
+            source.generateSourceData_BB(np.linspace(300.0, 2500.0, n),
+                                         5800.0, spectrum_unit="nm")
+            models.append(tel)
+            sources.append(source)
+        memory_ratio = models[1].matrix.nbytes / models[0].matrix.nbytes
+        grid = np.linspace(400.0, 2400.0, max(n // 2, 2))
+        pairs = [
+            ("components", *stored),
+            ("throughput", models[0].column("transmission_throughput"),
+             models[1].column("transmission_throughput")),
+            ("map_spectrum",
+             *(tel.map_spectrum(grid, "transmission_throughput")
+               ["Throughput"] for tel in models)),
+            ("blackbody_flux", *(s.df["bb"] for s in sources)),
+            ("band_flux", *(s.integrate_bands(
+                windows, telescope=tel,
+                throughput_columns=["transmission_throughput"]).to_numpy()
+                for s, tel in zip(sources, models))),
+        ]
+        for quantity, reference, value in pairs:
+            row = {"n": n, "components": k, "dtype": dtype}
+            row.update(_errors(quantity, reference, value))
+            row["memory_ratio"] = memory_ratio
+            rows.append(row)
+    return rows
+
+
+def measure(
+        func,
+        repeats: int,
+        min_seconds: float = MIN_REPEAT_SECONDS
+) -> dict:
+    """
+    Per-call wall time over ``repeats`` repeats and the peak traced memory
+    of one more call. Fast cases are called several times per repeat,
+    like ``timeit``, so each repeat lasts at least ``min_seconds``.
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, int(min_seconds / first)) if first > 0 else 1000
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds_min": min(times),
+        "seconds_median": statistics.median(times),
+        "calls_per_repeat": number,
+        "peak_bytes": int(peak),
+    }
+
+
+def run(
+        sizes: list[int] = None,
+        components: list[int] = None,
+        repeats: int = 3,
+        only: list[str] = None,
+        directory: str = None,
+        verbose: bool = False,
+        dtypes: list[str] = None
+) -> dict:
+    """
+    Run the suite and return the JSON-ready report. Any dtype other than
+    float64 in ``dtypes`` adds its :func:`accuracy` rows under
+    ``accuracy``.
+    """
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    components = DEFAULT_COMPONENTS if components is None else components
+    dtypes = DEFAULT_DTYPES if dtypes is None else dtypes
+    owns_directory = directory is None
+    directory = tempfile.mkdtemp(prefix="sea_bench_") if owns_directory \
+        else directory
+
+    results = []
+    accuracy_rows = []
+    try:
+        for case in build_cases(directory, sizes, components, dtypes):
+            if only and not any(name in case.name for name in only):
+                continue
+            func = case.setup()
+            result = {"key": case.key, "name": case.name,
+                      "params": case.params}
+            result.update(measure(func, repeats))
+            results.append(result)
+            if verbose:
+                print(f"{case.key:<55} {result['seconds_min']:10.4f} s "
+                      f"{result['peak_bytes'] / 1024 ** 2:10.1f} MiB",
+                      file=sys.stderr, flush=True)
+        for dtype in dtypes:
+            if dtype != "float64":
+                accuracy_rows += accuracy(directory, sizes, components,
+                                          dtype)
+    finally:
+        if owns_directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "dtypes": list(dtypes),
+        },
+        "results": results,
+    }
+    if accuracy_rows:
+        report["accuracy"] = accuracy_rows
+        if verbose:
+            for row in accuracy_rows:
+                print(f"{row['quantity']:<16} n={row['n']:<9} "
+                      f"{row['dtype']:<8} abs {row['max_abs_error']:9.2e} "
+                      f"rel {row['max_rel_error']:9.2e}",
+                      file=sys.stderr)
+    return report
+
+
+def compare(
+        report: dict,
+        baseline: dict,
+        threshold: float = DEFAULT_THRESHOLD
+) -> list[dict]:
+    """
+    Compare minimum times with a baseline report.
+
+    Returns one entry per case present in both, with ``ratio`` (current
+    over baseline) and ``regression`` set when the ratio exceeds
+    ``1 + threshold``.
+    """
+    previous = {r["key"]: r for r in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        before = previous.get(result["key"])
+        if before is None or before["seconds_min"] <= 0:
+            continue
+        ratio = result["seconds_min"] / before["seconds_min"]
+        rows.append({
+            "key": result["key"],
+            "baseline_seconds": before["seconds_min"],
+            "seconds": result["seconds_min"],
+            "ratio": ratio,
+            "memory_ratio": (result["peak_bytes"] / before["peak_bytes"]
+                             if before["peak_bytes"] else None),
+            "regression": ratio > 1.0 + threshold,
+        })
+    return rows
+
+
+def _parse_sizes(values):
+    return [int(float(v)) for v in values]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", nargs="+", default=None,
+                        help="points per spectrum, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--components", nargs="+", type=int, default=None,
+                        help="component counts for the model cases")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", nargs="+", default=None,
+                        help="run only cases whose name contains one of these")
+    parser.add_argument("--dtypes", nargs="+", default=None,
+                        choices=["float64", "float32"],
+                        help="storage types of the model and source cases")
+    parser.add_argument("--output", default=None,
+                        help="write the JSON report to this file")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON report of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = _parse_sizes(args.sizes) if args.sizes else None
+    report = run(sizes, args.components, args.repeats, args.only,
+                 verbose=True, dtypes=args.dtypes)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        rows = compare(report, baseline, args.threshold)
+        report["comparison"] = {"baseline": args.baseline,
+                                "threshold": args.threshold, "cases": rows}
+        for row in rows:
+            flag = "SLOWER" if row["regression"] else ""
+            print(f"{row['key']:<55} x{row['ratio']:6.2f} {flag}",
+                  file=sys.stderr)
+        if any(row["regression"] for row in rows):
+            status = 1
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
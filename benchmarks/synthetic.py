@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+'''
+Synthetic spectra and vendor files for the benchmarks
+'''
+
+VENDOR_PREAMBLE = [
+    "Synthetic Optics Inc.",
+    "Part: SYN-{index:04d}, generated for benchmarking",
+    "",
+]
+
+
+def synthetic_spectrum(
+        n_points: int,
+        start: float = 300.0,
+        stop: float = 2500.0,
+        seed: int = 0
+):
+    """
+    A smooth filter-like curve with ``n_points`` samples.
+
+    Returns
+    -------
+    tuple
+        ``(wavelength, transmission)``, the transmission in percent.
+    """
+    rng = np.random.default_rng(seed)
+    wavelength = np.linspace(start, stop, n_points)
+    centre = rng.uniform(start, stop)
+    width = (stop - start) * rng.uniform(0.05, 0.3)
+    transmission = 100.0 * np.exp(-0.5 * ((wavelength - centre) / width) ** 2)
+    transmission += rng.normal(0.0, 0.05, n_points)
+    return wavelength, np.clip(transmission, 0.0, 100.0)
+
+
+def _frame(n_points, index, start, stop):
+    wavelength, transmission = synthetic_spectrum(
+        n_points, start, stop, seed=index)
+    return pd.DataFrame({"Wavelength (nm)": wavelength,
+                         "Transmission (%)": transmission})
+
+
+def write_vendor_csv(
+        path: str,
+        n_points: int,
+        index: int = 0,
+        start: float = 300.0,
+        stop: float = 2500.0,
+        delimiter: str = ","
+) -> str:
+    """Write a delimited spectrum behind a short vendor preamble."""
+    with open(path, "w", newline="") as file:
+        for line in VENDOR_PREAMBLE:
+            file.write(line.format(index=index) + "\n")
+        _frame(n_points, index, start, stop).to_csv(
+            file, sep=delimiter, index=False, float_format="%.9g")
+    return path
+
+
+def write_vendor_excel(
+        path: str,
+        n_points: int,
+        index: int = 0,
+        start: float = 300.0,
+        stop: float = 2500.0
+) -> str:
+    """
+    Write a spreadsheet in the usual vendor layout: a title row, data in
+    the third and fourth column and notes in the first one.
+    """
+    frame = _frame(n_points, index, start, stop)
+    rows = np.full((n_points + 2, 4), None, dtype=object)
+    rows[0, 2] = VENDOR_PREAMBLE[0]
+    rows[1, 2:] = frame.columns
+    rows[2:, 2:] = frame.to_numpy()
+    rows[min(6, n_points + 1), 0] = "Product Raw Data"
+    pd.DataFrame(rows).to_excel(path, header=False, index=False)
+    return path
+
+
+def write_components(
+        directory: str,
+        n_points: int,
+        n_components: int,
+        extension: str = ".csv"
+) -> list[str]:
+    """
+    Write ``n_components`` files with overlapping but different axes, so
+    adding them exercises the axis merge and alignment.
+    """
+    paths = []
+    for i in range(n_components):
+        path = os.path.join(directory, f"component_{n_points}_{i}{extension}")
+        if not os.path.exists(path):
+            start = 300.0 + 7.3 * i
+            delimiter = "\t" if extension == ".txt" else ","
+            write_vendor_csv(path, n_points, i, start, start + 2200.0,
+                             delimiter)
+        paths.append(path)
+    return paths
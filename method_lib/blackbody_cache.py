@@ -0,0 +1,161 @@
+import hashlib
+import json
+
+import numpy as np
+
+from method_lib.source_templates import planck_grid
+from utils.array_store import DiskArrayStore
+from utils.lru_cache import ByteBudgetLRU
+from utils.spectrum_axis import axis_digest
+
+DEFAULT_BB_CACHE_BYTES = 256 * 1024 ** 2
+
+
+class BlackbodyCache:
+    """
+    Memoized Planck curves keyed on (axis, temperature, SI, NPHOTONS).
+
+    Curves are kept in an in-memory LRU with a byte budget and, when a
+    directory is given, in an on-disk tier that survives between runs.
+    Every returned curve is a read-only array shared with the cache, so
+    callers that want to modify it must copy it first.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget of the in-memory tier.
+    disk_dir : str, optional
+        Folder of the on-disk tier. No disk tier when omitted.
+    disk_max_bytes : int, optional
+        Size cap of the on-disk tier.
+    """
+
+    def __init__(
+            self,
+            max_bytes: int | None = DEFAULT_BB_CACHE_BYTES,
+            disk_dir: str = None,
+            disk_max_bytes: int | None = None
+    ):
+        self._memory = ByteBudgetLRU(max_bytes)
+        self._disk = None
+        if disk_dir is not None:
+            self._disk = DiskArrayStore(disk_dir, disk_max_bytes)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(axis_key, temperature, SI, NPHOTONS, spectrum_unit) -> str:
+        payload = json.dumps([axis_key, float(temperature), bool(SI),
+                              bool(NPHOTONS), spectrum_unit])
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _lookup(self, key):
+        cached = self._memory.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        if self._disk is not None:
+            arrays = self._disk.get(key)
+            if arrays is not None:
+                self.disk_hits += 1
+                cached = self._remember(key, arrays["flux"],
+                                        str(arrays["units"]))
+                return cached
+        return None
+
+    def _remember(self, key, flux, units, to_disk=False):
+        flux = np.array(flux, dtype=np.float64)
+        flux.flags.writeable = False
+        self._memory.put(key, (flux, units), flux.nbytes)
+        if to_disk and self._disk is not None:
+            self._disk.put(key, {"flux": flux, "units": np.array(units)})
+        return flux, units
+
+    def get(
+            self,
+            lambda_micron,
+            temperature,
+            SI=False,
+            NPHOTONS=False,
+            spectrum_unit=None
+    ):
+        """
+        Planck curve for one temperature, see :func:`nplanck_micron`.
+
+        Returns
+        -------
+        tuple
+            ``(bbflux, units)`` with a read-only ``bbflux``.
+        """
+        key = self._key(axis_digest(lambda_micron), temperature, SI,
+                        NPHOTONS, spectrum_unit)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        self.misses += 1
+        flux, units = planck_grid(lambda_micron, temperature, SI=SI,
+                                  NPHOTONS=NPHOTONS,
+                                  spectrum_unit=spectrum_unit)
+        return self._remember(key, flux[0], units, to_disk=True)
+
+    def get_grid(
+            self,
+            lambda_micron,
+            temperatures,
+            SI=False,
+            NPHOTONS=False,
+            spectrum_unit=None,
+            dtype=np.float64
+    ):
+        """
+        Planck curves for many temperatures, see :func:`planck_grid`.
+
+        Cached curves are reused and every missing temperature is computed
+        in a single grid pass. The stacked result is a new array of
+        ``dtype``; the cache itself always holds float64 curves.
+        """
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+        lam = np.asarray(lambda_micron, dtype=np.float64)
+        axis_key = axis_digest(lam)
+        keys = [self._key(axis_key, t, SI, NPHOTONS, spectrum_unit)
+                for t in temperatures]
+
+        out = np.empty((temperatures.size, lam.size), dtype=dtype)
+        missing = []
+        units = None
+        for row, key in enumerate(keys):
+            cached = self._lookup(key)
+            if cached is None:
+                missing.append(row)
+            else:
+                out[row], units = cached
+
+        if missing:
+            self.misses += len(missing)
+            flux, units = planck_grid(lam, temperatures[missing], SI=SI,
+                                      NPHOTONS=NPHOTONS,
+                                      spectrum_unit=spectrum_unit)
+            out[missing] = flux
+            for row, values in zip(missing, flux):
+                self._remember(keys[row], values, units, to_disk=True)
+        return out, units
+
+    def clear(self, disk: bool = False):
+        self._memory.clear()
+        if disk and self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": memory["evictions"],
+            "entries": memory["entries"],
+            "bytes": memory["bytes"],
+            "max_bytes": memory["max_bytes"],
+            "disk_entries": (len(self._disk.entries())
+                             if self._disk is not None else 0),
+        }
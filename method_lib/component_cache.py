@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from definitions import ROOT_DIR
+from utils.array_store import DiskArrayStore
+
+# Bump when the stored layout or the preparation steps change so old
+# entries stop matching instead of being read with the wrong meaning.
+CACHE_FORMAT_VERSION = 2
+DEFAULT_CACHE_DIR = os.path.join(ROOT_DIR, ".component_cache")
+DEFAULT_CACHE_BYTES = 256 * 1024 ** 2
+
+
+class ComponentCache:
+    """
+    On-disk cache of parsed, header-standardized and unit-normalized
+    components.
+
+    Entries are content addressed: the key combines a SHA-256 of the file
+    bytes with the reader options and the target wavelength unit, so an
+    edited file or a different option set never returns a stale curve.
+    The digest of a file is memoized on (path, size, mtime) so repeated
+    lookups of an unchanged file do not re-read it.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Cache folder. Defaults to ``<ROOT_DIR>/.component_cache``.
+    max_bytes : int, optional
+        Size cap; least recently used entries are evicted beyond it.
+    """
+
+    def __init__(
+            self,
+            directory: str = None,
+            max_bytes: int | None = DEFAULT_CACHE_BYTES
+    ):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.store = DiskArrayStore(self.directory, max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}
+
+    '''
+    Keys
+    '''
+
+    def file_digest(self, path: str) -> str:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        stamp = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(stamp)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            self._digests[stamp] = digest
+        return digest
+
+    @staticmethod
+    def _path_tag(path: str) -> str:
+        return hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+
+    @staticmethod
+    def _options_tag(options: dict) -> str:
+        payload = json.dumps(options, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+    def make_key(self, path: str, **options) -> str:
+        """
+        Build the cache key for ``path`` read with ``options``.
+
+        The key is ``<path tag>-<options tag>-<content key>``. The path
+        tag lets :meth:`invalidate` drop everything derived from one file,
+        the options tag finds the older versions of one reading of it and
+        the content key covers the file bytes and every option.
+        """
+        payload = json.dumps(
+            {"version": CACHE_FORMAT_VERSION,
+             "digest": self.file_digest(path),
+             "options": options},
+            sort_keys=True,
+            default=str
+        )
+        content_key = hashlib.sha256(payload.encode()).hexdigest()[:32]
+        return (f"{self._path_tag(path)}-{self._options_tag(options)}-"
+                f"{content_key}")
+
+    '''
+    Lookup and storage
+    '''
+
+    def load(self, path: str, **options):
+        """
+        Return the cached component for ``path`` or None on a miss.
+
+        Returns
+        -------
+        tuple or None
+            ``(df, header, units)`` where ``df`` is indexed by wavelength,
+            ``header`` is the full list of cleaned headers and ``units``
+            maps cleaned header to detected unit.
+        """
+        if not os.path.isfile(path):
+            return None
+        arrays = self.store.get(self.make_key(path, **options))
+        if arrays is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        info = json.loads(str(arrays["info"]))
+        df = pd.DataFrame(
+            arrays["values"].T,
+            index=pd.Index(arrays["wavelength"], name="wavelength"),
+            columns=info["columns"]
+        )
+        return df, info["header"], info["units"]
+
+    def save(
+            self,
+            path: str,
+            df: pd.DataFrame,
+            header: list[str],
+            units: dict,
+            **options
+    ):
+        """
+        Store a prepared component, replacing older versions of it read
+        with the same options. Entries of the same file read with other
+        options are kept.
+        """
+        if not os.path.isfile(path):
+            return
+        key = self.make_key(path, **options)
+        # Same file and options but other bytes: the file changed since
+        prefix = key.rsplit("-", 1)[0] + "-"
+        for entry in self.store.entries():
+            if entry["key"].startswith(prefix) and entry["key"] != key:
+                self.store.discard(entry["key"])
+        info = {
+            "source": os.path.abspath(path),
+            "columns": [str(c) for c in df.columns],
+            "header": list(header),
+            "units": units,
+            "options": options,
+        }
+        self.store.put(key, {
+            "wavelength": np.ascontiguousarray(df.index, dtype=np.float64),
+            "values": np.ascontiguousarray(
+                df.to_numpy(dtype=np.float64).T),
+            "info": np.array(json.dumps(info, default=str)),
+        })
+
+    def invalidate(self, path: str = None) -> int:
+        """
+        Drop cached entries for ``path``, or every entry if no path is
+        given. Returns the number of removed entries.
+        """
+        if path is None:
+            count = len(self.store.entries())
+            self.store.clear()
+            self._digests.clear()
+            return count
+        prefix = self._path_tag(path) + "-"
+        removed = 0
+        for entry in self.store.entries():
+            if entry["key"].startswith(prefix):
+                removed += self.store.discard(entry["key"])
+        return removed
+
+    '''
+    Maintenance
+    '''
+
+    def warm(
+            self,
+            paths: list[str],
+            wavelength_unit: str,
+            **reader_kwargs
+    ) -> int:
+        """
+        Parse ``paths`` into the cache ahead of time.
+
+        Returns the number of files that had to be parsed.
+        """
+        # Imported here, the model module itself imports this one
+        from method_lib.telescope_model import prepare_component
+
+        parsed = 0
+        for path in paths:
+            misses = self.misses
+            prepare_component(path, wavelength_unit, self, **reader_kwargs)
+            parsed += self.misses - misses
+        return parsed
+
+    def info(self) -> pd.DataFrame:
+        """
+        Summarize the cache contents, most recently used first.
+        """
+        rows = []
+        for entry in self.store.entries():
+            arrays = self.store.get(entry["key"], touch=False)
+            if arrays is None:
+                continue
+            info = json.loads(str(arrays["info"]))
+            rows.append({
+                "key": entry["key"],
+                "source": info["source"],
+                "columns": info["columns"],
+                "n_samples": arrays["wavelength"].size,
+                "size": entry["size"],
+                "last_access": pd.Timestamp(entry["last_access"], unit="s"),
+            })
+        return pd.DataFrame(
+            rows,
+            columns=["key", "source", "columns", "n_samples", "size",
+                     "last_access"]
+        )
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.store.entries()),
+            "bytes": self.store.total_bytes(),
+            "max_bytes": self.store.max_bytes,
+        }
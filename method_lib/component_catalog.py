@@ -0,0 +1,351 @@
+import json
+import os
+import re
+import sqlite3
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from definitions import ROOT_DIR
+from method_lib.telescope_model import prepare_component
+from utils.instrumentation import instrumented
+from utils.optical_density import column_unit, to_fraction
+from utils.provenance import source_stamp
+from utils.unit_conversions import convert_unit
+
+'''
+SQLite component catalog
+
+    components   one row per ingested component: source file, digest,
+                 column names and units, user metadata and the curve
+                 itself as zlib-compressed little-endian float64 blobs
+                 (axis and one row per column), in CATALOG_UNIT.
+    curves       one row per column: its unit, spectral bounds and a
+                 summary blob, the cumulative integral of the curve as a
+                 fraction at SUMMARY_KNOTS points.
+    curve_bounds R*Tree on the curve bounds.
+
+A coverage query is answered by the R*Tree and the summaries alone; the
+curve blobs are only read to load a component.
+'''
+
+CATALOG_FORMAT_VERSION = 1
+CATALOG_UNIT = "nm"
+DEFAULT_CATALOG_PATH = os.path.join(ROOT_DIR, "component_catalog.sqlite")
+SUMMARY_KNOTS = 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS components (
+    component_id TEXT PRIMARY KEY,
+    source_path TEXT,
+    digest TEXT,
+    ingested REAL,
+    columns TEXT NOT NULL,
+    units TEXT NOT NULL,
+    header TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    n_samples INTEGER NOT NULL,
+    lo REAL,
+    hi REAL,
+    axis BLOB NOT NULL,
+    curve BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS curves (
+    curve_id INTEGER PRIMARY KEY,
+    component_id TEXT NOT NULL
+        REFERENCES components(component_id) ON DELETE CASCADE,
+    column_name TEXT NOT NULL,
+    unit TEXT,
+    lo REAL NOT NULL,
+    hi REAL NOT NULL,
+    summary BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS curves_component ON curves(component_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS curve_bounds USING rtree(
+    curve_id, lo, hi
+);
+"""
+
+
+def _pack(values: np.ndarray) -> bytes:
+    return zlib.compress(np.ascontiguousarray(values, dtype="<f8").tobytes())
+
+
+def _unpack(blob: bytes, shape) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(blob), dtype="<f8").reshape(shape)
+
+
+def curve_summary(axis: np.ndarray, values: np.ndarray):
+    """
+    Spectral bounds and cumulative-integral summary of one fraction curve.
+
+    Returns ``(lo, hi, knots)`` where ``knots`` is a (2, m) array of axis
+    points and the trapezoid integral of the curve from ``lo`` up to
+    them. Samples outside the finite span of the curve are ignored.
+    """
+    finite = np.isfinite(values)
+    if finite.sum() < 2:
+        return None
+    x = axis[finite]
+    y = values[finite]
+    cumulative = np.zeros_like(x)
+    np.cumsum(0.5 * (y[1:] + y[:-1]) * np.diff(x), out=cumulative[1:])
+    if x.size > SUMMARY_KNOTS:
+        knots = np.linspace(x[0], x[-1], SUMMARY_KNOTS)
+        cumulative = np.interp(knots, x, cumulative)
+        x = knots
+    return float(x[0]), float(x[-1]), np.vstack([x, cumulative])
+
+
+class ComponentCatalog:
+    """
+    Local SQLite catalog of ingested components.
+
+    Parameters
+    ----------
+    path : str, optional
+        Database file, ``<ROOT_DIR>/component_catalog.sqlite`` by default.
+        ``":memory:"`` keeps the catalog in memory.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or DEFAULT_CATALOG_PATH
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        with self.connection:
+            self.connection.executescript(_SCHEMA)
+            self.connection.execute(
+                f"PRAGMA user_version = {CATALOG_FORMAT_VERSION}")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM components").fetchone()[0]
+
+    def __contains__(self, componentID: str) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM components WHERE component_id = ?",
+            (componentID,)).fetchone() is not None
+
+    def ids(self) -> list[str]:
+        return [row[0] for row in self.connection.execute(
+            "SELECT component_id FROM components ORDER BY component_id")]
+
+    '''
+    Ingestion
+    '''
+
+    @instrumented("ComponentCatalog.add")
+    def add(
+            self,
+            filePath: str,
+            componentID: str,
+            metadata: dict = None,
+            replace: bool = True,
+            **reader_kwargs
+    ):
+        """
+        Parse a component file once and store it under ``componentID``.
+
+        The curve is stored as prepared by :meth:`TelescopeModel.
+        add_component` (standardized headers, axis in CATALOG_UNIT), so
+        loading it back gives the same columns without the file.
+        """
+        if not replace and componentID in self:
+            raise ValueError(f"Component already in catalog: {componentID}")
+        # The digest is taken from the bytes the reader consumes
+        source = source_stamp(filePath)
+        df, header, units = prepare_component(filePath, CATALOG_UNIT,
+                                              source=source, **reader_kwargs)
+        self.add_frame(df, componentID, header, units, metadata,
+                       source_path=source["path"], digest=source["digest"])
+
+    def add_frame(
+            self,
+            df: pd.DataFrame,
+            componentID: str,
+            header: list[str] = None,
+            units: dict = None,
+            metadata: dict = None,
+            source_path: str = None,
+            digest: str = None
+    ):
+        """
+        Store an already prepared component: ``df`` indexed by wavelength
+        in CATALOG_UNIT with one column per curve.
+        """
+        columns = [str(c) for c in df.columns]
+        header = ["wavelength"] + columns if header is None else header
+        units = units or {}
+        axis = df.index.to_numpy(dtype=np.float64)
+        matrix = df.to_numpy(dtype=np.float64).T
+
+        curves = []
+        for name, values in zip(columns, matrix):
+            unit = column_unit(name, units.get(name))
+            summary = curve_summary(axis, to_fraction(values, unit))
+            if summary is not None:
+                curves.append((name, unit) + summary)
+
+        with self.connection:
+            self._delete(componentID)
+            self.connection.execute(
+                "INSERT INTO components VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (componentID, source_path, digest, time.time(),
+                 json.dumps(columns), json.dumps(units), json.dumps(header),
+                 json.dumps(metadata or {}), axis.size,
+                 float(axis[0]) if axis.size else None,
+                 float(axis[-1]) if axis.size else None,
+                 _pack(axis), _pack(matrix)))
+            for name, unit, lo, hi, knots in curves:
+                cursor = self.connection.execute(
+                    "INSERT INTO curves (component_id, column_name, unit, "
+                    "lo, hi, summary) VALUES (?, ?, ?, ?, ?, ?)",
+                    (componentID, name, unit, lo, hi, _pack(knots)))
+                self.connection.execute(
+                    "INSERT INTO curve_bounds VALUES (?, ?, ?)",
+                    (cursor.lastrowid, lo, hi))
+
+    def remove(self, componentID: str):
+        if componentID not in self:
+            raise ValueError(f"Unknown component: {componentID}")
+        with self.connection:
+            self._delete(componentID)
+
+    def _delete(self, componentID: str):
+        self.connection.execute(
+            "DELETE FROM curve_bounds WHERE curve_id IN "
+            "(SELECT curve_id FROM curves WHERE component_id = ?)",
+            (componentID,))
+        self.connection.execute(
+            "DELETE FROM curves WHERE component_id = ?", (componentID,))
+        self.connection.execute(
+            "DELETE FROM components WHERE component_id = ?", (componentID,))
+
+    '''
+    Reading
+    '''
+
+    def info(self, componentID: str) -> dict:
+        """Everything stored about a component except its curve."""
+        row = self.connection.execute(
+            "SELECT source_path, digest, ingested, columns, units, metadata, "
+            "n_samples, lo, hi FROM components WHERE component_id = ?",
+            (componentID,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown component: {componentID}")
+        return {
+            "component_id": componentID,
+            "source_path": row[0],
+            "digest": row[1],
+            "ingested": row[2],
+            "columns": json.loads(row[3]),
+            "units": json.loads(row[4]),
+            "metadata": json.loads(row[5]),
+            "n_samples": row[6],
+            "spectral_bounds": (row[7], row[8]),
+            "spectral_unit": CATALOG_UNIT,
+        }
+
+    @instrumented("ComponentCatalog.load")
+    def load(
+            self,
+            componentID: str,
+            wavelength_unit: str = CATALOG_UNIT
+    ):
+        """
+        A stored component as :func:`prepare_component` returns it:
+        ``(df, header, units)`` with the axis in ``wavelength_unit``.
+        """
+        row = self.connection.execute(
+            "SELECT columns, units, header, n_samples, axis, curve "
+            "FROM components WHERE component_id = ?",
+            (componentID,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown component: {componentID}")
+        columns = json.loads(row[0])
+        n_samples = row[3]
+        axis = _unpack(row[4], (n_samples,))
+        if wavelength_unit != CATALOG_UNIT:
+            axis = np.round(convert_unit(axis, CATALOG_UNIT,
+                                         wavelength_unit), 9)
+        matrix = _unpack(row[5], (len(columns), n_samples))
+        df = pd.DataFrame(matrix.T, index=pd.Index(axis, name="wavelength"),
+                          columns=columns)
+        return df, json.loads(row[2]), json.loads(row[1])
+
+    @instrumented("ComponentCatalog.query")
+    def query(
+            self,
+            lo: float,
+            hi: float,
+            unit: str = CATALOG_UNIT,
+            column: str = None,
+            min_mean: float = None
+    ) -> pd.DataFrame:
+        """
+        Curves covering the whole band [lo, hi], with their mean value
+        over it as a fraction (percentages and optical densities are
+        converted).
+
+        Only the index and the summaries are read. The mean comes from the
+        cumulative-integral summary, which is exact for curves of up to
+        SUMMARY_KNOTS samples and interpolated between knots beyond.
+
+        Parameters
+        ----------
+        lo, hi : float
+            Band edges in ``unit``.
+        column : str, optional
+            Regular expression the column name must match, e.g.
+            ``"transmission"``.
+        min_mean : float, optional
+            Keep only curves whose mean over the band is at least this
+            fraction.
+
+        Returns
+        -------
+        pd.DataFrame
+            ``component_id``, ``column``, ``unit``, ``lo``, ``hi`` (in
+            CATALOG_UNIT) and ``mean``, best mean first.
+        """
+        lo, hi = sorted(float(v) for v in convert_unit(
+            np.array([lo, hi]), unit, CATALOG_UNIT))
+        rows = self.connection.execute(
+            "SELECT c.component_id, c.column_name, c.unit, c.lo, c.hi, "
+            "c.summary FROM curve_bounds b JOIN curves c "
+            "ON c.curve_id = b.curve_id "
+            "WHERE b.lo <= ? AND b.hi >= ? AND c.lo <= ? AND c.hi >= ?",
+            (lo, hi, lo, hi)).fetchall()
+
+        pattern = re.compile(column) if column else None
+        records = []
+        for componentID, name, curve_unit, curve_lo, curve_hi, blob in rows:
+            if pattern is not None and not pattern.search(name):
+                continue
+            x, cumulative = _unpack(blob, (2, -1))
+            if hi > lo:
+                edges = np.interp([lo, hi], x, cumulative)
+                mean = (edges[1] - edges[0]) / (hi - lo)
+            else:
+                mean = np.nan
+            if min_mean is not None and not mean >= min_mean:
+                continue
+            records.append((componentID, name, curve_unit, curve_lo,
+                            curve_hi, mean))
+        frame = pd.DataFrame(records, columns=[
+            "component_id", "column", "unit", "lo", "hi", "mean"])
+        return frame.sort_values("mean", ascending=False,
+                                 kind="stable").reset_index(drop=True)
@@ -0,0 +1,386 @@
+import itertools
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from method_lib.component_cache import ComponentCache
+from method_lib.telescope_model import TelescopeModel
+from utils.instrumentation import instrumented
+from utils.optical_density import to_fraction
+from utils.precision import storage_dtype
+from utils.tolerance import window_weights
+
+'''
+Combinatorial configuration sweep
+
+Every candidate of every slot (filters, windows, coatings, ...) is
+loaded and aligned once, into one TelescopeModel. The configurations
+are the Cartesian product of the slots, visited depth first: the
+product of the first slots is computed once per prefix and shared by
+every configuration below it, and the last slot is scored for all of
+its candidates with one matrix product. Workers read the aligned curves
+from shared memory instead of receiving copies.
+'''
+
+
+class SweepSlot:
+    """
+    One position of the optical train and its candidate components.
+
+    Parameters
+    ----------
+    name : str
+        Slot name, used as a column of the result table.
+    candidates : dict
+        Candidate name -> component file.
+    column : str, optional
+        Regular expression picking the curve of each file; the first
+        data column by default.
+    complement : bool, optional
+        Use ``1 - curve``, e.g. for an AR coating given as reflectance.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            candidates: dict,
+            column: str = None,
+            complement: bool = False
+    ):
+        if not candidates:
+            raise ValueError(f"Slot {name} has no candidates.")
+        self.name = name
+        self.candidates = dict(candidates)
+        self.column = column
+        self.complement = complement
+
+
+class ConfigurationSweep:
+    """
+    Throughput and integrated signal of every combination of candidate
+    components, ranked by score.
+
+    Example::
+
+        sweep = ConfigurationSweep(wavelength_unit="nm")
+        sweep.add_slot("filter", ["FB1750-500.xlsx", "FB6000-500.xlsx"],
+                       column="transmission")
+        sweep.add_slot("window", ["ZnSe_Window_Data.xlsx"])
+        sweep.add_slot("coating", ["E4_Broadband_AR_Coating.xlsx"],
+                       complement=True)
+        table = sweep.run(source, windows=[(1500, 2000)])
+
+    Parameters
+    ----------
+    wavelength_unit : str, optional
+        Unit of the shared axis and of the integration windows.
+    component_cache : ComponentCache, optional
+        Cache of parsed component files.
+    dtype : numpy dtype, optional
+        Storage type of the aligned curves, float64 or float32. Products
+        and scores are accumulated in float64 either way.
+    """
+
+    def __init__(
+            self,
+            wavelength_unit: str = "nm",
+            component_cache: ComponentCache = None,
+            dtype=np.float64
+    ):
+        self.wavelength_unit = wavelength_unit
+        self.component_cache = component_cache
+        self.dtype = storage_dtype(dtype)
+        self.slots = []
+        self.model = None
+        self.curves = None
+        self._offsets = []
+
+    def add_slot(
+            self,
+            name: str,
+            candidates,
+            column: str = None,
+            complement: bool = False
+    ):
+        """
+        Add a slot. ``candidates`` is a dict of name -> file, or a list of
+        files named after their file stem.
+        """
+        if any(slot.name == name for slot in self.slots):
+            raise ValueError(f"Duplicate slot: {name}")
+        if not isinstance(candidates, dict):
+            candidates = {os.path.splitext(os.path.basename(path))[0]: path
+                          for path in candidates}
+        self.slots.append(SweepSlot(name, candidates, column, complement))
+        self.model = None
+        self.curves = None
+
+    @property
+    def sizes(self) -> list[int]:
+        return [len(slot.candidates) for slot in self.slots]
+
+    @property
+    def n_configurations(self) -> int:
+        return int(np.prod(self.sizes)) if self.slots else 0
+
+    '''
+    Loading
+    '''
+
+    @instrumented("ConfigurationSweep.load")
+    def load(
+            self,
+            n_workers: int = None,
+            **reader_kwargs
+    ):
+        """
+        Read and align every candidate once.
+
+        The chosen curve of each candidate is converted to a fraction from
+        its recorded unit and stored as one row of :attr:`curves`.
+        Missing samples count as 1, as in
+        :meth:`TelescopeModel.generate_throughput`.
+        """
+        if not self.slots:
+            raise ValueError("No slots to sweep.")
+        model = TelescopeModel(self.wavelength_unit, ID="configuration_sweep",
+                               component_cache=self.component_cache,
+                               dtype=self.dtype)
+        model.add_components(
+            [(path, f"{slot.name}_{candidate}")
+             for slot in self.slots
+             for candidate, path in slot.candidates.items()],
+            n_workers, **reader_kwargs)
+
+        units = model.metadata["column_units"]
+        curves = np.empty((sum(self.sizes), model.axis.size),
+                          dtype=self.dtype)
+        offsets = []
+        row = 0
+        for slot in self.slots:
+            offsets.append(row)
+            pattern = re.compile(slot.column or "")
+            for candidate in slot.candidates:
+                suffix = f"_{slot.name}_{candidate}"
+                # The columns the component added, so that "filter_a"
+                # never picks up a column of "ir_filter_a"
+                names = [name for name in
+                         model.metadata["component_columns"][suffix]
+                         if pattern.search(name[:-len(suffix)])]
+                if not names:
+                    raise ValueError(
+                        f"No column of {slot.name}/{candidate} matches "
+                        f"{slot.column!r}.")
+                values = to_fraction(model.column(names[0]),
+                                     units.get(names[0]))
+                curves[row] = 1.0 - values if slot.complement else values
+                row += 1
+        np.copyto(curves, 1.0, where=np.isnan(curves))
+
+        self.model = model
+        self.curves = curves
+        self._offsets = offsets
+
+    @property
+    def axis(self) -> np.ndarray:
+        return self.model.axis
+
+    def throughput(self, configuration) -> np.ndarray:
+        """
+        Throughput curve of one configuration, given as a dict slot ->
+        candidate or as candidate names in slot order.
+        """
+        if self.curves is None:
+            self.load()
+        if isinstance(configuration, dict):
+            configuration = [configuration[slot.name] for slot in self.slots]
+        product = np.ones(self.curves.shape[1])
+        for slot, offset, candidate in zip(self.slots, self._offsets,
+                                           configuration):
+            index = list(slot.candidates).index(candidate)
+            product *= self.curves[offset + index]
+        return product
+
+    '''
+    Sweep
+    '''
+
+    @instrumented("ConfigurationSweep.run")
+    def run(
+            self,
+            source=None,
+            windows=None,
+            source_column: str = None,
+            n_workers: int = 1,
+            rank_by: str = "score",
+            top: int = None
+    ) -> pd.DataFrame:
+        """
+        Score every configuration and rank them.
+
+        Parameters
+        ----------
+        source : SourceModel, optional
+            Source weighting the integrated signal.
+        windows : array-like, optional
+            (start, stop) bands in ``wavelength_unit``; the whole axis by
+            default.
+        source_column : str, optional
+            Source column, the first by default.
+        n_workers : int, optional
+            Worker processes; the aligned curves are shared with them
+            through shared memory.
+        rank_by : str, optional
+            Column to sort by, descending. ``score`` is the summed signal
+            over all windows, or the summed mean throughput without a
+            source.
+        top : int, optional
+            Keep only the best ``top`` configurations.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per configuration, indexed by rank from 1, with the
+            candidate of every slot, the mean throughput
+            ``throughput_<start>_<stop>`` and (with a source) the signal
+            ``signal_<start>_<stop>`` of every window, and ``score``.
+        """
+        if self.curves is None:
+            self.load()
+        axis = self.model.axis
+        if windows is None:
+            windows = [(axis[0], axis[-1])]
+        windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+        weights = window_weights(axis, windows)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            averaging = weights / weights.sum(axis=1, keepdims=True)
+        blocks = [np.nan_to_num(averaging)]
+        if source is not None:
+            blocks.append(weights * self.model.source_flux(source,
+                                                           source_column))
+        weights = np.vstack(blocks)
+
+        indices, values = _run_sweep(self.curves, weights, self._offsets,
+                                     self.sizes, n_workers)
+
+        labels = [f"{lo:g}_{hi:g}" for lo, hi in windows]
+        frame = pd.DataFrame({
+            slot.name: np.asarray(list(slot.candidates), dtype=object)[
+                indices[:, s]]
+            for s, slot in enumerate(self.slots)})
+        m = len(labels)
+        for w, label in enumerate(labels):
+            frame[f"throughput_{label}"] = values[:, w]
+        if source is not None:
+            for w, label in enumerate(labels):
+                frame[f"signal_{label}"] = values[:, m + w]
+            frame["score"] = values[:, m:].sum(axis=1)
+        else:
+            frame["score"] = values[:, :m].sum(axis=1)
+
+        frame = frame.sort_values(rank_by, ascending=False, kind="stable")
+        if top is not None:
+            frame = frame.iloc[:top]
+        frame.index = pd.RangeIndex(1, len(frame) + 1, name="rank")
+        return frame
+
+
+# Arrays shared by every task, set once per worker process
+_shared = {}
+
+
+def _init_shared(curves, weights, offsets, sizes):
+    _shared.update(curves=curves, weights=weights, offsets=offsets,
+                   sizes=sizes)
+
+
+def _shared_layout(curves_shape, curves_dtype, weights_shape):
+    # Curves first, then the float64 weights at an 8-byte aligned offset
+    curves_bytes = int(np.prod(curves_shape)) * np.dtype(curves_dtype).itemsize
+    weights_offset = -(-curves_bytes // 8) * 8
+    return weights_offset, weights_offset + int(np.prod(weights_shape)) * 8
+
+
+def _shared_views(buffer, curves_shape, curves_dtype, weights_shape):
+    weights_offset, _ = _shared_layout(curves_shape, curves_dtype,
+                                       weights_shape)
+    curves = np.ndarray(curves_shape, dtype=curves_dtype, buffer=buffer)
+    weights = np.ndarray(weights_shape, dtype=np.float64, buffer=buffer,
+                         offset=weights_offset)
+    return curves, weights
+
+
+def _attach_shared(name, curves_shape, curves_dtype, weights_shape, offsets,
+                   sizes):
+    memory = shared_memory.SharedMemory(name=name)
+    _shared["memory"] = memory
+    _init_shared(*_shared_views(memory.buf, curves_shape, curves_dtype,
+                                weights_shape), offsets, sizes)
+
+
+def _descend(product, depth, indices, out):
+    curves = _shared["curves"]
+    offset = _shared["offsets"][depth]
+    size = _shared["sizes"][depth]
+    if depth == len(_shared["sizes"]) - 1:
+        # All candidates of the last slot in one matrix product
+        scores = (_shared["weights"] * product) @ \
+            curves[offset:offset + size].T
+        out.append((indices, scores.T))
+        return
+    for i in range(size):
+        _descend(product * curves[offset + i], depth + 1, indices + (i,),
+                 out)
+
+
+def _sweep_prefix(prefix):
+    curves = _shared["curves"]
+    product = np.ones(curves.shape[1])
+    for depth, i in enumerate(prefix):
+        product = product * curves[_shared["offsets"][depth] + i]
+    out = []
+    _descend(product, len(prefix), tuple(prefix), out)
+    last = _shared["sizes"][-1]
+    indices = np.array([prefix + (i,) for prefix, _ in out
+                        for i in range(last)], dtype=np.int64)
+    return indices.reshape(-1, len(_shared["sizes"])), \
+        np.concatenate([scores for _, scores in out])
+
+
+def _run_sweep(curves, weights, offsets, sizes, n_workers):
+    # Split on the shallowest depth that gives every worker a prefix
+    split = 0
+    while split < len(sizes) - 1 and np.prod(sizes[:split]) < n_workers:
+        split += 1
+    prefixes = list(itertools.product(*[range(n) for n in sizes[:split]]))
+    n_workers = min(n_workers or 1, len(prefixes))
+
+    if n_workers > 1:
+        _, size = _shared_layout(curves.shape, curves.dtype, weights.shape)
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            shared_curves, shared_weights = _shared_views(
+                memory.buf, curves.shape, curves.dtype, weights.shape)
+            shared_curves[:] = curves
+            shared_weights[:] = weights
+            with ProcessPoolExecutor(
+                    max_workers=n_workers, initializer=_attach_shared,
+                    initargs=(memory.name, curves.shape, curves.dtype.str,
+                              weights.shape, offsets, sizes)) as executor:
+                results = list(executor.map(_sweep_prefix, prefixes))
+            del shared_curves, shared_weights
+        finally:
+            memory.close()
+            memory.unlink()
+    else:
+        _init_shared(curves, weights, offsets, sizes)
+        try:
+            results = [_sweep_prefix(prefix) for prefix in prefixes]
+        finally:
+            _shared.clear()
+    return (np.concatenate([r[0] for r in results]),
+            np.concatenate([r[1] for r in results]))
@@ -1,41 +1,149 @@
+import io
+import os
 import pandas as pd
 import numpy as np
 import warnings
-from definitions import *
-from method_lib.source_templates import *
-from method_lib.file_type_handler import *
+from definitions import UNIT_TO_METERS
+from method_lib.file_type_handler import detectCompatible, load_excel_autoheader
+from utils.header_parsing import parse_header_list
+from utils.unit_conversions import detect_wavelength_unit, convert_unit
+from utils.instrumentation import span
+from utils.preamble_detection import (
+    numeric_mask,
+    find_data_start,
+    sniff_file_layout,
+)
+
+DEFAULT_CHUNK_ROWS = 1_000_000
 
 
 def read_data_file(
         fileName,
-        txtDelim=None
+        txtDelim=None,
+        sheet_layout=None,
+        buffer=None
 ) -> pd.DataFrame:
+    """
+    Read a spectrum file into a DataFrame. ``buffer`` is an open binary
+    file the contents are read from instead of ``fileName``, which still
+    gives the file type and the sample the text layout is sniffed from.
+    """
+    _, fileType = detectCompatible(fileName)
+    source = fileName if buffer is None else buffer
+
+    with span("read_data_file", file=os.path.basename(fileName)) as stage:
+        match fileType:
+            case ".csv" | ".txt":
+                df = pd.read_csv(source, **_text_read_options(fileName,
+                                                              txtDelim))
+            case ".xlsx" | ".xls":
+                # Workbooks are zip archives read out of order
+                if buffer is not None:
+                    source = io.BytesIO(buffer.read())
+                df = load_excel_autoheader(source, layout=sheet_layout)
+            case _:
+                raise ValueError(
+                    f"File type is not supported yet..."
+                )
+        stage.set(rows=len(df))
+    if df.isnull().values.any() > 0:
+        warnings.warn("Beware, the dataframe contains missing values")
+    return df
+
+
+def iter_data_file_chunks(
+        fileName,
+        chunksize: int = DEFAULT_CHUNK_ROWS,
+        txtDelim=None,
+        wavelength_unit: str = None,
+        buffer=None
+):
+    """
+    Stream a ``.csv`` or ``.txt`` spectrum in chunks of ``chunksize`` rows.
+
+    Every chunk comes back with standardized headers. When
+    ``wavelength_unit`` is given, the wavelength column is converted to
+    it; the source unit comes from the header (e.g. "Wavelength (nm)") or,
+    failing that, is detected once on the first chunk and then used for
+    the whole file so all chunks agree. ``buffer`` is an open binary file
+    to read the chunks from instead of ``fileName``, see
+    :func:`read_data_file`.
+
+    Yields
+    ------
+    tuple
+        ``(df, header, units)``: the chunk, the full list of cleaned
+        headers and the unit detected for each of them.
+    """
     _, fileType = detectCompatible(fileName)
 
     match fileType:
-        case ".csv":
-            df = pd.read_csv(fileName)
-        case ".xlsx" | ".xls":
-            df = load_excel_autoheader(fileName)
-        case ".txt":
-            if txtDelim is None:
-                txtDelim = input('Please indicate delimiter: ')
-            df = pd.read_table(fileName, delimiter=txtDelim, header=0)
+        case ".csv" | ".txt":
+            reader = pd.read_csv(fileName if buffer is None else buffer,
+                                 chunksize=chunksize,
+                                 **_text_read_options(fileName, txtDelim))
         case _:
             raise ValueError(
-                f"File type is not supported yet..."
+                f"Streaming is only supported for .csv and .txt files."
             )
-    if df.isnull().values.any() > 0:
-        warnings.warn("Beware, the dataframe contains missing values")
-    return df
+
+    header = units = None
+    source_unit = None
+    warned = False
+    with reader:
+        for chunk in reader:
+            with span("standardize_chunk", rows=len(chunk)):
+                if header is None:
+                    raw_headers = list(chunk.columns)
+                    header, units = parse_header_list(raw_headers)
+                    rename_map = dict(zip(raw_headers, header))
+                    if wavelength_unit is not None:
+                        source_unit = units.get("wavelength")
+                        if source_unit not in UNIT_TO_METERS:
+                            column = raw_headers[header.index("wavelength")]
+                            source_unit = detect_wavelength_unit(chunk[column])
+                chunk = chunk.rename(columns=rename_map)
+                if not warned and chunk.isnull().values.any():
+                    warnings.warn(
+                        "Beware, the dataframe contains missing values")
+                    warned = True
+                if source_unit not in (None, wavelength_unit):
+                    chunk["wavelength"] = convert_unit(
+                        chunk["wavelength"].to_numpy(dtype=float),
+                        from_unit=source_unit, to_unit=wavelength_unit)
+            yield chunk, header, units
+
+
+def _text_read_options(
+        fileName,
+        txtDelim=None
+) -> dict:
+    """
+    ``pandas.read_csv`` options for a delimited file, with any vendor
+    preamble skipped. The layout is sniffed from a bounded prefix, so the
+    cost does not grow with the file size. ``txtDelim`` forces the
+    delimiter.
+    """
+    with span("sniff_text_layout"):
+        if txtDelim is None:
+            layout = sniff_file_layout(fileName)
+        else:
+            layout = sniff_file_layout(fileName, delimiters=(txtDelim,))
+    if layout.names is None:
+        raise ValueError(f"No column headers found in {fileName}.")
+    return layout.read_options()
 
 
 def detect_data_start(
         df,
         numeric_threshold=0.8
 ):
-    for i, row in df.iterrows():
-        numeric_fraction = np.mean(pd.to_numeric(row, errors="coerce").notna())
-        if numeric_fraction >= numeric_threshold:
-            return i
-    return 0
+    """
+    Index label of the first row of ``df`` with at least
+    ``numeric_threshold`` numeric cells, 0 when there is none.
+    """
+    numeric = numeric_mask(df.to_numpy(dtype=object))
+    width = np.full(len(df), df.shape[1])
+    start = find_data_start(numeric.sum(axis=1), width, numeric_threshold,
+                            min_run=1, min_columns=1)
+    return df.index[start] if start is not None else 0
@@ -1,9 +1,68 @@
-import matplotlib.pyplot as plt
-import pandas as pd
-from method_lib.telescope_model import TelescopeModel
+import numpy as np
+from method_lib.telescope_model import TOTAL_THROUGHPUT
+from utils.decimation import decimate
 
 
-import matplotlib.pyplot as plt
+class DecimatedLines:
+    """
+    Lines of a matplotlib Axes that only hold the samples visible at the
+    current zoom.
+
+    Every curve is decimated to the pixel width of the axes (see
+    :func:`utils.decimation.decimate`) and decimated again for the new
+    range whenever the x limits change, so zooming into a million-point
+    curve shows its full detail while only a few thousand points are
+    ever drawn.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        Axes to draw on.
+    axis : np.ndarray
+        Increasing x values shared by every curve.
+    method : str, optional
+        ``"minmax"`` or ``"lttb"``.
+    n_bins : int, optional
+        Bins per view; the pixel width of the axes by default.
+    """
+
+    def __init__(
+            self,
+            ax,
+            axis: np.ndarray,
+            method: str = "minmax",
+            n_bins: int = None
+    ):
+        self.ax = ax
+        self.axis = axis
+        self.method = method
+        self.n_bins = n_bins
+        self.lines = []
+        # The registry holds bound methods weakly, the closure keeps this
+        # object alive as long as the axes
+        ax.callbacks.connect("xlim_changed",
+                             lambda changed: self.update(changed.get_xlim()))
+
+    def _bins(self) -> int:
+        if self.n_bins is not None:
+            return self.n_bins
+        return max(int(self.ax.get_window_extent().width), 1)
+
+    def plot(self, values: np.ndarray, **kwargs):
+        """Add a curve over the whole axis, like ``ax.plot(axis, values)``."""
+        keep = decimate(self.axis, values, self._bins(), self.method)
+        line, = self.ax.plot(self.axis[keep], values[keep], **kwargs)
+        self.lines.append((line, values))
+        return line
+
+    def update(self, x_range=None):
+        """Decimate every curve again for ``x_range`` (the view by default)."""
+        if x_range is None:
+            x_range = self.ax.get_xlim()
+        n_bins = self._bins()
+        for line, values in self.lines:
+            keep = decimate(self.axis, values, n_bins, self.method, x_range)
+            line.set_data(self.axis[keep], values[keep])
 
 
 def plot_telescope_data(
@@ -13,44 +72,71 @@ def plot_telescope_data(
     title="Telescope Throughput Model",
     xlabel="Wavelength",
     ylabel="Throughput",
+    decimation=None,
+    output=None,
+    dpi=100,
 ):
     """
-    Plot all component curves stored in telescope.df.
-    telescope.df: DataFrame indexed by wavelength
-    telescope.metadata["components"]: list of component names
+    Plot all component curves stored in the telescope model.
+    telescope.axis: shared wavelength axis
+    telescope.matrix: one row of values per column in telescope.columns
+
+    decimation: "minmax" or "lttb" draws each curve decimated to the plot
+    width and decimates again on zoom, see :class:`DecimatedLines`.
+    None draws every sample.
+    output: file to render to with the non-interactive Agg backend
+    instead of showing the figure; the format follows the extension.
+    show_total: also draw :meth:`TelescopeModel.total_throughput` when
+    the model holds more than one component column; the model is not
+    changed.
+    Returns the figure.
     """
 
-    if telescope.df.empty:
-        raise ValueError("TelescopeModel.df is empty — no data to plot.")
+    if not telescope.columns:
+        raise ValueError("TelescopeModel is empty — no data to plot.")
 
-    plt.figure(figsize=figsize)
+    # matplotlib is slow to import, load it on first use
+    if output is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=figsize, dpi=dpi)
+    else:
+        # Render off-screen without touching pyplot's global state
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    axis = telescope.axis
+    if decimation is None:
+        def draw(values, **kwargs):
+            ax.plot(axis, values, **kwargs)
+    else:
+        lines = DecimatedLines(ax, axis, decimation)
+        draw = lines.plot
 
     # Plot each component column
-    for col in telescope.df.columns:
-        plt.plot(
-            telescope.df.index,
-            telescope.df[col],
-            label=col.replace("_", " ")
+    columns = [col for col in telescope.columns if col != TOTAL_THROUGHPUT]
+    for col in columns:
+        draw(telescope.column(col), label=col.replace("_", " "))
+
+    # Plot the total throughput if requested
+    if show_total and len(columns) > 1:
+        draw(
+            telescope.total_throughput(),
+            linewidth=2.5,
+            linestyle="--",
+            label="total_throughput"
         )
 
-    # Compute & plot total throughput if requested
-    if show_total:
-        if len(telescope.df.columns) > 1:
-            total = telescope.df.product(axis=1)
-            plt.plot(
-                telescope.df.index,
-                total,
-                linewidth=2.5,
-                linestyle="--",
-                label="total_throughput"
-            )
-        else:
-            print("Only one component found — skipping total throughput.")
-
-    plt.title(title)
-    plt.xlabel(f"{xlabel} [{telescope.wavelength_unit}]")
-    plt.ylabel(ylabel)
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.tight_layout()
-    plt.show()
+    ax.set_title(title)
+    ax.set_xlabel(f"{xlabel} [{telescope.wavelength_unit}]")
+    ax.set_ylabel(ylabel)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    if output is None:
+        plt.show()
+    else:
+        fig.savefig(output)
+    return fig
@@ -1,55 +1,157 @@
 import pandas as pd
 import numpy as np
 import os
-import re
-import warnings
-import pickle
-from definitions import *
-from method_lib.source_templates import *
+from utils.preamble_detection import numeric_mask, find_data_start
+from utils.instrumentation import instrumented, span
 
 
-def load_excel_autoheader(path, max_scan_rows=10, min_nonempty_per_col=2):
+class SheetLayout:
+    """
+    Where the data sits in a spreadsheet: the header row, the columns to
+    keep and their names. Vendors ship every datasheet in the same layout,
+    so a registered layout lets repeat files skip detection entirely.
+
+    Parameters
+    ----------
+    header_row : int
+        Zero-based row of the column headers; data starts on the next row.
+    usecols : list[int]
+        Zero-based positions of the columns to load.
+    names : list[str], optional
+        Column names. Taken from the header row when omitted.
+    sheet_name : str, int, optional
+        Sheet to read, the first one by default.
+    """
+
+    def __init__(
+            self,
+            header_row: int,
+            usecols: list[int],
+            names: list[str] = None,
+            sheet_name=0
+    ):
+        self.header_row = int(header_row)
+        self.usecols = [int(c) for c in usecols]
+        self.names = list(names) if names is not None else None
+        self.sheet_name = sheet_name
+
+    def to_dict(self) -> dict:
+        """JSON-safe form, see :meth:`from_dict`."""
+        return {"header_row": self.header_row, "usecols": list(self.usecols),
+                "names": self.names, "sheet_name": self.sheet_name}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SheetLayout":
+        return cls(**data)
+
+    def __repr__(self):
+        return (f"SheetLayout(header_row={self.header_row}, "
+                f"usecols={self.usecols}, names={self.names}, "
+                f"sheet_name={self.sheet_name!r})")
+
+
+SHEET_LAYOUTS = {}
+
+
+def register_sheet_layout(
+        name: str,
+        layout: SheetLayout
+):
+    """Register ``layout`` under ``name`` for ``load_excel_autoheader``."""
+    if not isinstance(layout, SheetLayout):
+        raise ValueError("layout must be a SheetLayout.")
+    SHEET_LAYOUTS[name] = layout
+
+
+@instrumented("detect_sheet_layout")
+def detect_sheet_layout(
+        path,
+        max_scan_rows=10,
+        min_nonempty_per_col=2,
+        sheet_name=0
+) -> SheetLayout:
+    """
+    Find the header row and the valid columns of a spreadsheet by reading
+    only its first ``max_scan_rows`` rows.
+    """
+    sample = pd.read_excel(path, header=None, nrows=max_scan_rows,
+                           sheet_name=sheet_name)
+
+    # Columns with enough entries in the sample
+    valid_cols = sample.columns[sample.notna().sum() >= min_nonempty_per_col]
+    sample = sample[valid_cols]
+    if sample.empty:
+        raise ValueError(f"No data found in the first {max_scan_rows} rows "
+                         f"of {path}.")
+
+    # Header row: the last text row before the first numeric block,
+    # otherwise the one with the most string-like entries
+    cells = sample.to_numpy(dtype=object)
+    nonempty = sample.notna().to_numpy()
+    numeric = numeric_mask(cells) & nonempty
+    text_rows = (nonempty & ~numeric).any(axis=1)
+    data_start = find_data_start(numeric.sum(axis=1), nonempty.sum(axis=1),
+                                 min_run=min(3, len(sample)))
+    before = np.flatnonzero(text_rows[:data_start or 0])
+    if before.size:
+        header_row = int(sample.index[before[-1]])
+    else:
+        str_counts = (nonempty & ~numeric).sum(axis=1)
+        header_row = int(sample.index[str_counts.argmax()])
+
+    # Keep only the columns that carry a header
+    header = sample.loc[header_row]
+    named = header.notna() & (header.astype(str).str.strip() != "")
+    return SheetLayout(
+        header_row,
+        [int(c) for c in header.index[named]],
+        [str(h).strip() for h in header[named]],
+        sheet_name,
+    )
+
+
+def load_excel_autoheader(
+        path,
+        max_scan_rows=10,
+        min_nonempty_per_col=2,
+        layout=None
+):
     """
     Load an Excel file with unknown header position and padding columns.
     Automatically detects the header row and returns a clean DataFrame.
+
+    Only the first ``max_scan_rows`` rows are inspected to find the layout;
+    the numeric body is then read in one typed pass. ``layout`` is either
+    a :class:`SheetLayout` or the name of a registered one, in which case
+    detection is skipped.
     """
-    # 1. Load all data without assuming a header
-    df = pd.read_excel(path, header=None)
+    if isinstance(layout, str):
+        if layout not in SHEET_LAYOUTS:
+            raise ValueError(f"Unknown sheet layout: {layout}")
+        layout = SHEET_LAYOUTS[layout]
+    if layout is None:
+        layout = detect_sheet_layout(path, max_scan_rows,
+                                     min_nonempty_per_col)
 
-    # 2. Drop columns that are entirely empty
-    df = df.dropna(axis=1, how='all')
+    names = layout.names
+    if names is None:
+        names = pd.read_excel(path, header=None, nrows=1,
+                              skiprows=layout.header_row,
+                              usecols=layout.usecols,
+                              sheet_name=layout.sheet_name).iloc[0]
+        names = [str(h).strip() for h in names]
 
-    # 3. Use only the first few rows to identify valid columns
-    sample = df.head(max_scan_rows)
-    valid_cols = sample.columns[sample.notna().sum() >= min_nonempty_per_col]
-    df = df[valid_cols]
-
-    # 4. Find the header row: the one with the most string-like entries
-    # pandas >= 2.2 prefers .map over .applymap
-    try:
-        str_mask = df.map(lambda x: isinstance(x, str) and x.strip() != "")
-    except AttributeError:
-        # fallback for older pandas versions (<2.2)
-        str_mask = df.applymap(
-            lambda x: isinstance(x, str) and x.strip() != "")
-
-    header_row_idx = str_mask.mean(axis=1).idxmax()
-
-    # 5. Build the final DataFrame
-    header = [
-        str(h).strip() if pd.notna(h) else f"Unnamed_{i}"
-        for i, h in enumerate(df.iloc[header_row_idx])
-    ]
-    clean_df = df.iloc[header_row_idx + 1:].reset_index(drop=True)
-    clean_df.columns = header
-
-    # 6. Remove empty "Unnamed" columns
-    clean_df = clean_df.loc[:, ~clean_df.columns.str.contains('^Unnamed')]
-
-    # 7. Attempt numeric conversion where possible
-    clean_df = clean_df.apply(pd.to_numeric)
-
-    return clean_df
+    read = dict(header=None, skiprows=layout.header_row + 1,
+                usecols=layout.usecols, sheet_name=layout.sheet_name)
+    with span("excel_bulk_read") as stage:
+        try:
+            df = pd.read_excel(path, dtype=np.float64, **read)
+        except ValueError:
+            # Mixed cells: coerce column by column so bad values surface
+            df = pd.read_excel(path, **read).apply(pd.to_numeric)
+        stage.set(rows=len(df))
+    df.columns = names
+    return df
 
 
 def detectCompatible(fileName):
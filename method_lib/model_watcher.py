@@ -0,0 +1,126 @@
+import os
+import threading
+
+from utils.provenance import stamp_changed
+
+'''
+Polling watch mode
+
+A ModelWatcher keeps a warm TelescopeModel in step with the files its
+components were read from. Every poll compares the recorded file stamps
+(one stat per file, nothing is read) and refreshes only the components
+whose stamp moved, one at a time, so a file caught half-written or
+unreadable is retried on the next poll without holding up the others.
+'''
+
+
+class ModelWatcher:
+    """
+    Poll the component files of a model and refresh it when they change.
+
+    The model is only modified while :attr:`lock` is held; hold it too
+    when reading the model from another thread.
+
+    Parameters
+    ----------
+    model : TelescopeModel
+        Model whose components carry provenance (added from files).
+    directory : str, optional
+        Only watch components read from files under this directory;
+        every tracked component by default.
+    interval : float, optional
+        Seconds between polls.
+    on_refresh : callable, optional
+        Called as ``on_refresh(model, suffixes)`` after a poll refreshed
+        components.
+    on_error : callable, optional
+        Called as ``on_error(suffix, error)`` when a changed file could
+        not be read; it is retried on the next poll.
+    """
+
+    def __init__(
+            self,
+            model,
+            directory: str = None,
+            interval: float = 1.0,
+            on_refresh=None,
+            on_error=None
+    ):
+        self.model = model
+        self.directory = os.path.abspath(directory) if directory else None
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self.on_error = on_error
+        self.lock = threading.RLock()
+        self.polls = 0
+        self.errors = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _watched(self) -> list[str]:
+        provenance = self.model.metadata.get("provenance", {})
+        return [suffix for suffix, record in provenance.items()
+                if self.directory is None
+                or os.path.commonpath([self.directory, record["path"]])
+                == self.directory]
+
+    def poll(self) -> list[str]:
+        """Check every watched file once; returns the refreshed suffixes."""
+        self.polls += 1
+        provenance = self.model.metadata.get("provenance", {})
+        refreshed = []
+        for suffix in self._watched():
+            try:
+                if not stamp_changed(provenance[suffix]):
+                    continue
+                with self.lock:
+                    refreshed += self.model.refresh([suffix])
+                self.errors.pop(suffix, None)
+            except Exception as error:
+                # Keep watching; a half-written file is read again later
+                self.errors[suffix] = error
+                if self.on_error is not None:
+                    self.on_error(suffix, error)
+        if refreshed and self.on_refresh is not None:
+            self.on_refresh(self.model, refreshed)
+        return refreshed
+
+    def run(self, max_polls: int = None):
+        """Poll until :meth:`stop` is called (or ``max_polls`` polls)."""
+        count = 0
+        if self._thread is None:
+            self._stop.clear()
+        while not self._stop.is_set():
+            self.poll()
+            count += 1
+            if max_polls is not None and count >= max_polls:
+                break
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Poll in a daemon thread; returns the watcher."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True,
+                                        name="ModelWatcher")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None):
+        """End the polling; a later :meth:`run` or :meth:`start` resumes it."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -1,46 +1,400 @@
 import pickle
 import os
 import json
+import shutil
+import struct
+import tempfile
+from contextlib import contextmanager
 
+import numpy as np
 import pandas as pd
 
 from method_lib.telescope_model import TelescopeModel
+from method_lib.data_importer import iter_data_file_chunks
+from utils.precision import storage_dtype
 from definitions import ROOT_DIR
 
+'''
+Binary telescope model format (.sea)
+
+    offset 0   8 bytes   magic b"SEAMODL\\0"
+    offset 8   uint16    format version
+    offset 10  uint16    reserved
+    offset 12  uint32    header length in bytes
+    offset 16  header    UTF-8 JSON, padded with spaces to DATA_ALIGNMENT
+    then       axis      n_samples contiguous values
+    then       matrix    one contiguous block of n_samples values per column
+
+All numbers are little endian. Columns are stored one after the other so
+each of them can be memory mapped and paged in on its own.
+
+Models are written to a temporary file next to the target and moved into
+place once complete, so a failed save leaves an existing model as it was
+and a model memory mapped from the target can be saved back onto it.
+'''
+
+MODEL_MAGIC = b"SEAMODL\0"
+MODEL_FORMAT_VERSION = 1
+DATA_ALIGNMENT = 64
+_PRELUDE = struct.Struct("<8sHHI")
+
+
+def _model_path(filename: str) -> str:
+    os.makedirs(os.path.join(ROOT_DIR, "Telescope_models"), exist_ok=True)
+    return os.path.join(ROOT_DIR, "Telescope_models/", filename)
+
+
+@contextmanager
+def _replacing(path: str, mode: str = "wb"):
+    # Write to a temporary file in the target directory, then replace
+    # the target in one step; the target is left untouched on failure
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, mode) as file:
+            yield file
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _mapped_from(array: np.ndarray, path: str) -> bool:
+    # Whether ``array`` is (a view of) a memmap of ``path``
+    path = os.path.abspath(path)
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap) and array.filename is not None \
+                and os.path.abspath(array.filename) == path:
+            return True
+        array = array.base
+    return False
+
+
+def _detach(telescope_model: TelescopeModel, path: str):
+    # Copy the arrays of a model loaded from ``path`` into memory before
+    # the file is replaced under them
+    tel = telescope_model
+    if _mapped_from(tel._axis, path):
+        tel._axis = np.array(tel._axis)
+    if _mapped_from(tel._matrix, path):
+        tel._matrix = np.array(tel._matrix)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (np.ndarray, pd.Index)):
+        return np.asarray(value).tolist()
+    raise TypeError(f"Object of type {type(value).__name__} "
+                    "is not JSON serializable")
+
 
 def save_telescope_model(
         telescope_model: TelescopeModel,
         filename: str
+):
+    """
+    Save a telescope model in the binary ``.sea`` format.
+
+    The matrix is written in the model's storage dtype (``<f8`` or
+    ``<f4``) and loaded back in it; the axis is always ``<f8``. A filename
+    ending in ``.json`` is written with
+    :func:`export_telescope_model_json` instead.
+    """
+    if filename.lower().endswith(".json"):
+        return export_telescope_model_json(telescope_model, filename)
+
+    tel = telescope_model
+    axis = np.ascontiguousarray(tel.axis, dtype="<f8")
+    dtype = tel.dtype.newbyteorder("<")
+    matrix = np.ascontiguousarray(tel.matrix, dtype=dtype)
+    n_cols, n_samples = matrix.shape
+
+    path = _model_path(filename)
+    # Serialized before the target is touched
+    header = _model_header(tel.columns, n_samples, tel.wavelength_unit,
+                           tel.ID, tel.metadata, dtype)
+    with _replacing(path) as file:
+        file.write(header)
+        file.write(axis.tobytes())
+        if n_cols and n_samples:
+            file.write(matrix.tobytes())
+        _detach(tel, path)
+    return path
+
+
+def _model_header(
+        columns: list[str],
+        n_samples: int,
+        wavelength_unit: str,
+        ID: str,
+        metadata: dict,
+        dtype="<f8"
+) -> bytes:
+    """Prelude and padded JSON header of a ``.sea`` file."""
+    header = {
+        "format_version": MODEL_FORMAT_VERSION,
+        "n_samples": int(n_samples),
+        "columns": list(columns),
+        "axis_dtype": "<f8",
+        "dtype": np.dtype(dtype).newbyteorder("<").str,
+        "wavelength_unit": wavelength_unit,
+        "ID": ID,
+        "metadata": metadata,
+    }
+    header_bytes = json.dumps(header, default=_json_default).encode("utf-8")
+    pad = -(_PRELUDE.size + len(header_bytes)) % DATA_ALIGNMENT
+    header_bytes += b" " * pad
+    return _PRELUDE.pack(MODEL_MAGIC, MODEL_FORMAT_VERSION, 0,
+                         len(header_bytes)) + header_bytes
+
+
+def stream_component_to_model_file(
+        filePath: str,
+        filename: str,
+        componentID: str,
+        wavelength_unit: str,
+        suffix: str = None,
+        target_axis=None,
+        chunksize: int = None,
+        ID: str = "default_telescope",
+        dtype=np.float64,
+        **reader_kwargs
+):
+    """
+    Stream a large ``.csv``/``.txt`` component straight into a ``.sea``
+    file without holding the whole curve in memory.
+
+    With ``target_axis`` the chunks are resampled onto it as they arrive.
+    Without it the raw samples are spooled column by column to temporary
+    files and concatenated into the model file afterwards; the wavelength
+    column must then be increasing. The values are written in ``dtype``
+    (float64 or float32), like a model created with it.
+    """
+    dtype = storage_dtype(dtype).newbyteorder("<")
+    if target_axis is not None:
+        tel = TelescopeModel(wavelength_unit, ID, dtype=dtype)
+        tel.add_component_streaming(filePath, componentID, suffix,
+                                    target_axis=target_axis,
+                                    chunksize=chunksize, **reader_kwargs)
+        return save_telescope_model(tel, filename)
+
+    if chunksize is not None:
+        reader_kwargs["chunksize"] = chunksize
+    suffix = "_" + componentID if suffix is None else suffix
+    path = _model_path(filename)
+    spools = None
+    header = units = None
+    n_samples = 0
+    first = last = None
+    try:
+        for chunk, header, units in iter_data_file_chunks(
+                filePath, wavelength_unit=wavelength_unit, **reader_kwargs):
+            x = np.round(chunk["wavelength"].to_numpy(dtype="<f8"), 9)
+            values = chunk.drop(columns="wavelength").to_numpy(dtype=dtype)
+            if x.size == 0:
+                continue
+            if np.any(np.diff(x) < 0) or (last is not None and x[0] < last):
+                raise ValueError(
+                    "Streaming without a target axis needs an increasing "
+                    "wavelength column.")
+            if spools is None:
+                spools = [tempfile.TemporaryFile()
+                          for _ in range(values.shape[1] + 1)]
+                first = float(x[0])
+            spools[0].write(x.tobytes())
+            for j in range(values.shape[1]):
+                spools[j + 1].write(np.ascontiguousarray(values[:, j]).tobytes())
+            n_samples += x.size
+            last = float(x[-1])
+        if spools is None:
+            raise ValueError(f"No data found in {filePath}.")
+
+        columns = [h + suffix for h in header if h != "wavelength"]
+        metadata = {
+            "Telescope ID": ID,
+            "components": [suffix],
+            "component_columns": {suffix: columns},
+            "units": units,
+            "wavelength_axis": None,
+            "spectral_bounds": (first, last),
+            "spectral_unit": wavelength_unit,
+        }
+        header = _model_header(columns, n_samples, wavelength_unit, ID,
+                               metadata, dtype)
+        with _replacing(path) as file:
+            file.write(header)
+            for spool in spools:
+                spool.seek(0)
+                shutil.copyfileobj(spool, file, length=1 << 22)
+    finally:
+        for spool in spools or []:
+            spool.close()
+    return path
+
+
+class TelescopeModelFile:
+    """
+    Read-only view of a binary telescope model.
+
+    Opening the file only parses the header. The axis and the component
+    columns are numpy memmaps, so their pages are read from disk the
+    first time they are touched.
+
+    Parameters
+    ----------
+    path : str
+        Path of a ``.sea`` file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            prelude = file.read(_PRELUDE.size)
+            if len(prelude) < _PRELUDE.size:
+                raise ValueError(f"Not a telescope model file: {path}")
+            magic, version, _, header_len = _PRELUDE.unpack(prelude)
+            if magic != MODEL_MAGIC:
+                raise ValueError(f"Not a telescope model file: {path}")
+            if version > MODEL_FORMAT_VERSION:
+                raise ValueError(
+                    f"Model format version {version} is newer than the "
+                    f"supported version {MODEL_FORMAT_VERSION}.")
+            header = json.loads(file.read(header_len).decode("utf-8"))
+
+        self.version = version
+        self.header = header
+        self.metadata = header["metadata"]
+        self.columns = header["columns"]
+        self.n_samples = header["n_samples"]
+        self.wavelength_unit = header["wavelength_unit"]
+        self.ID = header["ID"]
+
+        axis_offset = _PRELUDE.size + header_len
+        axis_dtype = np.dtype(header["axis_dtype"])
+        dtype = np.dtype(header["dtype"])
+        data_offset = axis_offset + self.n_samples * axis_dtype.itemsize
+        if self.n_samples:
+            self.axis = np.memmap(path, dtype=axis_dtype, mode="r",
+                                  offset=axis_offset,
+                                  shape=(self.n_samples,))
+        else:
+            self.axis = np.empty(0, dtype=axis_dtype)
+        if self.n_samples and self.columns:
+            self.matrix = np.memmap(path, dtype=dtype, mode="r",
+                                    offset=data_offset,
+                                    shape=(len(self.columns),
+                                           self.n_samples))
+        else:
+            self.matrix = np.empty((len(self.columns), self.n_samples),
+                                   dtype=dtype)
+        self._column_index = {c: i for i, c in enumerate(self.columns)}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.matrix[self._column_index[column]]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._column_index
+
+    def __len__(self) -> int:
+        return self.n_samples
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame backed by the memmap, nothing is read up front."""
+        return pd.DataFrame(
+            self.matrix.T,
+            index=pd.Index(self.axis, name="wavelength", copy=False),
+            columns=self.columns,
+            copy=False
+        )
+
+    def to_telescope_model(self) -> TelescopeModel:
+        """
+        Model backed directly by the memmap. Columns stay on disk until
+        read; the first in-place change copies the matrix into memory.
+        The model keeps the storage dtype of the file.
+        """
+        tel = TelescopeModel(self.wavelength_unit, self.ID,
+                             dtype=self.matrix.dtype)
+        tel._set_arrays(self.axis, self.matrix, self.columns)
+        tel.metadata = self.metadata
+        if "component_columns" not in tel.metadata:
+            tel.metadata["component_columns"] = _component_columns(
+                self.columns, tel.metadata.get("components", []))
+        tel._restore_throughput()
+        return tel
+
+
+def _component_columns(columns: list[str], components: list[str]) -> dict:
+    # Files written before the column lists were saved: every column goes
+    # to the longest component suffix it ends with ("_filter_a" before "_a")
+    owned = {suffix: [] for suffix in components}
+    by_length = sorted(components, key=len, reverse=True)
+    for name in columns:
+        suffix = next((s for s in by_length if name.endswith(s)), None)
+        if suffix is not None:
+            owned[suffix].append(name)
+    return owned
+
+
+def open_telescope_model(filename: str) -> TelescopeModelFile:
+    """Open a binary telescope model lazily, see :class:`TelescopeModelFile`."""
+    return TelescopeModelFile(_model_path(filename))
+
+
+def load_telescope_model(filename: str) -> TelescopeModel:
+    """Load a binary telescope model into a :class:`TelescopeModel`."""
+    return open_telescope_model(filename).to_telescope_model()
+
+
+def export_telescope_model_json(
+        telescope_model: TelescopeModel,
+        filename: str
 ):
     tel = telescope_model
-    dir = ROOT_DIR
-    os.makedirs(dir+"/Telescope_models/", exist_ok=True)
-    path = os.path.join(dir, "Telescope_models/", filename)
+    path = _model_path(filename)
     data = {
         "Metadata": tel.metadata,
         "Telescope Dataframe": json.loads(tel.df.to_json(orient="index"))
     }
 
-    with open(path, "w") as file:
-        json.dump(data, file, indent=4)
+    text = json.dumps(data, indent=4, default=_json_default)
+    with _replacing(path, "w") as file:
+        file.write(text)
+    return path
 
 
 def load_telescope(filename):
-    path = os.path.join(dir, "Telescope_models/", filename)
+    path = os.path.join(ROOT_DIR, "Telescope_models/", filename)
     with open(path, "r") as file:
         data = json.load(file)
 
     df = pd.DataFrame.from_dict(data["Telescope Dataframe"], orient="index")
+    df.index = df.index.astype(float)
     metadata = data["Metadata"]
 
     return df, metadata
 
 
+def load_telescope_json(filename) -> TelescopeModel:
+    """Load a JSON export (see :func:`load_telescope`) into a model."""
+    df, metadata = load_telescope(filename)
+    tel = TelescopeModel(metadata.get("spectral_unit"),
+                         metadata.get("Telescope ID", "default_telescope"))
+    tel.df = df
+    tel.metadata = metadata
+    if "component_columns" not in tel.metadata:
+        tel.metadata["component_columns"] = _component_columns(
+            tel.columns, tel.metadata.get("components", []))
+    tel._restore_throughput()
+    return tel
+
+
 def save_pickled_telescope(obj, filename):
     """Save any Python object to a pickle file."""
-    dir = ROOT_DIR
-    os.makedirs(dir+"/Telescope_models/", exist_ok=True)
-    path = os.path.join(dir, "Telescope_models/", filename)
+    path = _model_path(filename)
 
     with open(path, 'wb') as f:
         pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
@@ -48,6 +402,6 @@ def save_pickled_telescope(obj, filename):
 
 def load_pickled_telescope(filename):
     """Load and return a Python object from a pickle file."""
-    path = os.path.join(dir, "Telescope_models/", filename)
+    path = os.path.join(ROOT_DIR, "Telescope_models/", filename)
     with open(path, 'rb') as f:
         return pickle.load(f)
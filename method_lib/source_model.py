@@ -1,20 +1,48 @@
+import numpy as np
 import pandas as pd
 
-from utils.unit_conversions import *
-from method_lib.source_templates import nplanck_micron
+from utils.unit_conversions import convert_unit, detect_wavelength_unit
+from utils.resampling import resample
+from utils.band_integration import CumulativeIntegral
+from utils.axis_compression import compress_axis
+from method_lib.source_templates import nplanck_micron, planck_grid
+from method_lib.blackbody_cache import BlackbodyCache
+from utils.instrumentation import instrumented
+from utils.precision import storage_dtype
 
 
 class SourceModel:
+    """
+    Source spectra, one column per source curve, indexed by wavelength.
+
+    Parameters
+    ----------
+    wavelength_unit : str, optional
+        Unit of the wavelength index.
+    sourceID : str, optional
+        Source name, used for the column names.
+    bb_cache : BlackbodyCache, optional
+        Cache of computed Planck curves.
+    dtype : numpy dtype, optional
+        Storage type of the fluxes, float64 or float32. The wavelength
+        index stays float64 and integrals are computed in float64.
+    """
+
     def __init__(
         self,
         wavelength_unit: str = "um",
-        sourceID: str = "default"
+        sourceID: str = "default",
+        bb_cache: BlackbodyCache = None,
+        dtype=np.float64
     ):
         self.sourceID = sourceID
+        self.bb_cache = bb_cache
+        self.dtype = storage_dtype(dtype)
         self.df = pd.DataFrame()
         self.wavelength_unit = wavelength_unit
         self.unit = wavelength_unit
 
+    @instrumented("SourceModel.generateSourceData_BB")
     def generateSourceData_BB(
             self,
             sourceSpectrum,
@@ -23,6 +51,15 @@ class SourceModel:
             showNPHOTONS=False,
             spectrum_unit: str = None
     ):
+        """
+        Fill the model with blackbody curves on ``sourceSpectrum``.
+
+        A scalar ``sourceTemperature`` gives one column named after the
+        source. A list of temperatures is evaluated in one
+        :func:`planck_grid` pass and gives one column per temperature,
+        named ``<sourceID>_<T>K``. With a ``bb_cache`` attached, curves
+        computed before for the same axis and options are reused.
+        """
         if spectrum_unit is None:
             detected_unit = detect_wavelength_unit(sourceSpectrum)
         else:
@@ -38,11 +75,124 @@ class SourceModel:
             sourceSpectrum_converted = sourceSpectrum
 
         sourceSpectrum_converted.astype(float).round(9)
+        if np.ndim(sourceTemperature) > 0:
+            temperatures = np.asarray(sourceTemperature, dtype=float)
+            grid_func = planck_grid if self.bb_cache is None \
+                else self.bb_cache.get_grid
+            bb_grid, _ = grid_func(
+                sourceSpectrum_converted,
+                temperatures,
+                SI=unitsSI,
+                NPHOTONS=showNPHOTONS,
+                spectrum_unit=self.wavelength_unit,
+                dtype=self.dtype
+            )
+            self.df = pd.DataFrame(
+                bb_grid.T,
+                index=sourceSpectrum_converted,
+                columns=[f"{self.sourceID}_{t:g}K" for t in temperatures]
+            )
+            return
+
         self.df = pd.DataFrame(index=sourceSpectrum_converted)
-        bb_values, _ = nplanck_micron(
-            sourceSpectrum_converted,
-            sourceTemperature,
-            SI=unitsSI,
-            NPHOTONS=showNPHOTONS
-        )
-        self.df[self.sourceID] = bb_values
+        if self.bb_cache is not None:
+            bb_values, _ = self.bb_cache.get(
+                sourceSpectrum_converted,
+                sourceTemperature,
+                SI=unitsSI,
+                NPHOTONS=showNPHOTONS,
+                spectrum_unit=self.wavelength_unit
+            )
+        else:
+            bb_values, _ = nplanck_micron(
+                sourceSpectrum_converted,
+                sourceTemperature,
+                SI=unitsSI,
+                NPHOTONS=showNPHOTONS,
+                dtype=self.dtype
+            )
+        self.df[self.sourceID] = np.asarray(bb_values, dtype=self.dtype)
+
+    @instrumented("SourceModel.resample")
+    def resample(
+            self,
+            lambda_,
+            spectrum_unit: str = None,
+            method: str = "linear"
+    ) -> pd.DataFrame:
+        """
+        Return every source column on another wavelength grid.
+
+        Uses the cached sparse resampling operators, so repeated calls
+        with the same grid only cost one sparse product. Points outside
+        the source axis are NaN. Values are interpolated in float64 and
+        returned in the storage dtype.
+        """
+        lambda_ = np.round(np.asarray(lambda_, dtype=float), 9)
+        if spectrum_unit is None:
+            spectrum_unit = detect_wavelength_unit(lambda_)
+        grid = lambda_
+        if spectrum_unit != self.wavelength_unit:
+            grid = convert_unit(lambda_, from_unit=spectrum_unit,
+                                to_unit=self.wavelength_unit)
+
+        source_axis = self.df.index.to_numpy(dtype=float)
+        order = np.argsort(source_axis, kind="stable")
+        values = self.df.to_numpy(dtype=float)[order].T
+        mapped = resample(source_axis[order], values, grid,
+                          method=method, extrapolate="nan")
+        return pd.DataFrame(mapped.T.astype(self.dtype, copy=False),
+                            index=lambda_, columns=self.df.columns)
+
+    @instrumented("SourceModel.compress_axis")
+    def compress_axis(
+            self,
+            max_error: float,
+            columns: list[str] = None,
+            relative: bool = True
+    ) -> np.ndarray:
+        """
+        Keep only the samples needed to reproduce every source column by
+        linear interpolation within ``max_error`` (relative to each
+        column's peak by default, as source fluxes span many decades).
+        See :func:`utils.axis_compression.compress_axis`.
+        """
+        frame = self.df.sort_index()
+        curves = frame.to_numpy(dtype=float) if columns is None else \
+            frame[columns].to_numpy(dtype=float)
+        axis = frame.index.to_numpy(dtype=float)
+        self.df = frame.iloc[compress_axis(axis, curves.T, max_error,
+                                           relative)]
+        return self.df.index.to_numpy(dtype=float)
+
+    def band_integrator(
+            self,
+            columns: list[str] = None,
+            telescope=None,
+            throughput_columns: list[str] = None
+    ) -> CumulativeIntegral:
+        """
+        Prepare band integrals of the source columns, optionally seen
+        through a telescope model. Windows are given in the source unit.
+        See :meth:`TelescopeModel.band_integrator`.
+        """
+        if telescope is not None:
+            return telescope.band_integrator(
+                throughput_columns, source=self, source_columns=columns)
+        if columns is None:
+            columns = list(self.df.columns)
+        axis = self.df.index.to_numpy(dtype=np.float64)
+        order = np.argsort(axis, kind="stable")
+        values = self.df[columns].to_numpy(dtype=np.float64)[order].T
+        return CumulativeIntegral(axis[order], values, names=list(columns))
+
+    def integrate_bands(
+            self,
+            windows,
+            columns: list[str] = None,
+            telescope=None,
+            throughput_columns: list[str] = None
+    ) -> pd.DataFrame:
+        """Integrated flux over band windows, one row per window."""
+        return self.band_integrator(
+            columns, telescope, throughput_columns).table(windows)
@@ -1,8 +1,9 @@
 import numpy as np
-from utils.unit_conversions import *
+from utils.unit_conversions import convert_unit, detect_wavelength_unit
 
 
-def nplanck_micron(lambda_micron, temp, SI=False, NPHOTONS=False):
+def nplanck_micron(lambda_micron, temp, SI=False, NPHOTONS=False,
+                   dtype=np.float64):
     """
     Calculate the Planck function in units of:
       - erg/cm^2/s/µm (default)
@@ -19,6 +20,8 @@ def nplanck_micron(lambda_micron, temp, SI=False, NPHOTONS=False):
         If True, output is in SI units W/m^2/µm. Default is False (erg/cm^2/s/µm).
     NPHOTONS : bool, optional
         If True, return photon number flux (N/cm^2/s/µm or N/m^2/s/µm).
+    dtype : numpy dtype, optional
+        Output dtype, e.g. np.float32. The computation is done in float64.
 
     Returns
     -------
@@ -36,8 +39,69 @@ def nplanck_micron(lambda_micron, temp, SI=False, NPHOTONS=False):
     """
 
     lam = np.atleast_1d(lambda_micron).astype(np.float64)
-    lam_unit = detect_wavelength_unit(lam)
-    if lam_unit is not "um":
+    bbflux, units = planck_grid(lam, temp, SI=SI, NPHOTONS=NPHOTONS,
+                                dtype=dtype)
+    bbflux = bbflux[0]
+
+    return (bbflux, units) if np.ndim(lambda_micron) > 0 else bbflux.item()
+
+
+def planck_grid(
+        lambda_micron,
+        temperatures,
+        SI=False,
+        NPHOTONS=False,
+        dtype=np.float64,
+        max_chunk_bytes=64 * 1024 ** 2,
+        spectrum_unit=None,
+        out=None
+):
+    """
+    Evaluate the Planck function for many temperatures in one pass.
+
+    Same units and cut-offs as :func:`nplanck_micron`, but the result is a
+    (temperature x wavelength) array built with broadcasting. Temperatures
+    are processed in chunks so the float64 work buffer never exceeds
+    ``max_chunk_bytes``; every unit factor is folded into one constant and
+    applied in place.
+
+    Parameters
+    ----------
+    lambda_micron : array-like
+        Wavelength axis, in microns unless ``spectrum_unit`` says otherwise.
+    temperatures : float or array-like
+        Temperatures in Kelvin.
+    SI : bool, optional
+        Output in W/m^2/µm instead of erg/cm^2/s/µm.
+    NPHOTONS : bool, optional
+        Return photon number flux instead of energy flux.
+    dtype : numpy dtype, optional
+        Output dtype, e.g. np.float32 to halve the memory of large grids.
+        The computation itself is always done in float64.
+    max_chunk_bytes : int, optional
+        Upper bound for the float64 work buffer of one chunk.
+    spectrum_unit : str, optional
+        Unit of ``lambda_micron``. Detected once when omitted.
+    out : np.ndarray, optional
+        Preallocated output of shape (n_temperatures, n_wavelengths).
+
+    Returns
+    -------
+    bbflux : np.ndarray
+        Array of shape (n_temperatures, n_wavelengths).
+    units : str
+        Units of ``bbflux``.
+
+    Example: 3 temperatures on a 0.2 to 13 µm axis
+
+    lam_um = make_spectrum_axis(0.2, 13, 0.001)
+    bbflux, units = planck_grid(lam_um, [3000, 5000, 30000], SI=True)
+    """
+    lam = np.atleast_1d(np.asarray(lambda_micron, dtype=np.float64))
+    temps = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+
+    lam_unit = spectrum_unit or detect_wavelength_unit(lam)
+    if lam_unit != "um":
         lam = convert_unit(lam, from_unit=lam_unit, to_unit="um")
 
     # Constants (in cgs units, same as before)
@@ -48,35 +112,39 @@ def nplanck_micron(lambda_micron, temp, SI=False, NPHOTONS=False):
     # Convert wavelength from µm → cm
     w = lam * 1e-4
 
-    # Compute exponential term
-    val = c2 / (w * temp)
-
-    # Avoid floating overflow (IDL equivalent good_lim = 88–308)
-    good = val < 308
-    bbflux = np.zeros_like(w)
-
-    # Planck function (π * Iλ) in erg/cm^2/s/cm
-    bbflux[good] = c1 / (w[good]**5 * (np.exp(val[good]) - 1.0))
-
-    # Convert per cm to per µm
-    bbflux *= 1e-4  # because 1 µm = 1e-4 cm
-
-    # Unit conversions and photon option
+    # Fold the per cm → per µm factor and the output units into one
+    # numerator constant and one per-wavelength denominator factor
     if NPHOTONS:
         if SI:
-            bbflux = 1e-4 * bbflux * w / c3   # photons/m^2/s/µm
-            units = "photons/m^2/s/µm"
+            scale, units = 1e-4, "photons/m^2/s/µm"
         else:
-            bbflux = 1e-8 * bbflux * w / c3   # photons/cm^2/s/µm
-            units = "photons/cm^2/s/µm"
+            scale, units = 1e-8, "photons/cm^2/s/µm"
+        denom = w ** 4 * c3
     else:
         if SI:
-            bbflux = 1e-11 * bbflux           # W/m^2/µm
-            units = "W/m^2/µm"
+            scale, units = 1e-11, "W/m^2/µm"
         else:
-            bbflux = 1e-8 * bbflux            # erg/cm^2/s/µm
-            units = "erg/cm ^ 2/s/µm"
-
-    bbflux[bbflux < 1e-24] = 0.0
-
-    return (bbflux, units) if np.ndim(lambda_micron) > 0 else bbflux.item()
+            scale, units = 1e-8, "erg/cm ^ 2/s/µm"
+        denom = w ** 5
+    numerator = c1 * 1e-4 * scale
+
+    if out is None:
+        out = np.empty((temps.size, lam.size), dtype=dtype)
+    elif out.shape != (temps.size, lam.size):
+        raise ValueError(
+            f"out has shape {out.shape}, expected {(temps.size, lam.size)}")
+
+    rows = max(1, int(max_chunk_bytes // max(lam.size * 8, 1)))
+    with np.errstate(over="ignore", divide="ignore"):
+        for start in range(0, temps.size, rows):
+            t = temps[start:start + rows]
+            block = np.multiply.outer(t, w)
+            # c2 / (w * T); large values overflow expm1 to inf → flux 0
+            np.divide(c2, block, out=block)
+            np.expm1(block, out=block)
+            block *= denom
+            np.divide(numerator, block, out=block)
+            block[block < 1e-24] = 0.0
+            out[start:start + rows] = block
+
+    return out, units
@@ -1,89 +1,1134 @@
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 import re
-from scipy.interpolate import interp1d
 
-from definitions import *
-from method_lib.source_templates import *
-from method_lib.file_type_handler import *
-from method_lib.data_importer import read_data_file
-from utils.unit_conversions import *
+from definitions import ALIAS_MAP
+from method_lib.data_importer import read_data_file, iter_data_file_chunks
+from method_lib.component_cache import ComponentCache
+from method_lib.file_type_handler import SheetLayout
+from utils.unit_conversions import (
+    convert_unit,
+    detect_wavelength_unit,
+    normalize_index_to_standard,
+)
+from utils.header_parsing import (
+    detect_unit_in_header,
+    parse_header_list,
+    detect_aliases,
+)
+from utils.spectrum_axis import merge_spectrum_axes, align_to_axis
+from utils.axis_compression import compress_axis
+from utils.resampling import resample, SPARSE_METHODS, StreamingResampler
+from utils.band_integration import CumulativeIntegral
+from utils.instrumentation import instrumented, span
+from utils.throughput import ThroughputGroup
+from utils.optical_density import (
+    PERCENT_UNIT,
+    column_unit,
+    to_fraction,
+    to_optical_density,
+)
+from utils.tolerance import ToleranceResult, monte_carlo_throughput
+from utils.precision import storage_dtype
+from utils.provenance import DigestReader, changed_source, source_stamp
+from method_lib.model_watcher import ModelWatcher
+
+# Column and group target of total_throughput; the empty pattern matches
+# every column
+TOTAL_THROUGHPUT = "total_throughput"
+TOTAL_THROUGHPUT_TARGET = ""
+
+
+def prepare_component(
+        path: str,
+        wavelength_unit: str,
+        component_cache: ComponentCache = None,
+        source: dict = None,
+        **reader_kwargs
+):
+    """
+    Read a component file and return it indexed by wavelength, with
+    standardized headers and the axis in ``wavelength_unit``.
+
+    When a component cache is given, a previously prepared copy of the
+    same file is returned without parsing it again. The digest of a
+    ``source`` provenance record (see :func:`utils.provenance.
+    source_stamp`) is filled in without reading the file once more: from
+    the digest the cache keys on, or from the bytes the reader consumes.
+
+    Returns
+    -------
+    tuple
+        ``(df, header, units)``: the prepared frame, the full list of
+        cleaned headers and the unit detected for each of them.
+    """
+    cache_options = dict(reader_kwargs, wavelength_unit=wavelength_unit)
+    if component_cache is not None:
+        with span("component_cache.load"):
+            cached = component_cache.load(path, **cache_options)
+        if source is not None:
+            # Memoized when the cache key was made
+            source["digest"] = component_cache.file_digest(path)
+        if cached is not None:
+            return cached
+
+    # Make sure that the reader returns a DataFrame
+    if source is None or source["digest"] is not None:
+        df = read_data_file(path, **reader_kwargs)
+    else:
+        with DigestReader(path) as raw:
+            df = read_data_file(path, buffer=io.BufferedReader(raw),
+                                **reader_kwargs)
+            source["digest"] = raw.hexdigest()
+    if not isinstance(df, pd.DataFrame):
+        raise ValueError("Reader must return a pandas DataFrame.")
+    df = df.copy()
+
+    with span("standardize_header"):
+        headers = list(df.columns)
+        cleaned_headers, detected_units = parse_header_list(headers)
+        df.rename(columns=dict(zip(headers, cleaned_headers)), inplace=True)
+    with span("index_wavelength", rows=len(df)):
+        df.set_index("wavelength", inplace=True)
+        df.sort_index(inplace=True)
+        df.index = normalize_index_to_standard(df.index, wavelength_unit)
+        df.index = df.index.astype(float).round(9)
+
+    if component_cache is not None:
+        with span("component_cache.save"):
+            component_cache.save(path, df, cleaned_headers, detected_units,
+                                 **cache_options)
+    return df, cleaned_headers, detected_units
+
+
+def _file_source(path, reader_options: dict, loader: str = "file"):
+    # Provenance of a component file, its digest is filled in while the
+    # file is read; None when there is no file to watch (e.g. a reader
+    # that does not read from disk)
+    if not isinstance(path, (str, os.PathLike)) or not os.path.isfile(path):
+        return None
+    return source_stamp(path, _recorded_options(reader_options), loader)
+
+
+def _recorded_options(reader_options: dict) -> dict:
+    # Provenance is saved as JSON: a SheetLayout is kept as its dict form,
+    # a registered layout by its name as given
+    options = {}
+    for key, value in reader_options.items():
+        if isinstance(value, SheetLayout):
+            value = value.to_dict()
+        elif isinstance(value, np.generic):
+            value = value.item()
+        options[key] = value
+    try:
+        json.dumps(options)
+    except TypeError:
+        raise ValueError(f"Reader options cannot be recorded: {options}")
+    return options
+
+
+def _reader_options(recorded: dict) -> dict:
+    # Inverse of _recorded_options
+    options = dict(recorded)
+    if isinstance(options.get("sheet_layout"), dict):
+        options["sheet_layout"] = SheetLayout.from_dict(
+            options["sheet_layout"])
+    return options
+
+
+def _prepare_component_task(task):
+    # Module level so ProcessPoolExecutor can pickle it; the provenance
+    # record is returned as it is filled in the worker
+    path, wavelength_unit, component_cache, reader_kwargs, source = task
+    return prepare_component(path, wavelength_unit, component_cache, source,
+                             **reader_kwargs), source
 
 
 class TelescopeModel:
+    """
+    Optical train made of component curves on one shared wavelength axis.
+
+    The curves live in a single matrix with one contiguous row per
+    column name, next to a float64 axis and a name -> row index.
+    ``df`` builds a DataFrame view over that matrix on demand, so the
+    pandas interface costs no copy and no second frame is kept around.
+
+    Parameters
+    ----------
+    wavelength_unit : str
+        Unit of the wavelength axis.
+    ID : str, optional
+        Telescope ID.
+    component_cache : ComponentCache, optional
+        Cache of parsed component files.
+    dtype : numpy dtype, optional
+        Storage type of the matrix, float64 or float32. float32 halves the
+        memory of large models; the axis stays float64 and products and
+        integrals are still accumulated in float64.
+    """
+
+    __slots__ = (
+        "ID",
+        "wavelength_unit",
+        "dtype",
+        "metadata",
+        "component_cache",
+        "header",
+        "header_units",
+        "mapped_throughput_df",
+        "_axis",
+        "_matrix",
+        "_n_columns",
+        "_columns",
+        "_throughput",
+    ) + tuple(f"has_{key}" for key in ALIAS_MAP)
+
     def __init__(
             self,
             wavelength_unit: str,
-            ID: str = "default_telescope"
+            ID: str = "default_telescope",
+            component_cache: ComponentCache = None,
+            dtype=np.float64
     ):
         self.ID = ID
-        self.df = pd.DataFrame()
-        self.__temp_df = pd.DataFrame()
+        self.component_cache = component_cache
         self.wavelength_unit = wavelength_unit
+        self.dtype = storage_dtype(dtype)
+        self._axis = np.empty(0, dtype=np.float64)
+        self._matrix = np.empty((0, 0), dtype=self.dtype)
+        self._n_columns = 0
+        self._columns = {}
+        self._throughput = {}
         self.metadata = {
             "Telescope ID": self.ID,
             "components": [],
+            "component_columns": {},  # suffix -> its model columns
+            "throughput": {},  # target -> {"output": ..., "domain": ...}
             "units": {},  # standardized column -> unit (e.g. '%' or 'nm')
+            "column_units": {},  # model column -> '%', 'OD' or None
             "wavelength_axis": None,
             "spectral_bounds": None,
             "spectral_unit": wavelength_unit,
         }
 
+    '''
+    Array access
+    '''
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """DataFrame view of the component matrix, indexed by wavelength."""
+        return pd.DataFrame(
+            self._matrix[:self._n_columns].T,
+            index=pd.Index(self._axis, name="wavelength", copy=False),
+            columns=list(self._columns),
+            copy=False
+        )
+
+    @df.setter
+    def df(self, frame: pd.DataFrame):
+        self._set_arrays(
+            np.asarray(frame.index, dtype=np.float64),
+            frame.to_numpy(dtype=self.dtype).T,
+            [str(c) for c in frame.columns]
+        )
+
+    @property
+    def axis(self) -> np.ndarray:
+        """Shared wavelength axis in ``wavelength_unit`` (read-only view)."""
+        view = self._axis.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Component matrix, one row per column (read-only view)."""
+        view = self._matrix[:self._n_columns]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self._columns)
+
+    @property
+    def _component_columns(self) -> dict[str, list[str]]:
+        # Kept in the metadata so it is saved and loaded with the model
+        return self.metadata.setdefault("component_columns", {})
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of one column as a read-only view of its matrix row."""
+        view = self._matrix[self._columns[name]]
+        view.flags.writeable = False
+        return view
+
+    def _set_arrays(
+            self,
+            axis: np.ndarray,
+            matrix: np.ndarray,
+            columns: list[str]
+    ):
+        """
+        Replace the model contents. ``matrix`` has one row per column and
+        is used as-is when already of the model dtype and C-contiguous,
+        which lets a memory-mapped file back the model without a copy.
+        """
+        axis = np.asarray(axis, dtype=np.float64)
+        matrix = np.asarray(matrix, dtype=self.dtype).reshape(
+            len(columns), axis.size)
+        if axis.size > 1 and np.any(axis[1:] < axis[:-1]):
+            order = np.argsort(axis, kind="stable")
+            axis = axis[order]
+            matrix = matrix[:, order]
+        if not matrix.flags.c_contiguous:
+            matrix = np.ascontiguousarray(matrix)
+        self._axis = axis
+        self._matrix = matrix
+        self._n_columns = len(columns)
+        self._columns = {name: row for row, name in enumerate(columns)}
+        self.metadata["component_columns"] = {}
+        self.metadata["throughput"] = {}
+        self._throughput = {}
+
+    def _writable_rows(self, n_rows: int) -> np.ndarray:
+        """
+        Make room for ``n_rows`` more columns and return the matrix.
+
+        Spare rows are allocated geometrically so adding components one
+        by one does not copy the whole matrix every time. A read-only
+        backing array (e.g. a memmap) is copied on the first write.
+        """
+        needed = self._n_columns + n_rows
+        capacity = self._matrix.shape[0]
+        if needed > capacity or not self._matrix.flags.writeable:
+            capacity = max(needed, capacity + capacity // 2, 4)
+            grown = np.empty((capacity, self._axis.size), dtype=self.dtype)
+            grown[:self._n_columns] = self._matrix[:self._n_columns]
+            self._matrix = grown
+        return self._matrix
+
+    def _set_column(self, name: str, values: np.ndarray):
+        row = self._columns.get(name)
+        if row is None:
+            matrix = self._writable_rows(1)
+            row = self._n_columns
+            self._columns[name] = row
+            self._n_columns += 1
+        else:
+            matrix = self._writable_rows(0)
+        matrix[row] = values
+
+    def _rows_matching(self, target: str) -> list[int]:
+        pattern = re.compile(target)
+        return [row for name, row in self._columns.items()
+                if pattern.search(name)]
+
+    @instrumented("TelescopeModel.compress_axis")
+    def compress_axis(
+            self,
+            max_error: float,
+            columns: list[str] = None,
+            relative: bool = False
+    ) -> np.ndarray:
+        """
+        Drop the samples where every curve is reproduced by linear
+        interpolation within ``max_error``, see
+        :func:`utils.axis_compression.compress_axis`.
+
+        The kept samples are original ones, so stored values do not
+        change; throughput, mapping and integration work on the
+        resulting non-uniform axis as on any other. Only ``columns``
+        (all by default) bound the error. Returns the new axis.
+        """
+        rows = self._matrix[:self._n_columns] if columns is None else \
+            self._matrix[[self._columns[name] for name in columns]]
+        keep = compress_axis(self._axis, rows, max_error, relative)
+        self._axis = self._axis[keep]
+        self._matrix = np.ascontiguousarray(
+            self._matrix[:self._n_columns, keep])
+        for group in self._throughput.values():
+            self._rebuild_group(group)
+        self._update_metadata()
+        return self.axis
+
     '''
     Main methods:
         Component adding
     '''
 
+    @instrumented("TelescopeModel.add_component")
     def add_component(
             self,
             filePath: str,
             componentID: str,
+            suffix: str = None,
+            **reader_kwargs
+    ):
+        suffix = "_" + componentID if suffix is None else suffix
+        self._check_unused([suffix])
+        source = _file_source(filePath, reader_kwargs)
+        prepared = self._prepare_component(filePath, source, **reader_kwargs)
+        self._check_unused([suffix], [prepared])
+        self._merge_components([self._apply_suffix(
+            prepared, componentID, suffix, self.header_units, source)])
+        self._update_metadata()
+
+    @instrumented("TelescopeModel.add_components")
+    def add_components(
+            self,
+            components: list,
+            n_workers: int = None,
+            **reader_kwargs
+    ):
+        """
+        Add several components at once.
+
+        The files are parsed, header-standardized and unit-normalized in
+        a process pool, then merged with the existing columns in a single
+        allocation. The result is the same as calling
+        :meth:`add_component` for each entry in order.
+
+        Parameters
+        ----------
+        components : list
+            Entries of ``(filePath, componentID)``,
+            ``(filePath, componentID, suffix)`` or dicts with the keys
+            ``filePath``, ``componentID``, optionally ``suffix`` and any
+            reader option for that file.
+        n_workers : int, optional
+            Number of worker processes. Defaults to the CPU count;
+            1 parses everything in the calling process.
+        **reader_kwargs
+            Reader options applied to every file.
+        """
+        specs = []
+        for entry in components:
+            if isinstance(entry, dict):
+                entry = dict(entry)
+                path = entry.pop("filePath")
+                componentID = entry.pop("componentID")
+                suffix = entry.pop("suffix", None)
+                options = dict(reader_kwargs, **entry)
+            else:
+                path, componentID, *rest = entry
+                suffix = rest[0] if rest else None
+                options = dict(reader_kwargs)
+            suffix = "_" + componentID if suffix is None else suffix
+            specs.append((path, componentID, suffix, options))
+        if not specs:
+            return
+        suffixes = [suffix for _, _, suffix, _ in specs]
+        self._check_unused(suffixes)
+
+        tasks = [(path, self.wavelength_unit, self.component_cache, options,
+                  _file_source(path, options))
+                 for path, _, _, options in specs]
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        n_workers = min(n_workers, len(tasks))
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                results = list(executor.map(_prepare_component_task, tasks))
+        else:
+            results = [_prepare_component_task(task) for task in tasks]
+        prepared = [result for result, _ in results]
+        sources = [source for _, source in results]
+
+        self._check_unused(suffixes, [df for df, _, _ in prepared])
+        frames = []
+        for (_, componentID, suffix, _), (df, _, units), source in zip(
+                specs, prepared, sources):
+            frames.append(self._apply_suffix(df, componentID, suffix, units,
+                                             source))
+        _, header, units = prepared[-1]
+        self._set_header_state(header, units)
+
+        self._merge_components(frames)
+        self._update_metadata()
+
+    @instrumented("TelescopeModel.add_component_streaming")
+    def add_component_streaming(
+            self,
+            filePath: str,
+            componentID: str,
+            suffix: str = None,
+            target_axis=None,
+            chunksize: int = None,
+            **reader_kwargs
+    ):
+        """
+        Add a large ``.csv``/``.txt`` component without loading it whole.
+
+        The file is read in chunks, each chunk is header-standardized,
+        converted to the model unit and linearly resampled onto
+        ``target_axis`` (or the model axis when the model already holds
+        components) as it arrives, so peak memory is bounded by the chunk
+        size. Without any axis to resample onto, the raw samples are
+        collected as plain arrays and added like :meth:`add_component`.
+        """
+        suffix = "_" + componentID if suffix is None else suffix
+        self._check_unused([suffix])
+        if target_axis is None and self._n_columns:
+            target_axis = self._axis
+        if chunksize is not None:
+            reader_kwargs["chunksize"] = chunksize
+        source = _file_source(filePath, reader_kwargs, loader="stream")
+        frame = self._stream_component(filePath, target_axis, source,
+                                       **reader_kwargs)
+        self._check_unused([suffix], [frame])
+        self._merge_components([self._apply_suffix(
+            frame, componentID, suffix, self.header_units, source)])
+        self._update_metadata()
+
+    def _stream_component(
+            self,
+            filePath: str,
+            target_axis=None,
+            source: dict = None,
+            **reader_kwargs
+    ) -> pd.DataFrame:
+        """
+        Read a component in chunks, see :meth:`add_component_streaming`,
+        and return it like :meth:`_prepare_component`. The digest of
+        ``source`` is taken from the streamed bytes.
+        """
+        header = units = None
+        resampler = None
+        parts = []
+        with DigestReader(filePath) as raw:
+            chunks = iter_data_file_chunks(
+                filePath, wavelength_unit=self.wavelength_unit,
+                buffer=io.BufferedReader(raw), **reader_kwargs)
+            for chunk, header, units in chunks:
+                x = np.round(chunk["wavelength"].to_numpy(dtype=np.float64),
+                             9)
+                values = chunk.drop(columns="wavelength").to_numpy(
+                    dtype=np.float64).T
+                if target_axis is None:
+                    parts.append((x, values))
+                    continue
+                if resampler is None:
+                    resampler = StreamingResampler(target_axis,
+                                                   values.shape[0])
+                resampler.feed(x, values)
+            if source is not None:
+                source["digest"] = raw.hexdigest()
+        if header is None:
+            raise ValueError(f"No data found in {filePath}.")
+
+        self._set_header_state(header, units)
+        names = [h for h in header if h != "wavelength"]
+        if resampler is not None:
+            axis = np.asarray(target_axis, dtype=np.float64)
+            matrix = resampler.result()
+        else:
+            axis = np.concatenate([x for x, _ in parts])
+            matrix = np.concatenate([v for _, v in parts], axis=1)
+            order = np.argsort(axis, kind="stable")
+            axis, matrix = axis[order], matrix[:, order]
+        return pd.DataFrame(matrix.T, index=pd.Index(axis), columns=names,
+                            copy=False)
+
+    @instrumented("TelescopeModel.add_catalog_component")
+    def add_catalog_component(
+            self,
+            catalog,
+            componentID: str,
             suffix: str = None
     ):
-        # Make sure that the method returns a DataFrame
-        self.__temp_df = self._load_component(filePath)
-        self.standardize_header(self.__temp_df)
-        self.__temp_df.set_index("wavelength", inplace=True)
-        self.__temp_df.sort_index(inplace=True)
-        self.__temp_df.index = normalize_index_to_standard(
-            self.__temp_df.index, self.wavelength_unit)
-        self.__temp_df.index = self.__temp_df.index.astype(float).round(9)
+        """
+        Add a component stored in a :class:`ComponentCatalog` by its ID,
+        without reading the original file. The result is the same as
+        :meth:`add_component` on the file it was ingested from.
+        """
+        suffix = "_" + componentID if suffix is None else suffix
+        self._check_unused([suffix])
+        df, header, units = catalog.load(componentID, self.wavelength_unit)
+        self._check_unused([suffix], [df])
+        self._set_header_state(header, units)
+        self._merge_components([self._apply_suffix(df, componentID, suffix,
+                                                   units)])
+        self._update_metadata()
+
+    def _check_unused(
+            self,
+            suffixes: list[str],
+            frames: list[pd.DataFrame] = None
+    ):
+        """
+        Raise before the model is changed when a new component suffix, or
+        one of the column names it would get, is already taken.
+        """
+        taken = set(self.metadata["components"])
+        for suffix in suffixes:
+            if suffix in taken:
+                raise ValueError(
+                    f"Component already in the model: {suffix}. Use "
+                    "replace_component or another suffix.")
+            taken.add(suffix)
+        names = set(self._columns)
+        for suffix, frame in zip(suffixes, frames or []):
+            for header in frame.columns:
+                name = str(header) + suffix
+                if name in names:
+                    raise ValueError(f"Column already in the model: {name}")
+                names.add(name)
 
+    def _apply_suffix(
+            self,
+            df: pd.DataFrame,
+            componentID: str,
+            suffix: str = None,
+            units: dict = None,
+            source: dict = None
+    ) -> pd.DataFrame:
         if suffix is None:
-            generated_suffix = "_" + componentID
-            self.__temp_df = self.__temp_df.add_suffix(
-                generated_suffix, axis=1)
-            self.metadata["components"].append(generated_suffix)
+            suffix = "_" + componentID
+        self.metadata["components"].append(suffix)
+        if source is not None:
+            self.metadata.setdefault("provenance", {})[suffix] = source
+        self._component_columns[suffix] = self._record_units(
+            df.columns, suffix, units)
+        return df.add_suffix(suffix, axis=1)
+
+    def _record_units(
+            self,
+            headers,
+            suffix: str,
+            units: dict = None
+    ) -> list[str]:
+        """Store the scale of every new column; returns the column names."""
+        units = units or {}
+        column_units = self.metadata.setdefault("column_units", {})
+        names = []
+        for header in headers:
+            name = str(header) + suffix
+            # The component ID must not make a column look like OD
+            column_units[name] = column_unit(str(header), units.get(header))
+            names.append(name)
+        return names
+
+    def _column_unit(self, name: str) -> str | None:
+        units = self.metadata.get("column_units", {})
+        if name in units:
+            return units[name]
+        return column_unit(name)
+
+    def _merge_components(self, frames: list[pd.DataFrame]):
+        """
+        Put the existing columns and ``frames`` on one shared axis.
+
+        The axis is the union of all sample points. Every column is
+        linearly interpolated onto it within the span it covers and NaN
+        outside. When the axis does not grow, the new columns are written
+        into spare matrix rows and the existing ones are left untouched.
+        """
+        with span("merge_axes"):
+            axis = merge_spectrum_axes(self._axis,
+                                       *[f.index for f in frames])
+        n_new = sum(f.shape[1] for f in frames)
+        grew = not np.array_equal(axis, self._axis)
+        first = self._n_columns
+        with span("align_components", rows=axis.size,
+                  columns=self._n_columns + n_new):
+            self._align_components(frames, axis, n_new)
+
+        if grew:
+            # Every stored curve was resampled, so are the products
+            for group in self._throughput.values():
+                self._rebuild_group(group)
         else:
-            self.__temp_df = self.__temp_df.add_suffix(suffix, axis=1)
-            self.metadata["components"].append(suffix)
+            self._track_added(list(self._columns)[first:])
 
-        if self.df.empty:
-            self.df = self.__temp_df.copy()
-            self._update_metadata()
+    def _align_components(
+            self,
+            frames: list[pd.DataFrame],
+            axis: np.ndarray,
+            n_new: int
+    ):
+        if np.array_equal(axis, self._axis):
+            matrix = self._writable_rows(n_new)
         else:
-            norm_axis = normalize_spectrum_axis(
-                self.__temp_df.index, self.df.index)
-            self.__temp_df.index = norm_axis
+            matrix = np.empty((self._n_columns + n_new, axis.size),
+                              dtype=self.dtype)
+            if self._n_columns:
+                matrix[:self._n_columns] = resample(
+                    self._axis, self._matrix[:self._n_columns], axis,
+                    extrapolate="nan")
+            self._axis = axis
+            self._matrix = matrix
 
-            self.df.index = self.df.index.astype(float).round(9)
-            self.__temp_df.index = self.__temp_df.index.astype(float).round(9)
+        row = self._n_columns
+        for frame in frames:
+            matrix[row:row + frame.shape[1]] = self._values_on_axis(frame,
+                                                                    axis)
+            for name in frame.columns:
+                self._columns[str(name)] = row
+                row += 1
+        self._n_columns = row
 
-            self.__temp_df = self.__temp_df.reindex(
-                self.metadata["wavelength_axis"]).interpolate()
-            print(self.__temp_df)
-            self.df.index = self.df.index.astype(float).round(9)
-            self.df = pd.concat([self.df, self.__temp_df],
-                                axis=1)
-            self._update_metadata()
+    @staticmethod
+    def _values_on_axis(frame: pd.DataFrame, axis: np.ndarray) -> np.ndarray:
+        """Columns of ``frame`` as rows on ``axis``, NaN outside their span."""
+        source_axis = np.asarray(frame.index, dtype=np.float64)
+        values = frame.to_numpy(dtype=np.float64).T
+        if np.array_equal(source_axis, axis):
+            return values
+        if np.isnan(values).any():
+            # Gaps inside a curve are bridged column by column
+            return align_to_axis(source_axis, values.T, axis).T
+        return resample(source_axis, values, axis, extrapolate="nan")
 
+    def _component_names(self, suffix: str) -> list[str]:
+        return list(self._component_columns.get(suffix, []))
+
+    @instrumented("TelescopeModel.remove_component")
+    def remove_component(
+            self,
+            componentID: str,
+            suffix: str = None
+    ):
+        """
+        Remove every column of a component.
+
+        Running throughputs are updated with one division per removed
+        column instead of being recomputed. The wavelength axis is kept
+        as it is; the rows after the removed ones are moved up.
+        """
+        suffix = "_" + componentID if suffix is None else suffix
+        names = self._component_names(suffix)
+        if suffix not in self.metadata["components"] or not names:
+            raise ValueError(f"Unknown component: {suffix}")
+
+        self._untrack(names)
+        self._delete_columns(names)
+        self.metadata["components"].remove(suffix)
+        self.metadata.get("provenance", {}).pop(suffix, None)
+        self._component_columns.pop(suffix, None)
+        self._refresh_throughput()
+
+    @instrumented("TelescopeModel.replace_component")
+    def replace_component(
+            self,
+            componentID: str,
+            filePath: str,
+            suffix: str = None,
+            **reader_kwargs
+    ):
+        """
+        Swap a component for another file, e.g. to compare filters.
+
+        The new curves are resampled onto the current wavelength axis (NaN
+        outside their span) so the other columns are left untouched, and
+        every running throughput is updated in a single pass per column.
+        """
+        suffix = "_" + componentID if suffix is None else suffix
+        old_names = self._component_names(suffix)
+        if suffix not in self.metadata["components"] or not old_names:
+            raise ValueError(f"Unknown component: {suffix}")
+
+        source = _file_source(filePath, reader_kwargs)
+        frame = self._prepare_component(filePath, source, **reader_kwargs)
+        self._replace_columns(suffix, frame)
+        provenance = self.metadata.setdefault("provenance", {})
+        if source is not None:
+            provenance[suffix] = source
+        else:
+            provenance.pop(suffix, None)
+
+    def _replace_columns(self, suffix: str, frame: pd.DataFrame):
+        """
+        Put the prepared ``frame`` in place of the columns of ``suffix``,
+        resampled onto the current axis, and update the throughputs.
+        """
+        old_names = self._component_names(suffix)
+        in_place = [str(c) + suffix for c in frame.columns] == old_names
+        old_units = {name: self._column_unit(name) for name in old_names}
+        if not in_place:
+            self._untrack(old_names)
+            self._delete_columns(old_names)
+        new_names = self._record_units(frame.columns, suffix,
+                                       self.header_units)
+        values = self._values_on_axis(frame.add_suffix(suffix, axis=1),
+                                      self._axis)
+
+        if in_place:
+            matrix = self._writable_rows(0)
+            for name, new in zip(new_names, values):
+                row = self._columns[name]
+                unit = self._column_unit(name)
+                for group in self._throughput.values():
+                    if name in group.members:
+                        group.product.replace(
+                            group.terms(matrix[row], old_units[name]),
+                            group.terms(new, unit))
+                matrix[row] = new
+        else:
+            first = self._n_columns
+            matrix = self._writable_rows(len(new_names))
+            matrix[first:first + len(new_names)] = values
+            for row, name in enumerate(new_names, first):
+                self._columns[name] = row
+            self._n_columns += len(new_names)
+            self._track_added(new_names)
+        self._component_columns[suffix] = new_names
+        self._refresh_throughput()
+
+    def _delete_columns(self, names: list[str]):
+        removed = {self._columns[name] for name in names}
+        keep = [row for row in range(self._n_columns) if row not in removed]
+        matrix = self._writable_rows(0)
+        first = min(removed)
+        for new, old in enumerate(keep[first:], first):
+            matrix[new] = matrix[old]
+        order = sorted(self._columns, key=self._columns.get)
+        self._columns = {name: row for row, name in enumerate(
+            name for name in order if name not in names)}
+        self._n_columns = len(keep)
+        column_units = self.metadata.get("column_units", {})
+        for name in names:
+            column_units.pop(name, None)
+
+    '''
+    Provenance and refresh
+    '''
+
+    def provenance(self, componentID: str, suffix: str = None) -> dict:
+        """
+        Where a component was read from: file path, content digest, file
+        stamp, reader options and loader (see :mod:`utils.provenance`).
+        """
+        suffix = "_" + componentID if suffix is None else suffix
+        record = self.metadata.get("provenance", {}).get(suffix)
+        if record is None:
+            raise ValueError(f"No provenance recorded for: {suffix}")
+        return record
+
+    def _tracked_suffixes(self, components: list[str] = None) -> list[str]:
+        provenance = self.metadata.get("provenance", {})
+        if components is None:
+            return list(provenance)
+        suffixes = []
+        for name in components:
+            suffix = name if name in provenance else "_" + name
+            if suffix not in provenance:
+                raise ValueError(f"No provenance recorded for: {name}")
+            suffixes.append(suffix)
+        return suffixes
+
+    @instrumented("TelescopeModel.refresh")
+    def refresh(
+            self,
+            components: list[str] = None,
+            n_workers: int = 1
+    ) -> list[str]:
+        """
+        Re-ingest the components whose file changed since it was read.
+
+        Files whose size and modification time are unchanged are not
+        opened; the others are hashed and only those with new content are
+        read again, with the reader options they were added with. Their
+        columns are resampled onto the current axis (the other columns
+        are not touched), running throughputs are updated per replaced
+        column and the provenance and metadata of the refreshed
+        components are updated. Components not read from a file (e.g.
+        from a catalog) are skipped.
+
+        Parameters
+        ----------
+        components : list[str], optional
+            Component IDs or suffixes to check; every tracked component
+            by default.
+        n_workers : int, optional
+            Processes used to read the changed files.
+
+        Returns
+        -------
+        list[str]
+            Suffixes of the refreshed components.
+        """
+        provenance = self.metadata.get("provenance", {})
+        changed = []
+        for suffix in self._tracked_suffixes(components):
+            fresh = changed_source(provenance[suffix])
+            if fresh is not None:
+                changed.append((suffix, fresh))
+        if not changed:
+            return []
+
+        # The fresh records are already hashed
+        tasks = [(fresh["path"], self.wavelength_unit, self.component_cache,
+                  _reader_options(fresh["reader_options"]), None)
+                 for _, fresh in changed if fresh["loader"] == "file"]
+        n_workers = min(n_workers or 1, len(tasks))
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                prepared = iter(list(executor.map(_prepare_component_task,
+                                                  tasks)))
+        else:
+            prepared = map(_prepare_component_task, tasks)
+
+        for suffix, fresh in changed:
+            if fresh["loader"] == "stream":
+                frame = self._stream_component(
+                    fresh["path"], self._axis,
+                    **_reader_options(fresh["reader_options"]))
+            else:
+                (frame, header, units), _ = next(prepared)
+                self._set_header_state(header, units)
+            self._replace_columns(suffix, frame)
+            provenance[suffix] = fresh
+        self._update_metadata()
+        return [suffix for suffix, _ in changed]
+
+    def watch(
+            self,
+            directory: str = None,
+            interval: float = 1.0,
+            on_refresh=None,
+            on_error=None
+    ) -> ModelWatcher:
+        """
+        Keep the model up to date with its component files in a
+        background thread, see :class:`ModelWatcher`. Returns the started
+        watcher; call ``stop()`` on it to end the polling.
+        """
+        return ModelWatcher(self, directory, interval, on_refresh,
+                            on_error).start()
+
+    '''
+    Throughput
+    '''
+
+    @instrumented("TelescopeModel.generate_throughput")
     def generate_throughput(
             self,
-            target: str
+            target: str,
+            domain: str = "linear",
+            output: str = None
+    ):
+        """
+        Product of every column matching ``target`` (a regular expression),
+        stored as ``output`` (``<target>_throughput`` by default).
+
+        The product is kept up to date as components are added, replaced
+        or removed afterwards. Missing samples count as 1, like
+        ``DataFrame.prod(skipna=True)``, and throughput columns are never
+        part of a product.
+
+        Parameters
+        ----------
+        target : str
+            Regular expression selecting the member columns.
+        domain : str, optional
+            ``"linear"`` multiplies the stored values as they are.
+            ``"od"`` converts every member from its detected unit (optical
+            density, percent or fraction) to optical density, sums them and
+            stores the linear transmission. Use it for stacks of
+            deep-blocking filters, and :meth:`throughput_od` for the total
+            optical density itself.
+        output : str, optional
+            Name of the throughput column.
+        """
+        if output is None:
+            output = target + "_throughput"
+        group = ThroughputGroup(target, output, self._axis.size, domain)
+        self._throughput[target] = group
+        self.metadata.setdefault("throughput", {})[target] = {
+            "output": group.output, "domain": group.domain}
+        self.metadata.setdefault("column_units", {})[group.output] = None
+        self._rebuild_group(group)
+
+    def _restore_throughput(self):
+        """
+        Recreate the throughputs recorded in the metadata, e.g. after
+        loading a saved model. Every group exists before any is rebuilt so
+        no output column is taken for a member of another group.
+        """
+        self._throughput = {
+            target: ThroughputGroup(target, group["output"],
+                                    self._axis.size, group["domain"])
+            for target, group in self.metadata.get("throughput", {}).items()}
+        for group in self._throughput.values():
+            self._rebuild_group(group)
+
+    def throughput_od(self, target: str) -> np.ndarray:
+        """
+        Optical density of the throughput generated for ``target``.
+
+        For the ``"od"`` domain this is the running sum itself, which
+        stays exact where the linear transmission underflows.
+        """
+        group = self._throughput.get(target)
+        if group is None:
+            raise ValueError(f"No throughput generated for: {target}")
+        if group.domain == "od":
+            return group.product.od()
+        return to_optical_density(self.column(group.output))
+
+    def total_throughput(self) -> np.ndarray:
+        """
+        Product of every component column, like :meth:`generate_throughput`
+        with an empty target; throughput columns are not part of it.
+
+        The model is not changed. When that throughput has been generated
+        (``generate_throughput("", output="total_throughput")``) its
+        running product is returned, otherwise the product is computed.
+        """
+        group = self._throughput.get(TOTAL_THROUGHPUT_TARGET)
+        if group is not None:
+            return self.column(group.output)
+        skip = self._throughput_outputs() | {TOTAL_THROUGHPUT}
+        rows = [row for name, row in self._columns.items() if name not in skip]
+        # Missing samples count as 1, products are taken in float64
+        return np.nanprod(self._matrix[rows].astype(np.float64, copy=False),
+                          axis=0)
+
+    def _throughput_outputs(self) -> set[str]:
+        return {group.output for group in self._throughput.values()}
+
+    def _rebuild_group(self, group: ThroughputGroup):
+        outputs = self._throughput_outputs()
+        group.members = [name for name in self._columns
+                         if name not in outputs and group.matches(name)]
+        # Terms are taken in float64 whatever the storage type
+        rows = self._matrix[[self._columns[name] for name in group.members]
+                            ].astype(np.float64, copy=False)
+        if group.domain == "od":
+            for i, name in enumerate(group.members):
+                rows[i] = group.terms(rows[i], self._column_unit(name))
+        group.product.rebuild(rows)
+        self._set_column(group.output, group.product.value())
+
+    def _track_added(self, names: list[str]):
+        outputs = self._throughput_outputs()
+        for group in self._throughput.values():
+            for name in names:
+                if name not in outputs and group.matches(name):
+                    group.product.add(group.terms(
+                        self._matrix[self._columns[name]],
+                        self._column_unit(name)))
+                    group.members.append(name)
+        self._refresh_throughput()
+
+    def _untrack(self, names: list[str]):
+        for group in self._throughput.values():
+            for name in names:
+                if name in group.members:
+                    group.product.remove(group.terms(
+                        self._matrix[self._columns[name]],
+                        self._column_unit(name)))
+                    group.members.remove(name)
+
+    def _refresh_throughput(self):
+        for group in self._throughput.values():
+            if (group.product.needs_rebuild
+                    or group.product.n_samples != self._axis.size):
+                self._rebuild_group(group)
+            else:
+                self._set_column(group.output, group.product.value())
+
+    def convert_percentage(
+            self,
+            percentage_flag: str
+    ):
+        """
+        Divide every column whose name matches the flag by 100. Columns
+        recorded in percent are plain fractions afterwards.
+        """
+        matrix = self._writable_rows(0)
+        outputs = self._throughput_outputs()
+        column_units = self.metadata.setdefault("column_units", {})
+        names = self.columns
+        for row in self._rows_matching(percentage_flag):
+            name = names[row]
+            if name in outputs:
+                continue
+            old = matrix[row].copy()
+            old_unit = self._column_unit(name)
+            matrix[row] /= 100
+            if old_unit == PERCENT_UNIT:
+                column_units[name] = None
+            unit = self._column_unit(name)
+            for group in self._throughput.values():
+                if name in group.members:
+                    group.product.replace(group.terms(old, old_unit),
+                                          group.terms(matrix[row], unit))
+        self._refresh_throughput()
+
+    @instrumented("TelescopeModel.map_spectra")
+    def map_spectra(
+            self,
+            lambda_grids,
+            columns: list[str] = None,
+            method: str = "linear",
+            grid_unit: str = None
     ):
-        contains_target = self.df.columns.str.contains(target)
-        fetched_cols = self.df.loc[:, contains_target].columns.values
-        self.df[target + "_throughput"] = self.df[fetched_cols].prod(axis=1)
+        """
+        Map several columns onto one or more wavelength grids at once.
+
+        Every grid is converted to the model unit and clamped to the model
+        axis. Linear, nearest, previous and next mapping use a sparse
+        resampling operator cached per (model axis, grid) pair, so mapping
+        onto a grid seen before is a single sparse product for all columns.
+
+        Parameters
+        ----------
+        lambda_grids : array-like or list of array-like
+            One target grid, or a list of grids.
+        columns : list[str], optional
+            Columns to map. Defaults to every column.
+        method : str, optional
+            "linear", "nearest", "previous" or "next" use the cached
+            sparse operators; any other ``scipy.interpolate.interp1d``
+            kind is also accepted.
+        grid_unit : str, optional
+            Unit of the grids. Detected from each grid when omitted.
+
+        Returns
+        -------
+        np.ndarray or list[np.ndarray]
+            Array of shape (len(columns), len(grid)) with one row per
+            column, or a list of such arrays when a list of grids is given.
+        """
+        single = not (isinstance(lambda_grids, (list, tuple))
+                      and len(lambda_grids) > 0
+                      and not np.isscalar(lambda_grids[0]))
+        grids = [lambda_grids] if single else list(lambda_grids)
+        if columns is None:
+            columns = self.columns
+        rows = [self._columns[c] for c in columns]
+        # Interpolated in float64 whatever the storage type
+        values = self._matrix[rows].astype(np.float64, copy=False)
+
+        converted = []
+        for grid in grids:
+            grid = np.round(np.asarray(grid, dtype=float), 9)
+            unit = grid_unit or detect_wavelength_unit(grid)
+            if unit != self.wavelength_unit:
+                grid = convert_unit(grid, from_unit=unit,
+                                    to_unit=self.wavelength_unit)
+            converted.append(grid)
+
+        if method in SPARSE_METHODS:
+            # One cached sparse operator per grid, shared across calls
+            results = [resample(self._axis, values, grid, method=method)
+                       for grid in converted]
+        else:
+            # scipy.interpolate is slow to import, load it on first use
+            from scipy.interpolate import interp1d
+            points = np.clip(np.concatenate(converted),
+                             self._axis[0], self._axis[-1])
+            mapped = interp1d(self._axis, values, kind=method,
+                              axis=-1)(points)
+            results = np.split(mapped, np.cumsum(
+                [g.size for g in converted])[:-1], axis=-1)
+        return results[0] if single else results
 
     def map_spectrum(
             self,
@@ -94,58 +1139,202 @@ class TelescopeModel:
 
         lambda_ = np.asarray(lambda_, dtype=float)
         lambda_ = np.round(lambda_, 9)  # adjust precision as needed
-        # Clamp values to interpolation range
-        min_x = float(self.df.index.min())
-        max_x = float(self.df.index.max())
-        lambda_ = np.clip(lambda_, min_x, max_x)
-        telescope_axis_unit = detect_wavelength_unit(self.df.index)
-        input_axis_unit = detect_wavelength_unit(lambda_)
-        conv_lambda_ = convert_unit(lambda_, from_unit=input_axis_unit,
-                                    to_unit=telescope_axis_unit)
-        f = interp1d(self.df.index, self.df[througput_col], kind=method)
-
-        result_df = pd.DataFrame(index=lambda_, data=f(
-            conv_lambda_), columns=["Throughput"])
+        mapped = self.map_spectra(lambda_, [througput_col], method=method)
+
+        result_df = pd.DataFrame(index=lambda_, data=mapped[0],
+                                 columns=["Throughput"])
         self.mapped_throughput_df = result_df.copy()
         return result_df
 
     '''
-    Testing methods
+    Band integration
     '''
 
-    def _load_component(
+    def band_integrator(
             self,
-            path: str
+            columns: list[str] = None,
+            source=None,
+            source_columns: list[str] = None
+    ) -> CumulativeIntegral:
+        """
+        Prepare band integrals of model columns, optionally weighted by a
+        source.
+
+        Without a source the columns are integrated over the model axis
+        and windows are given in the model unit. With a
+        :class:`SourceModel` the columns are mapped onto the source axis
+        and multiplied with every source column; windows are then given in
+        the source unit and the integrals are integrated flux. Outside the
+        model span the throughput is zero, as the source is outside its
+        own span in :meth:`source_flux`.
+
+        The cumulative integrals are built once, after which every window
+        query is two binary searches, see :class:`CumulativeIntegral`.
+        """
+        if columns is None:
+            columns = self.columns
+        if source is None:
+            rows = [self._columns[c] for c in columns]
+            return CumulativeIntegral(self._axis, self._matrix[rows],
+                                      names=list(columns))
+
+        if source_columns is None:
+            source_columns = list(source.df.columns)
+        source_axis = source.df.index.to_numpy(dtype=np.float64)
+        order = np.argsort(source_axis, kind="stable")
+        source_axis = source_axis[order]
+        flux = source.df[source_columns].to_numpy(dtype=np.float64)[order].T
+
+        throughput = self.map_spectra(source_axis, columns,
+                                      grid_unit=source.wavelength_unit)
+        # map_spectra clamps to the end values; nothing passes outside
+        grid = np.round(source_axis, 9)
+        if source.wavelength_unit != self.wavelength_unit:
+            grid = convert_unit(grid, source.wavelength_unit,
+                                self.wavelength_unit)
+        throughput[:, (grid < self._axis[0]) | (grid > self._axis[-1])] = 0.0
+        curves = throughput[:, None, :] * flux[None, :, :]
+        names = [f"{c}*{s}" for c in columns for s in source_columns]
+        return CumulativeIntegral(
+            source_axis, curves.reshape(len(names), -1), names=names)
+
+    def integrate_bands(
+            self,
+            windows,
+            columns: list[str] = None,
+            source=None,
+            source_columns: list[str] = None
     ) -> pd.DataFrame:
-        df = read_data_file(path)
-        if not isinstance(df, pd.DataFrame):
-            raise ValueError("Reader must return a pandas DataFrame.")
-        return df.copy()
+        """
+        Integrate columns (times a source, if given) over band windows.
+
+        Parameters
+        ----------
+        windows : array-like
+            (start, stop) pairs, see :meth:`band_integrator` for the unit.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per window and one column per curve.
+        """
+        return self.band_integrator(
+            columns, source, source_columns).table(windows)
 
     '''
-    Methods for header processing
+    Tolerance analysis
     '''
 
-    def _detect_unit_in_header(self, header: str):
-        raw = header.strip()
-        lower = raw.lower()
-        detected_unit = None
-        cleaned = raw
+    @instrumented("TelescopeModel.monte_carlo_throughput")
+    def monte_carlo_throughput(
+            self,
+            target: str,
+            tolerances: dict,
+            n_realizations: int = 1000,
+            windows=None,
+            source=None,
+            source_column: str = None,
+            **options
+    ) -> ToleranceResult:
+        """
+        Monte Carlo distribution of the throughput of the columns matching
+        ``target``, see :func:`utils.tolerance.monte_carlo_throughput`.
 
-        # 1. Detect unit from definitions.py → UNIT_KEYWORDS
-        for pattern, unit in UNIT_KEYWORDS:
-            if re.search(pattern, lower):
-                detected_unit = UNIT_NORMALIZATION.get(unit, unit)
-                cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE)
-                break
+        Every member is converted to a fraction from its recorded unit.
+        The realizations are generated block by block on the model axis;
+        no perturbed model is ever built.
 
-        # 2. Strip tokens
-        for tok in HEADER_STRIP_TOKENS:
-            cleaned = cleaned.replace(tok, "")
+        Parameters
+        ----------
+        target : str
+            Regular expression selecting the member columns, as for
+            :meth:`generate_throughput`.
+        tolerances : dict
+            :class:`ComponentTolerance` per column name or component ID.
+            Members without an entry are taken as exact.
+        n_realizations : int, optional
+            Number of realizations.
+        windows : array-like, optional
+            (start, stop) pairs in the model unit for the integrated
+            flux; the whole axis by default.
+        source : SourceModel, optional
+            Source whose ``source_column`` (the first column by default)
+            weights the integrals.
+        **options
+            ``levels``, ``seed``, ``block_size`` and ``n_workers``.
+        """
+        outputs = self._throughput_outputs()
+        pattern = re.compile(target)
+        names = [name for name in self._columns
+                 if name not in outputs and pattern.search(name)]
+        if not names:
+            raise ValueError(f"No columns match: {target}")
+
+        per_column = {}
+        for key, tolerance in tolerances.items():
+            if key in self._columns:
+                per_column[key] = tolerance
+                continue
+            suffix = key if key in self.metadata["components"] \
+                else "_" + key
+            if suffix not in self.metadata["components"]:
+                raise ValueError(f"Unknown component: {key}")
+            for name in self._component_names(suffix):
+                per_column.setdefault(name, tolerance)
 
-        cleaned = cleaned.strip().strip("-").strip("_").lower()
+        curves = np.empty((len(names), self._axis.size))
+        for i, name in enumerate(names):
+            curves[i] = to_fraction(self.column(name), self._column_unit(name))
 
-        return cleaned, detected_unit
+        flux = None if source is None else self.source_flux(source,
+                                                             source_column)
+        return monte_carlo_throughput(
+            self._axis, curves, [per_column.get(name) for name in names],
+            n_realizations, windows, flux, **options)
+
+    def source_flux(
+            self,
+            source,
+            source_column: str = None
+    ) -> np.ndarray:
+        """
+        One column of a :class:`SourceModel` (the first by default)
+        linearly interpolated onto the model axis; zero outside the
+        source axis.
+        """
+        if source_column is None:
+            source_column = source.df.columns[0]
+        source_axis = source.df.index.to_numpy(dtype=np.float64)
+        order = np.argsort(source_axis, kind="stable")
+        axis = convert_unit(self._axis, self.wavelength_unit,
+                            source.wavelength_unit)
+        return np.interp(
+            axis, source_axis[order],
+            source.df[source_column].to_numpy(dtype=np.float64)[order],
+            left=0.0, right=0.0)
+
+    '''
+    Testing methods
+    '''
+
+    def _prepare_component(
+            self,
+            path: str,
+            source: dict = None,
+            **reader_kwargs
+    ) -> pd.DataFrame:
+        df, header, units = prepare_component(
+            path, self.wavelength_unit, self.component_cache, source,
+            **reader_kwargs)
+        self._set_header_state(header, units)
+        return df
+
+    '''
+    Methods for header processing
+    '''
+
+    def _detect_unit_in_header(self, header: str):
+        return detect_unit_in_header(header)
 
     def parse_header_list(self, headers: list[str]):
         """
@@ -154,15 +1343,7 @@ class TelescopeModel:
             cleaned_headers : list[str]
             detected_units  : dict[str, str or None]
         """
-        cleaned_headers = []
-        detected_units = {}
-
-        for h in headers:
-            clean, unit = self._detect_unit_in_header(h)
-            cleaned_headers.append(clean)
-            detected_units[clean] = unit
-
-        return cleaned_headers, detected_units
+        return parse_header_list(headers)
 
     def standardize_header(self, input_df):
         if input_df.empty:
@@ -178,32 +1359,33 @@ class TelescopeModel:
 
         input_df.rename(columns=rename_map, inplace=True)
 
-        # Step 3: update class metadata
+        # Step 3 and 4: update class metadata and alias flags
+        self._set_header_state(cleaned_headers, detected_units)
+
+        return rename_map
+
+    def _set_header_state(
+            self,
+            cleaned_headers: list[str],
+            detected_units: dict
+    ):
         self.header_units = detected_units
         self.header = cleaned_headers
         self.metadata["units"] = detected_units
 
-        # Step 4: alias mapping (using ALIAS_MAP)
-        for key, patterns in ALIAS_MAP.items():
-            setattr(self, f"has_{key}", False)
-
-        for h in cleaned_headers:
-            for std_name, patterns in ALIAS_MAP.items():
-                if any(re.search(p, h) for p in patterns):
-                    setattr(self, f"has_{std_name}", True)
-
-        return rename_map
+        # Alias mapping (using ALIAS_MAP)
+        for key, found in detect_aliases(cleaned_headers).items():
+            setattr(self, f"has_{key}", found)
 
     '''
     Metadata processing
     '''
 
     def _update_metadata(self):
-        if self.df.empty:
+        if self._n_columns == 0 or self._axis.size == 0:
             return
-        axis = self.df.index
-        axis = pd.Index(axis.astype(float), name="wavelength")
+        axis = self._axis
         self.metadata["spectral_bounds"] = (
-            float(axis.min()), float(axis.max()))
+            float(axis[0]), float(axis[-1]))
         self.metadata["spectral_unit"] = detect_wavelength_unit(
             axis)
@@ -14,7 +14,7 @@ test.add_component("test_data/FB6000-500.xlsx", "Filter", suffix="_FB60")
 test.add_component("test_data/FB1750-500.xlsx", "Filter", suffix="_FB17")
 # test.addComponent("test_data/FB6000-500.xlsx", "Filter", suffix="_FB60_2")
 
-uc.convert_percentage(test.df, "transmission")
+test.convert_percentage("transmission")
 test.generate_throughput("transmission")
 
 plt.plot(test.df.index, test.df["transmission_FB17"])
@@ -0,0 +1,138 @@
+import os
+import time
+
+import numpy as np
+
+
+class DiskArrayStore:
+    """
+    Directory of uncompressed ``.npz`` entries with a total size cap.
+
+    Every entry is one file named ``<key>.npz``. The file modification
+    time doubles as the last-access stamp: a hit touches the file, and
+    eviction removes the least recently touched entries first until the
+    directory fits in ``max_bytes`` again. Keeping the LRU order on the
+    file system means several processes can share one store without a
+    separate index file.
+
+    Parameters
+    ----------
+    directory : str
+        Folder holding the entries. Created on first write.
+    max_bytes : int, optional
+        Size cap for all entries together. ``None`` disables eviction.
+    """
+
+    suffix = ".npz"
+
+    def __init__(self, directory: str, max_bytes: int | None = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(
+            self,
+            key: str,
+            touch: bool = True
+    ) -> dict[str, np.ndarray] | None:
+        """
+        Return the arrays stored under ``key`` or None on a miss.
+        ``touch=False`` reads without refreshing the LRU position.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        if not touch:
+            return arrays
+        self._touch(path)
+        return arrays
+
+    @staticmethod
+    def _touch(path: str):
+        # Explicit stamps: the kernel's own file times are too coarse to
+        # order entries written in quick succession
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except OSError:
+            pass
+
+    def put(self, key: str, arrays: dict[str, np.ndarray]):
+        """Write ``arrays`` under ``key`` and evict old entries if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        # Write to a temporary name first so readers never see half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(tmp_path, path)
+        self._touch(path)
+        self.evict()
+
+    def discard(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def entries(self) -> list[dict]:
+        """
+        List stored entries, most recently used first.
+
+        Returns
+        -------
+        list[dict]
+            One dict per entry with ``key``, ``size``, ``last_access``
+            (seconds) and ``last_access_ns``.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append({
+                    "key": item.name[:-len(self.suffix)],
+                    "size": stat.st_size,
+                    "last_access": stat.st_mtime,
+                    "last_access_ns": stat.st_mtime_ns,
+                })
+        # Nanosecond stamps as written by _touch; float seconds lose them
+        entries.sort(key=lambda e: e["last_access_ns"], reverse=True)
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(e["size"] for e in self.entries())
+
+    def evict(self, max_bytes: int | None = None) -> list[str]:
+        """Drop least recently used entries until the cap is met."""
+        cap = self.max_bytes if max_bytes is None else max_bytes
+        if cap is None:
+            return []
+        entries = self.entries()
+        total = sum(e["size"] for e in entries)
+        removed = []
+        while entries and total > cap:
+            oldest = entries.pop()
+            if self.discard(oldest["key"]):
+                removed.append(oldest["key"])
+            total -= oldest["size"]
+        return removed
+
+    def clear(self):
+        for entry in self.entries():
+            self.discard(entry["key"])
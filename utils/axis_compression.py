@@ -0,0 +1,132 @@
+import numpy as np
+
+'''
+Error-bounded axis compression
+
+Dense uniform axes spend most of their samples where the curves are
+flat. compress_axis keeps a subset of the samples (knots) such that
+linear interpolation between the knots reproduces every curve at every
+dropped sample to within ``max_error``. Knots are chosen top-down like
+Ramer-Douglas-Peucker with the vertical error, taken as the maximum over
+all curves, but every level of the recursion is done for all segments
+at once with array operations.
+
+Because the knots are original samples, compressing a model is a column
+selection: no value is changed, only the samples in between are
+dropped.
+'''
+
+# A segment whose worst sample lies farther from its center than this
+# fraction of the half-length is bisected too
+LOPSIDED_SPLIT = 0.5
+
+
+def _mandatory_knots(curves: np.ndarray) -> np.ndarray:
+    # First and last sample, and both sides of every NaN edge, so each
+    # curve keeps its exact span
+    n = curves.shape[1]
+    missing = np.isnan(curves)
+    edges = np.flatnonzero(np.any(missing[:, 1:] != missing[:, :-1], axis=0))
+    return np.unique(np.concatenate([[0, n - 1], edges, edges + 1]))
+
+
+def compress_axis(
+        axis,
+        curves,
+        max_error: float,
+        relative: bool = False
+) -> np.ndarray:
+    """
+    Indices of the samples to keep.
+
+    Parameters
+    ----------
+    axis : array-like
+        Increasing axis of length n.
+    curves : array-like
+        Curves of shape (n,) or (k, n). NaN samples (outside a curve's
+        span) are not interpolated across.
+    max_error : float
+        Largest allowed absolute difference between a curve and its
+        linear interpolation through the kept samples.
+    relative : bool, optional
+        Take ``max_error`` relative to the peak of each curve instead,
+        for curves on different scales (e.g. percent and fractions).
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices into ``axis``, always including both ends.
+    """
+    x = np.asarray(axis, dtype=np.float64)
+    y = np.asarray(curves, dtype=np.float64).reshape(-1, x.size)
+    if max_error < 0:
+        raise ValueError("max_error must not be negative.")
+    if x.size <= 2:
+        return np.arange(x.size)
+    if relative:
+        with np.errstate(invalid="ignore"):
+            peak = np.nanmax(np.abs(y), axis=1, keepdims=True)
+        y = y / np.where(np.isfinite(peak) & (peak > 0), peak, 1.0)
+
+    is_knot = np.zeros(x.size, dtype=bool)
+    is_knot[_mandatory_knots(y)] = True
+    # Samples whose segment has not been accepted yet
+    pending = ~is_knot
+    while pending.any():
+        knots = np.flatnonzero(is_knot)
+        samples = np.flatnonzero(pending)
+        segment = np.searchsorted(knots, samples) - 1
+        left = knots[segment]
+        right = knots[segment + 1]
+        t = (x[samples] - x[left]) / (x[right] - x[left])
+        with np.errstate(invalid="ignore"):
+            error = np.abs(y[:, samples] - (y[:, left] + t * (
+                y[:, right] - y[:, left])))
+        error = np.max(np.nan_to_num(error, nan=0.0), axis=0)
+
+        # Samples are sorted, so every pending segment is one contiguous run
+        boundary = np.r_[True, segment[1:] != segment[:-1]]
+        peak = np.maximum.reduceat(error, np.flatnonzero(boundary))
+        run = np.cumsum(boundary) - 1
+        failed = peak[run] > max_error
+        pending[samples[~failed]] = False
+        if not failed.any():
+            break
+        # Split every failing segment at its (first) worst sample
+        worst = np.flatnonzero(failed & (error == peak[run]))
+        worst = worst[np.r_[True, run[worst[1:]] != run[worst[:-1]]]]
+        split = samples[worst]
+        # A worst sample near an end would leave a long segment behind
+        # (noisy curves), bisect those as well to bound the depth
+        lo = left[worst]
+        hi = right[worst]
+        lopsided = np.abs(2 * split - lo - hi) > LOPSIDED_SPLIT * (hi - lo)
+        split = np.union1d(split, (lo[lopsided] + hi[lopsided]) // 2)
+        is_knot[split] = True
+        pending[split] = False
+    return np.flatnonzero(is_knot)
+
+
+def decimate_axis(
+        model,
+        max_error: float,
+        columns: list[str] = None,
+        relative: bool = False
+) -> np.ndarray:
+    """
+    Compressed axis of a :class:`TelescopeModel` or :class:`SourceModel`,
+    see :func:`compress_axis`. Only ``columns`` (all by default) bound the
+    error.
+    """
+    if hasattr(model, "matrix"):
+        axis = model.axis
+        names = model.columns if columns is None else columns
+        curves = np.array([model.column(name) for name in names])
+    else:
+        frame = model.df.sort_index()
+        if columns is not None:
+            frame = frame[columns]
+        axis = frame.index.to_numpy(dtype=np.float64)
+        curves = frame.to_numpy(dtype=np.float64).T
+    return axis[compress_axis(axis, curves, max_error, relative)]
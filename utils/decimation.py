@@ -0,0 +1,136 @@
+import numpy as np
+
+'''
+Curve decimation for plotting
+
+A line plot cannot show more than a few points per pixel column, so a
+curve of millions of samples can be reduced to the samples that shape
+its picture before it is handed to matplotlib.
+
+    minmax  the lowest and highest sample of every pixel column. Peaks,
+            dips and noise bands are drawn exactly as with all samples.
+    lttb    Largest-Triangle-Three-Buckets: one sample per bucket, the
+            one spanning the largest triangle with its neighbours. Fewer
+            points and a smoother look, but narrow spikes may be thinned.
+
+Both return indices into the curve, always keep the first and last
+sample, and keep the first NaN of every gap so lines still break there.
+'''
+
+
+def _gap_starts(y: np.ndarray) -> np.ndarray:
+    missing = np.flatnonzero(np.isnan(y))
+    if missing.size == 0:
+        return missing
+    return missing[np.r_[True, np.diff(missing) > 1]]
+
+
+def _first_per_bin(hits: np.ndarray, bins: np.ndarray) -> np.ndarray:
+    if hits.size == 0:
+        return hits
+    return hits[np.r_[True, bins[hits[1:]] != bins[hits[:-1]]]]
+
+
+def minmax_indices(x, y, n_bins: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of ``y`` in each of ``n_bins``
+    equal-width bins of ``x``.
+
+    Parameters
+    ----------
+    x : array-like
+        Increasing axis of length n.
+    y : array-like
+        Curve of length n; NaN marks gaps.
+    n_bins : int
+        Number of bins, typically the pixel width of the plot.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted indices, at most ``2 * n_bins`` plus the ends and gaps.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if n <= 2 * max(n_bins, 1):
+        return np.arange(n)
+
+    edges = np.linspace(x[0], x[-1], n_bins + 1)[:-1]
+    starts = np.unique(np.searchsorted(x, edges, side="left"))
+    bins = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, n]))
+    with np.errstate(invalid="ignore"):
+        low = np.fmin.reduceat(y, starts)
+        high = np.fmax.reduceat(y, starts)
+    lowest = _first_per_bin(np.flatnonzero(y == low[bins]), bins)
+    highest = _first_per_bin(np.flatnonzero(y == high[bins]), bins)
+    return np.unique(np.concatenate(
+        [[0, n - 1], lowest, highest, _gap_starts(y)]))
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Indices of ``n_out`` samples chosen with Largest-Triangle-Three-
+    Buckets over the finite samples of ``y``, see the module notes.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y))
+    n_out = max(n_out, 3)
+    if finite.size <= n_out:
+        return np.unique(np.concatenate(
+            [finite, [0, x.size - 1], _gap_starts(y)]))
+
+    fx = x[finite]
+    fy = y[finite]
+    # Buckets of the interior samples; the ends are kept as they are
+    bounds = np.linspace(1, fx.size - 1, n_out - 1).astype(np.int64)
+    chosen = np.empty(n_out, dtype=np.int64)
+    chosen[0] = 0
+    chosen[-1] = fx.size - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        if i + 2 < bounds.size:
+            next_lo, next_hi = hi, bounds[i + 2]
+            cx = fx[next_lo:next_hi].mean()
+            cy = fy[next_lo:next_hi].mean()
+        else:
+            cx, cy = fx[-1], fy[-1]
+        # Twice the triangle area, the factor does not change the argmax
+        area = np.abs((fx[a] - cx) * (fy[lo:hi] - fy[a])
+                      - (fx[a] - fx[lo:hi]) * (cy - fy[a]))
+        a = lo + int(np.argmax(area))
+        chosen[i + 1] = a
+    return np.unique(np.concatenate(
+        [finite[chosen], [0, x.size - 1], _gap_starts(y)]))
+
+
+DECIMATION_METHODS = {"minmax": minmax_indices, "lttb": lttb_indices}
+
+
+def decimate(
+        x,
+        y,
+        n_bins: int,
+        method: str = "minmax",
+        x_range=None
+) -> np.ndarray:
+    """
+    Indices of the samples of ``y`` worth drawing at ``n_bins`` pixels.
+
+    With ``x_range = (lo, hi)`` only the visible samples are decimated,
+    plus one on each side so the line still reaches the plot edges.
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f"Unknown decimation method: {method}")
+    x = np.asarray(x, dtype=np.float64)
+    start, stop = 0, x.size
+    if x_range is not None:
+        lo, hi = sorted(x_range)
+        start = max(int(np.searchsorted(x, lo, side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(x, hi, side="right")) + 1, x.size)
+    if stop - start < 2:
+        return np.arange(start, stop)
+    return start + DECIMATION_METHODS[method](
+        x[start:stop], np.asarray(y)[start:stop], n_bins)
@@ -0,0 +1,142 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from definitions import (
+    ALIAS_MAP,
+    HEADER_STRIP_TOKENS,
+    UNIT_KEYWORDS,
+    UNIT_NORMALIZATION,
+)
+
+'''
+Header classification engine
+
+The patterns of definitions.py are compiled once, at import:
+
+    UNIT_KEYWORDS  one alternation ``^(?:.*?(?P<u0>p0)|.*?(?P<u1>p1)|...)``.
+                   Alternatives are tried in list order, so the first
+                   pattern that occurs anywhere in the header wins, as in a
+                   loop over the list.
+    ALIAS_MAP      one optional lookahead per quantity, so a single match
+                   reports every quantity a header refers to.
+
+Results are memoized per raw header string.
+'''
+
+HEADER_CACHE_SIZE = 4096
+
+
+def _build_unit_regex():
+    alternatives = "|".join(
+        f".*?(?P<u{i}>{pattern})" for i, (pattern, _) in
+        enumerate(UNIT_KEYWORDS))
+    return re.compile(f"^(?:{alternatives})", re.DOTALL)
+
+
+def _build_alias_regex():
+    lookaheads = "".join(
+        f"(?:(?=.*?(?P<{key}>{'|'.join(patterns)})))?"
+        for key, patterns in ALIAS_MAP.items())
+    return re.compile(f"^{lookaheads}", re.DOTALL)
+
+
+_UNIT_REGEX = _build_unit_regex()
+_UNIT_SUBS = [re.compile(pattern, re.IGNORECASE)
+              for pattern, _ in UNIT_KEYWORDS]
+_UNIT_NAMES = [UNIT_NORMALIZATION.get(unit, unit) for _, unit in UNIT_KEYWORDS]
+_ALIAS_REGEX = _build_alias_regex()
+_ALIAS_KEYS = tuple(ALIAS_MAP)
+_STRIP_TABLE = str.maketrans({tok: None for tok in HEADER_STRIP_TOKENS
+                              if len(tok) == 1})
+_STRIP_LONG = [tok for tok in HEADER_STRIP_TOKENS if len(tok) > 1]
+
+
+class HeaderClass(NamedTuple):
+    """
+    Classification of one header.
+
+    ``alias`` is the first ALIAS_MAP quantity the clean name refers to
+    (None when there is none), ``aliases`` all of them.
+    """
+    clean: str
+    unit: str | None
+    alias: str | None
+    aliases: frozenset
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def _aliases_of(cleaned: str) -> frozenset:
+    match = _ALIAS_REGEX.match(cleaned)
+    return frozenset(key for key in _ALIAS_KEYS
+                     if match.group(key) is not None)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def classify_header(header: str) -> HeaderClass:
+    """
+    Clean name, unit and ALIAS_MAP quantity of a raw header, in one pass.
+    """
+    raw = header.strip()
+    detected_unit = None
+    cleaned = raw
+
+    # 1. Detect unit from definitions.py → UNIT_KEYWORDS
+    match = _UNIT_REGEX.match(raw.lower())
+    if match is not None:
+        i = int(match.lastgroup[1:])
+        detected_unit = _UNIT_NAMES[i]
+        cleaned = _UNIT_SUBS[i].sub("", cleaned)
+
+    # 2. Strip tokens
+    cleaned = cleaned.translate(_STRIP_TABLE)
+    for tok in _STRIP_LONG:
+        cleaned = cleaned.replace(tok, "")
+    cleaned = cleaned.strip().strip("-").strip("_").lower()
+
+    aliases = _aliases_of(cleaned)
+    alias = next((key for key in _ALIAS_KEYS if key in aliases), None)
+    return HeaderClass(cleaned, detected_unit, alias, aliases)
+
+
+def classify_headers(headers: list[str]) -> list[HeaderClass]:
+    """:func:`classify_header` for a whole list of headers."""
+    return [classify_header(h) for h in headers]
+
+
+def clear_header_cache():
+    classify_header.cache_clear()
+    _aliases_of.cache_clear()
+
+
+def detect_unit_in_header(header: str):
+    clean, unit, _, _ = classify_header(header)
+    return clean, unit
+
+
+def parse_header_list(headers: list[str]):
+    """
+    Processes a list of column headers.
+    Returns:
+        cleaned_headers : list[str]
+        detected_units  : dict[str, str or None]
+    """
+    cleaned_headers = []
+    detected_units = {}
+
+    for clean, unit, _, _ in classify_headers(headers):
+        cleaned_headers.append(clean)
+        detected_units[clean] = unit
+
+    return cleaned_headers, detected_units
+
+
+def detect_aliases(cleaned_headers: list[str]) -> dict[str, bool]:
+    """
+    Check which ALIAS_MAP quantities appear in a list of cleaned headers.
+    Returns a dict of ALIAS_MAP key -> bool.
+    """
+    found = set()
+    for h in cleaned_headers:
+        found |= _aliases_of(h)
+    return {key: key in found for key in _ALIAS_KEYS}
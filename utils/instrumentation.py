@@ -0,0 +1,277 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+'''
+Opt-in timing and memory instrumentation
+
+Library code marks its stages with ``span("name")`` blocks or the
+``@instrumented("name")`` decorator. While instrumentation is disabled
+(the default) both cost a single flag check. Once enabled with
+:func:`enable`, every finished span records its wall time, optional
+attributes such as row counts and, with ``trace_memory=True``, the
+tracemalloc growth and peak of the block into the default
+:class:`MetricsRegistry`.
+'''
+
+DEFAULT_MAX_EVENTS = 100_000
+
+
+class _State(threading.local):
+    # Per-thread stack of open spans
+    def __init__(self):
+        self.stack = []
+
+
+_enabled = False
+_trace_memory = False
+_owns_tracemalloc = False
+_local = _State()
+
+
+class MetricsRegistry:
+    """
+    Aggregated span metrics plus a bounded list of individual events for
+    trace export.
+
+    Parameters
+    ----------
+    max_events : int, optional
+        Number of individual spans kept for :meth:`export_chrome_trace`.
+        Aggregates are always complete.
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.stats = {}
+        self.events = []
+        self.dropped_events = 0
+        self.origin_ns = time.perf_counter_ns()
+
+    def record(
+            self,
+            name: str,
+            start_ns: int,
+            duration_ns: int,
+            attrs: dict,
+            depth: int
+    ):
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = {
+                    "count": 0, "total_s": 0.0, "min_s": float("inf"),
+                    "max_s": 0.0, "rows": 0, "bytes": 0, "peak_bytes": 0}
+            seconds = duration_ns * 1e-9
+            stat["count"] += 1
+            stat["total_s"] += seconds
+            stat["min_s"] = min(stat["min_s"], seconds)
+            stat["max_s"] = max(stat["max_s"], seconds)
+            stat["rows"] += int(attrs.get("rows", 0))
+            stat["bytes"] += int(attrs.get("bytes", 0))
+            stat["peak_bytes"] = max(stat["peak_bytes"],
+                                     int(attrs.get("peak_bytes", 0)))
+            if len(self.events) < self.max_events:
+                self.events.append((name, start_ns, duration_ns, depth,
+                                    threading.get_ident(), attrs))
+            else:
+                self.dropped_events += 1
+
+    def summary(self):
+        """Aggregates as a DataFrame, slowest stage first."""
+        import pandas as pd
+        frame = pd.DataFrame.from_dict(self.stats, orient="index")
+        if frame.empty:
+            return frame
+        frame["mean_s"] = frame["total_s"] / frame["count"]
+        frame.index.name = "span"
+        return frame.sort_values("total_s", ascending=False)
+
+    def report(self) -> str:
+        """Plain text table of :meth:`summary`."""
+        lines = [f"{'span':<36}{'count':>8}{'total s':>12}{'mean ms':>11}"
+                 f"{'rows':>12}{'peak MiB':>10}"]
+        for name, stat in sorted(self.stats.items(),
+                                 key=lambda item: -item[1]["total_s"]):
+            lines.append(
+                f"{name:<36}{stat['count']:>8}{stat['total_s']:>12.4f}"
+                f"{1e3 * stat['total_s'] / stat['count']:>11.3f}"
+                f"{stat['rows']:>12}{stat['peak_bytes'] / 1024 ** 2:>10.1f}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "spans": self.stats,
+            "events": len(self.events),
+            "dropped_events": self.dropped_events,
+        }
+
+    def export_json(self, path: str):
+        """Write the aggregates as JSON."""
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def export_chrome_trace(self, path: str):
+        """
+        Write the recorded spans in the Chrome trace event format, viewable
+        in chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        events = [{
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin_ns) / 1e3,
+            "dur": duration / 1e3,
+            "pid": pid,
+            "tid": tid,
+            "args": dict(attrs, depth=depth),
+        } for name, start, duration, depth, tid, attrs in self.events]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file,
+                      default=str)
+
+
+registry = MetricsRegistry()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "start_ns", "mem_start", "child_peak")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Attach attributes such as ``rows`` or ``bytes`` to the span."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = _local.stack
+        if _trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Keep the parent's peak before restarting peak tracking
+                parent = stack[-1]
+                parent.child_peak = max(parent.child_peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = current
+        else:
+            self.mem_start = None
+        self.child_peak = 0
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.start_ns
+        stack = _local.stack
+        stack.pop()
+        if self.mem_start is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.child_peak)
+            self.attrs["allocated_bytes"] = current - self.mem_start
+            self.attrs["peak_bytes"] = peak - self.mem_start
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        registry.record(self.name, self.start_ns, duration, self.attrs,
+                        len(stack))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing the enclosed block as ``name``.
+
+    The returned object's ``set(rows=..., bytes=...)`` attaches counts to
+    the span. A shared no-op object is returned while disabled.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+
+def instrumented(name: str = None):
+    """Decorator recording every call of the function as a span."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(trace_memory: bool = False):
+    """
+    Start recording spans. With ``trace_memory`` tracemalloc is started
+    too, which slows allocations down noticeably.
+    """
+    global _enabled, _trace_memory, _owns_tracemalloc
+    _enabled = True
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _owns_tracemalloc = True
+
+
+def disable():
+    """Stop recording; tracemalloc is stopped only if :func:`enable`
+    started it."""
+    global _enabled, _trace_memory, _owns_tracemalloc
+    if _owns_tracemalloc and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = False
+    _trace_memory = False
+    _owns_tracemalloc = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def recording(trace_memory: bool = False, clear: bool = True):
+    """
+    Enable instrumentation for a block and yield the registry::
+
+        with recording() as metrics:
+            telescope.add_component(path, "filter")
+        print(metrics.report())
+    """
+    if clear:
+        registry.clear()
+    enable(trace_memory)
+    try:
+        yield registry
+    finally:
+        disable()
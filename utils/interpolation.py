@@ -0,0 +1,33 @@
+import numpy as np
+
+
+def linear_weights(x, x_new):
+    """
+    Bracketing indices and weights for linear interpolation.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Increasing source axis, at least two points.
+    x_new : np.ndarray
+        Points to interpolate at. Values outside ``x`` are clamped to
+        the end points.
+
+    Returns
+    -------
+    lo : np.ndarray
+        Index of the left neighbour of every point in ``x_new``.
+    w : np.ndarray
+        Weight of the right neighbour, so that
+        ``y_new = y[lo] * (1 - w) + y[lo + 1] * w``.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x_new = np.clip(np.asarray(x_new, dtype=np.float64), x[0], x[-1])
+    lo = np.searchsorted(x, x_new, side="right") - 1
+    np.clip(lo, 0, x.size - 2, out=lo)
+    x_lo = x[lo]
+    step = x[lo + 1] - x_lo
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.where(step > 0, (x_new - x_lo) / step, 0.0)
+    return lo, w
+
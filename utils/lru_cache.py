@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+
+class ByteBudgetLRU:
+    """
+    In-memory LRU mapping with a size budget in bytes.
+
+    Every value is stored together with its size. Inserting beyond
+    ``max_bytes`` evicts the least recently used entries first; a single
+    value larger than the whole budget is not stored at all.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Budget for all values together. ``None`` means unbounded.
+    max_entries : int, optional
+        Optional cap on the number of entries.
+    """
+
+    def __init__(self, max_bytes: int | None = None,
+                 max_entries: int | None = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def get(self, key, default=None):
+        try:
+            value, _ = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, nbytes: int) -> bool:
+        """Store ``value``; returns False when it does not fit at all."""
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return False
+        self.pop(key)
+        self._data[key] = (value, nbytes)
+        self.nbytes += nbytes
+        self._shrink()
+        return True
+
+    def pop(self, key):
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+        self.nbytes -= item[1]
+        return item[0]
+
+    def _shrink(self):
+        while self._data and (
+                (self.max_bytes is not None and self.nbytes > self.max_bytes)
+                or (self.max_entries is not None
+                    and len(self._data) > self.max_entries)):
+            _, (_, nbytes) = self._data.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+
+    def resize(self, max_bytes: int | None = None,
+               max_entries: int | None = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._shrink()
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._data),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
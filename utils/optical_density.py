@@ -0,0 +1,67 @@
+import numpy as np
+
+from utils.header_parsing import classify_header
+
+'''
+Optical density (log10) domain
+
+A transmission T has the optical density OD = -log10(T), so the
+throughput of a stack is the sum of the ODs of its parts. Sums neither
+underflow for deep-blocking filters (OD 6-10 each) nor lose relative
+precision, and are converted back to a linear transmission only on
+output.
+'''
+
+OD_UNIT = "OD"
+PERCENT_UNIT = "%"
+
+
+def column_unit(name: str, unit: str = None) -> str | None:
+    """
+    Scale of a transmission-like column: ``"OD"``, ``"%"`` or None for a
+    plain fraction. ``unit`` is the unit detected in the header, if any;
+    optical density columns are recognized from the name (ALIAS_MAP).
+    """
+    if unit in (OD_UNIT, PERCENT_UNIT):
+        return unit
+    if "optical_density" in classify_header(name).aliases:
+        return OD_UNIT
+    return None
+
+
+def to_optical_density(values, unit: str = None) -> np.ndarray:
+    """
+    Optical density of ``values`` given in ``unit`` (``"OD"``, ``"%"`` or
+    None for fractions). Zero or negative transmissions are fully
+    blocking (``inf``); missing values stay NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if unit == OD_UNIT:
+        return values.copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        od = -np.log10(np.where(values > 0, values, 0.0))
+    if unit == PERCENT_UNIT:
+        od += 2.0
+    # NaN fails the comparison above, restore it
+    od[np.isnan(values)] = np.nan
+    return od
+
+
+def from_optical_density(od, unit: str = None) -> np.ndarray:
+    """Inverse of :func:`to_optical_density`."""
+    od = np.asarray(od, dtype=np.float64)
+    if unit == OD_UNIT:
+        return od.copy()
+    if unit == PERCENT_UNIT:
+        od = od - 2.0
+    return np.power(10.0, -od)
+
+
+def to_fraction(values, unit: str = None) -> np.ndarray:
+    """Transmission ``values`` given in ``unit`` as plain fractions."""
+    values = np.asarray(values, dtype=np.float64)
+    if unit == OD_UNIT:
+        return np.power(10.0, -values)
+    if unit == PERCENT_UNIT:
+        return values / 100.0
+    return values
@@ -0,0 +1,273 @@
+import csv
+import re
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_BYTES = 64 * 1024
+DEFAULT_DELIMITERS = ("\t", ",", ";", "|", " ")
+
+
+class TextLayout:
+    """
+    Layout of a delimited text spectrum found by :func:`sniff_text_layout`.
+
+    Parameters
+    ----------
+    delimiter : str
+        Field separator. A single space stands for any run of whitespace.
+    header_row : int, None
+        Zero-based line of the column headers, None without a header.
+    data_start : int
+        Zero-based line of the first data row.
+    names : list[str], None
+        Column names read from the header row.
+    n_columns : int
+        Number of fields on the data rows.
+    encoding : str
+        Encoding the sample was decoded with.
+    """
+
+    def __init__(
+            self,
+            delimiter: str,
+            header_row,
+            data_start: int,
+            names,
+            n_columns: int,
+            encoding: str = "utf-8"
+    ):
+        self.delimiter = delimiter
+        self.header_row = header_row
+        self.data_start = data_start
+        self.names = names
+        self.n_columns = n_columns
+        self.encoding = encoding
+
+    @property
+    def sep(self) -> str:
+        """Separator in the form ``pandas.read_csv`` expects."""
+        return r"\s+" if self.delimiter == " " else self.delimiter
+
+    def read_options(self) -> dict:
+        """Keyword arguments for ``pandas.read_csv`` to load the data."""
+        options = dict(sep=self.sep, skiprows=self.data_start, header=None,
+                       encoding=self.encoding)
+        if self.names is not None:
+            options["names"] = self.names
+            options["usecols"] = range(len(self.names))
+        return options
+
+    def __repr__(self):
+        return (f"TextLayout(delimiter={self.delimiter!r}, "
+                f"header_row={self.header_row}, "
+                f"data_start={self.data_start}, names={self.names})")
+
+
+def numeric_mask(values) -> np.ndarray:
+    """
+    Element-wise "parses as a number" test, done in one vectorized pass
+    over an array of any shape holding strings, numbers or missing values.
+    """
+    values = np.asarray(values, dtype=object)
+    flat = pd.to_numeric(pd.Series(values.ravel()), errors="coerce")
+    return flat.notna().to_numpy().reshape(values.shape)
+
+
+def find_data_start(
+        numeric_counts,
+        nonempty_counts,
+        numeric_threshold: float = 0.8,
+        min_run: int = 3,
+        min_columns: int = 2
+) -> int | None:
+    """
+    First row of the leading numeric block of a table.
+
+    A row counts as data when it has at least ``min_columns`` non-empty
+    cells and at least ``numeric_threshold`` of them are numeric. The block
+    must hold ``min_run`` data rows in a row (or run to the end of the
+    sample) so that a stray number in a preamble is not taken for data.
+
+    Returns
+    -------
+    int, None
+        Row index, or None when there is no numeric block.
+    """
+    numeric_counts = np.asarray(numeric_counts)
+    nonempty_counts = np.asarray(nonempty_counts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = numeric_counts / nonempty_counts
+    is_data = (nonempty_counts >= min_columns) & (fraction >= numeric_threshold)
+    if not is_data.any():
+        return None
+
+    # Length of the data run starting at every row
+    n = is_data.size
+    breaks = np.flatnonzero(~is_data)
+    next_break = np.append(breaks, n)[np.searchsorted(breaks, np.arange(n))]
+    run = next_break - np.arange(n)
+    long_enough = is_data & ((run >= min_run) | (next_break == n))
+    candidates = np.flatnonzero(long_enough)
+    return int(candidates[0]) if candidates.size else None
+
+
+def read_text_sample(
+        path: str,
+        max_bytes: int = DEFAULT_SAMPLE_BYTES
+) -> tuple[bytes, bool]:
+    """
+    Read at most ``max_bytes`` from the start of ``path``.
+
+    Returns
+    -------
+    tuple
+        ``(sample, complete)`` where ``complete`` tells whether the whole
+        file fit in the sample.
+    """
+    with open(path, "rb") as file:
+        sample = file.read(max_bytes + 1)
+    return sample[:max_bytes], len(sample) <= max_bytes
+
+
+def _decode(sample) -> tuple[str, str]:
+    if isinstance(sample, str):
+        return sample, "utf-8"
+    if sample.startswith(b"\xef\xbb\xbf"):
+        return sample[3:].decode("utf-8", errors="replace"), "utf-8-sig"
+    try:
+        return sample.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError as err:
+        # A multi-byte character cut at the end of the sample is fine
+        if err.start >= len(sample) - 3:
+            return sample[:err.start].decode("utf-8"), "utf-8"
+        return sample.decode("latin-1"), "latin-1"
+
+
+def _split_line(line: str, delimiter: str) -> list[str]:
+    # CSV quoting, so "Wavelength, nm" stays one field; each line is read
+    # on its own so an unbalanced quote cannot swallow the next lines
+    for fields in csv.reader([line], delimiter=delimiter):
+        return fields
+    return []
+
+
+def _split_lines(lines: list[str], delimiter: str) -> list[list[str]]:
+    if delimiter == " ":
+        return [line.split() for line in lines]
+    if len(delimiter) != 1:
+        return [[field.strip().strip('"').strip("'")
+                 for field in line.split(delimiter)] for line in lines]
+    return [[field.strip().strip("'")
+             for field in _split_line(line, delimiter)] for line in lines]
+
+
+def _scan(lines: list[str], delimiter: str, numeric_threshold: float):
+    rows = _split_lines(lines, delimiter)
+    counts = np.fromiter((len(r) for r in rows), dtype=np.int64,
+                         count=len(rows))
+    fields = np.array([f for r in rows for f in r], dtype=object)
+    if fields.size == 0:
+        return None
+
+    # One vectorized numeric test over every field of the sample
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    nonempty = fields != ""
+    numeric = numeric_mask(fields) & nonempty
+    has_fields = counts > 0
+    numeric_counts = np.zeros(len(rows), dtype=np.int64)
+    nonempty_counts = np.zeros(len(rows), dtype=np.int64)
+    numeric_counts[has_fields] = np.add.reduceat(numeric, starts[has_fields])
+    nonempty_counts[has_fields] = np.add.reduceat(nonempty,
+                                                  starts[has_fields])
+
+    data_start = find_data_start(numeric_counts, nonempty_counts,
+                                 numeric_threshold)
+    if data_start is None:
+        return None
+    block = nonempty_counts[data_start:]
+    run = np.flatnonzero(block < 2)
+    run_length = run[0] if run.size else block.size
+    n_columns = int(np.bincount(counts[data_start:data_start + run_length])
+                    .argmax())
+    return data_start, run_length, n_columns, rows
+
+
+def sniff_text_layout(
+        sample,
+        delimiters=DEFAULT_DELIMITERS,
+        numeric_threshold: float = 0.8,
+        complete: bool = True
+) -> TextLayout:
+    """
+    Find the delimiter, the header row and the first data row of a text
+    spectrum from a bounded prefix of the file.
+
+    Every candidate delimiter splits the sample once and all fields are
+    tested for numbers in a single vectorized pass; the delimiter that
+    yields the longest numeric block (then the most columns) wins. The
+    header is the last non-empty line before that block.
+
+    Parameters
+    ----------
+    sample : bytes, str
+        Start of the file, see :func:`read_text_sample`.
+    delimiters : tuple[str], optional
+        Candidates in order of preference. A single space means any run of
+        whitespace.
+    numeric_threshold : float, optional
+        Share of numeric fields that makes a line a data row.
+    complete : bool, optional
+        False when the sample was cut, its last line is then ignored.
+    """
+    text, encoding = _decode(sample)
+    lines = text.splitlines()
+    if not complete and len(lines) > 1:
+        lines = lines[:-1]
+
+    best = None
+    for delimiter in delimiters:
+        scan = _scan(lines, delimiter, numeric_threshold)
+        if scan is None:
+            continue
+        score = (scan[1], scan[2])
+        if best is None or score > best[1]:
+            best = (delimiter, score, scan)
+    if best is None:
+        raise ValueError("No numeric data block found in the sample.")
+
+    delimiter, _, (data_start, run_length, n_columns, rows) = best
+    header_row = names = None
+    for i in range(data_start - 1, -1, -1):
+        if lines[i].strip():
+            header_row = i
+            break
+    if header_row is not None:
+        names = rows[header_row]
+        if delimiter == " " and len(names) != n_columns:
+            # Headers such as "Wavelength (nm)" contain single spaces
+            names = [n for n in re.split(r"\s{2,}|\t", lines[header_row]
+                                         .strip()) if n]
+        # A trailing delimiter leaves empty names over empty data columns
+        block = rows[data_start:data_start + run_length]
+        while len(names) > 1 and not names[-1] and all(
+                len(row) < len(names) or not row[len(names) - 1]
+                for row in block):
+            names = names[:-1]
+            n_columns = min(n_columns, len(names))
+        if len(names) > n_columns:
+            names = names[:n_columns]
+        if len(names) < n_columns or not all(names):
+            names = None
+    return TextLayout(delimiter, header_row, data_start, names, n_columns,
+                      encoding)
+
+
+def sniff_file_layout(
+        path: str,
+        max_bytes: int = DEFAULT_SAMPLE_BYTES,
+        **kwargs
+) -> TextLayout:
+    """:func:`sniff_text_layout` on the first ``max_bytes`` of ``path``."""
+    sample, complete = read_text_sample(path, max_bytes)
+    return sniff_text_layout(sample, complete=complete, **kwargs)
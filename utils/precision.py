@@ -0,0 +1,33 @@
+import numpy as np
+
+'''
+Storage precision
+
+Component values and source fluxes can be stored as float32 to halve
+the memory of large models and sweeps. Only storage changes: wavelength
+axes stay float64, and products, sums and integrals are accumulated in
+float64 from the stored values.
+
+float32 keeps about 7 significant digits, so a stored transmission or
+flux carries a relative rounding error of at most 2**-24 (6e-8). Values
+below ~1e-38 lose precision and below ~1e-45 flush to zero; keep deep
+blocking in the optical density domain (generate_throughput(...,
+domain="od")) rather than as tiny linear transmissions.
+'''
+
+STORAGE_DTYPES = (np.dtype(np.float64), np.dtype(np.float32))
+
+
+def storage_dtype(dtype) -> np.dtype:
+    """
+    Validated storage type: float64 or float32, given as a numpy type,
+    dtype or name (``"float32"``, ``"<f4"``, ...).
+    """
+    try:
+        dtype = np.dtype(dtype).newbyteorder("=")
+    except TypeError:
+        raise ValueError(f"Unknown storage dtype: {dtype!r}") from None
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(
+            f"Storage dtype must be float64 or float32, got {dtype}.")
+    return dtype
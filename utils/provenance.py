@@ -0,0 +1,129 @@
+import hashlib
+import io
+import os
+
+'''
+Component provenance
+
+Every component read from a file keeps a record of where it came from,
+stored in the model metadata so it is saved with the model:
+
+    path            absolute path of the file
+    size, mtime_ns  file stamp when it was read
+    digest          SHA-256 of the file bytes
+    reader_options  options the file was read with
+    loader          "file" (read whole) or "stream" (read in chunks)
+
+The digest of a component being added is taken from the bytes the reader
+consumes (see :class:`DigestReader`), so the file is read once.
+
+A file has changed when its content digest differs. The stamp is only a
+shortcut: an unchanged stamp means the file is not read at all, a
+changed stamp with the same digest (a touch or a copy) just updates the
+stamp.
+'''
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class DigestReader(io.RawIOBase):
+    """
+    Binary file that hashes the bytes as they are read through it, to be
+    wrapped in ``io.BufferedReader`` and handed to a reader.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._file = open(path, "rb")
+        self._sha = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._file.readinto(buffer)
+        self._sha.update(memoryview(buffer)[:n])
+        return n
+
+    def close(self):
+        # Readers may close the file early, the rest is hashed first
+        if not self.closed:
+            self._finish()
+            self._file.close()
+        super().close()
+
+    def _finish(self):
+        for block in iter(lambda: self._file.read(1 << 20), b""):
+            self._sha.update(block)
+
+    def hexdigest(self) -> str:
+        """Digest of the whole file; what the reader left is hashed now."""
+        if not self.closed:
+            self._finish()
+        return self._sha.hexdigest()
+
+
+def file_stamp(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def source_stamp(
+        path: str,
+        reader_options: dict = None,
+        loader: str = "file"
+) -> dict:
+    """
+    Provenance record of ``path`` without its digest, taken before the
+    file is read so a change made while reading shows up on the next
+    check. The reader fills in the digest.
+    """
+    path = os.path.abspath(path)
+    size, mtime_ns = file_stamp(path)
+    return {
+        "path": path,
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "digest": None,
+        "reader_options": dict(reader_options or {}),
+        "loader": loader,
+    }
+
+
+def source_record(
+        path: str,
+        reader_options: dict = None,
+        loader: str = "file",
+        digest: str = None
+) -> dict:
+    """Provenance record of ``path``, hashed here unless ``digest`` is given."""
+    record = source_stamp(path, reader_options, loader)
+    record["digest"] = digest or file_digest(path)
+    return record
+
+
+def stamp_changed(record: dict) -> bool:
+    """Whether the file stamp differs from ``record`` (no read)."""
+    return file_stamp(record["path"]) != (record["size"], record["mtime_ns"])
+
+
+def changed_source(record: dict) -> dict | None:
+    """
+    Fresh record of the file behind ``record`` if its content changed,
+    else None. An identical file with a new stamp updates ``record`` in
+    place so it is not hashed again. A missing file raises OSError.
+    """
+    if not stamp_changed(record):
+        return None
+    fresh = source_record(record["path"], record["reader_options"],
+                          record["loader"])
+    if fresh["digest"] == record["digest"]:
+        record.update(size=fresh["size"], mtime_ns=fresh["mtime_ns"])
+        return None
+    return fresh
@@ -0,0 +1,218 @@
+import numpy as np
+
+from utils.interpolation import linear_weights
+from utils.spectrum_axis import axis_digest
+from utils.lru_cache import ByteBudgetLRU
+
+SPARSE_METHODS = ("linear", "nearest", "previous", "next")
+DEFAULT_OPERATOR_BYTES = 128 * 1024 ** 2
+
+
+class ResamplingOperator:
+    """
+    Sparse matrix that resamples curves from one axis onto another.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse.csr_matrix
+        Shape (len(target), len(source)).
+    outside : np.ndarray
+        Boolean mask of target points outside the source span. They are
+        set to NaN by :meth:`apply` when the operator was built with
+        ``extrapolate="nan"``.
+    extrapolate : str
+        "clamp" or "nan".
+    """
+
+    def __init__(self, matrix, outside, extrapolate="clamp"):
+        self.matrix = matrix
+        self.outside = outside
+        self.extrapolate = extrapolate
+        self.shape = matrix.shape
+
+    @property
+    def nbytes(self) -> int:
+        m = self.matrix
+        return (m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+                + self.outside.nbytes)
+
+    def apply(self, values) -> np.ndarray:
+        """
+        Resample ``values`` of shape (n,) or (k, n), one row per curve.
+        Returns shape (m,) or (k, m).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        out = np.asarray(self.matrix @ values.T).T
+        if self.extrapolate == "nan" and self.outside.any():
+            out = np.array(out, copy=True)
+            out[..., self.outside] = np.nan
+        return out
+
+
+def build_resampling_operator(
+        source_axis,
+        target_axis,
+        method: str = "linear",
+        extrapolate: str = "clamp"
+) -> ResamplingOperator:
+    """
+    Build the sparse interpolation matrix from ``source_axis`` to
+    ``target_axis``. Linear rows hold two weights, the other methods one.
+    """
+    # scipy.sparse is slow to import, load it on first use
+    from scipy import sparse
+
+    if method not in SPARSE_METHODS:
+        raise ValueError(f"Unsupported resampling method: {method}")
+    if extrapolate not in ("clamp", "nan"):
+        raise ValueError(f"Unsupported extrapolation mode: {extrapolate}")
+
+    source = np.asarray(source_axis, dtype=np.float64)
+    target = np.asarray(target_axis, dtype=np.float64)
+    m, n = target.size, source.size
+    outside = (target < source[0]) | (target > source[-1]) if n else \
+        np.ones(m, dtype=bool)
+
+    if n < 2:
+        cols = np.zeros(m, dtype=np.int64)
+        data = np.ones(m)
+        rows = np.arange(m)
+    else:
+        lo, w = linear_weights(source, target)
+        if method == "linear":
+            rows = np.repeat(np.arange(m), 2)
+            cols = np.column_stack([lo, lo + 1]).ravel()
+            data = np.column_stack([1.0 - w, w]).ravel()
+        else:
+            if method == "nearest":
+                cols = lo + (w > 0.5)
+            elif method == "previous":
+                cols = lo + (w >= 1.0)
+            else:
+                cols = lo + (w > 0.0)
+            data = np.ones(m)
+            rows = np.arange(m)
+
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(m, max(n, 1)))
+    # Exact hits keep a single weight so NaN neighbours do not leak in
+    matrix.eliminate_zeros()
+    if extrapolate == "nan":
+        # Empty rows for points outside the source span
+        matrix = sparse.diags((~outside).astype(np.float64)) @ matrix
+        matrix.eliminate_zeros()
+    return ResamplingOperator(matrix.tocsr(), outside, extrapolate)
+
+
+class ResamplingCache:
+    """
+    LRU cache of :class:`ResamplingOperator` keyed by
+    (source axis, target axis, method, extrapolation).
+
+    Axes are keyed by a digest of their bytes, so equal axes built in
+    different places share one operator.
+    """
+
+    def __init__(self, max_bytes: int | None = DEFAULT_OPERATOR_BYTES):
+        self._lru = ByteBudgetLRU(max_bytes)
+
+    def get(
+            self,
+            source_axis,
+            target_axis,
+            method: str = "linear",
+            extrapolate: str = "clamp"
+    ) -> ResamplingOperator:
+        key = (axis_digest(source_axis), axis_digest(target_axis),
+               method, extrapolate)
+        operator = self._lru.get(key)
+        if operator is None:
+            operator = build_resampling_operator(
+                source_axis, target_axis, method, extrapolate)
+            self._lru.put(key, operator, operator.nbytes)
+        return operator
+
+    def resize(self, max_bytes: int | None):
+        self._lru.resize(max_bytes)
+
+    def clear(self):
+        self._lru.clear()
+
+    def stats(self) -> dict:
+        return self._lru.stats()
+
+
+default_resampling_cache = ResamplingCache()
+
+
+def resample(
+        source_axis,
+        values,
+        target_axis,
+        method: str = "linear",
+        extrapolate: str = "clamp",
+        cache: ResamplingCache = None
+) -> np.ndarray:
+    """
+    Resample ``values`` (shape (n,) or (k, n)) from ``source_axis`` onto
+    ``target_axis`` with a cached sparse operator.
+    """
+    cache = default_resampling_cache if cache is None else cache
+    operator = cache.get(source_axis, target_axis, method, extrapolate)
+    return operator.apply(values)
+
+
+class StreamingResampler:
+    """
+    Linear resampling of a curve that arrives in chunks.
+
+    Chunks must follow each other along the wavelength axis (increasing
+    or decreasing), their spans may only touch at the seams. The last
+    sample of every chunk is carried over so target points between two
+    chunks are interpolated exactly like in one pass. Memory is bounded by
+    the chunk size plus the (k, m) output.
+
+    Parameters
+    ----------
+    target_axis : array-like
+        Increasing axis to resample onto.
+    n_columns : int
+        Number of curves in every chunk.
+    """
+
+    def __init__(self, target_axis, n_columns: int):
+        self.target = np.asarray(target_axis, dtype=np.float64)
+        self.out = np.full((n_columns, self.target.size), np.nan)
+        self._carry_x = None
+        self._carry_y = None
+
+    def feed(self, x, Y):
+        """
+        Add one chunk: ``x`` of length n and ``Y`` of shape (k, n).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        Y = np.asarray(Y, dtype=np.float64).reshape(self.out.shape[0], -1)
+        if x.size == 0:
+            return
+        if self._carry_x is not None:
+            x = np.concatenate([self._carry_x, x])
+            Y = np.concatenate([self._carry_y, Y], axis=1)
+        if x[-1] < x[0]:
+            x_inc, Y_inc = x[::-1], Y[:, ::-1]
+        else:
+            x_inc, Y_inc = x, Y
+        if np.any(np.diff(x_inc) < 0):
+            raise ValueError(
+                "Streaming resampling needs a monotonic wavelength column.")
+
+        start = np.searchsorted(self.target, x_inc[0], side="left")
+        stop = np.searchsorted(self.target, x_inc[-1], side="right")
+        points = self.target[start:stop]
+        for row in range(self.out.shape[0]):
+            self.out[row, start:stop] = np.interp(points, x_inc, Y_inc[row])
+
+        self._carry_x = x[-1:]
+        self._carry_y = Y[:, -1:]
+
+    def result(self) -> np.ndarray:
+        """Resampled curves, shape (k, m); NaN outside the data span."""
+        return self.out
@@ -1,3 +1,5 @@
+import hashlib
+
 import numpy as np
 
 
@@ -34,3 +36,76 @@ def make_spectrum_axis(start: float,
 
     # Round for safety
     return np.round(axis, precision)
+
+
+def merge_spectrum_axes(*axes, precision: int = 9) -> np.ndarray:
+    """
+    Sorted union of several wavelength axes.
+
+    Parameters
+    ----------
+    *axes : array-like
+        Axes in the same unit.
+    precision : int, optional
+        Decimal rounding applied before merging so values that only
+        differ by float drift collapse into one sample. Default: 9
+
+    Returns
+    -------
+    np.ndarray
+        Strictly increasing float64 axis.
+    """
+    parts = [np.round(np.asarray(a, dtype=np.float64), precision)
+             for a in axes if len(a)]
+    if not parts:
+        return np.empty(0, dtype=np.float64)
+    return np.unique(np.concatenate(parts))
+
+
+def align_to_axis(axis, values, target_axis) -> np.ndarray:
+    """
+    Linearly interpolate sampled curves onto another axis.
+
+    Each column is interpolated against wavelength over its own valid
+    samples. Target points outside the span a column covers are NaN,
+    missing values inside the span are bridged.
+
+    Parameters
+    ----------
+    axis : array-like
+        Increasing source axis of length n.
+    values : array-like
+        Curves of shape (n,) or (n, k).
+    target_axis : array-like
+        Axis to interpolate onto, same unit as ``axis``.
+
+    Returns
+    -------
+    np.ndarray
+        Float64 array of shape (len(target_axis),) or (len(target_axis), k).
+    """
+    axis = np.asarray(axis, dtype=np.float64)
+    target = np.asarray(target_axis, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    flat = values.ndim == 1
+    cols = values.reshape(len(axis), -1)
+
+    out = np.full((target.size, cols.shape[1]), np.nan)
+    for j in range(cols.shape[1]):
+        valid = ~np.isnan(cols[:, j])
+        if not valid.any():
+            continue
+        x = axis[valid]
+        out[:, j] = np.interp(target, x, cols[valid, j],
+                              left=np.nan, right=np.nan)
+    return out[:, 0] if flat else out
+
+
+def axis_digest(axis) -> str:
+    """
+    Short content key for a wavelength axis, equal for equal values
+    regardless of where the array came from.
+    """
+    axis = np.ascontiguousarray(axis, dtype=np.float64)
+    digest = hashlib.blake2b(axis.tobytes(), digest_size=16).hexdigest()
+    return f"{axis.size}:{digest}"
@@ -0,0 +1,204 @@
+import re
+
+import numpy as np
+
+from utils.optical_density import from_optical_density, to_optical_density
+
+DEFAULT_REBUILD_AFTER = 64
+
+
+class RunningProduct:
+    """
+    Element-wise product of a changing set of curves, updated in O(n) per
+    added, removed or replaced curve.
+
+    Zeros are counted instead of multiplied in, so a curve holding zeros
+    can be removed again without dividing by zero: the value is 0 wherever
+    the count is positive and the product of the non-zero factors
+    elsewhere. Missing values count as 1, like ``np.nanprod``.
+
+    Removal divides the non-zero product, which accumulates rounding error
+    and fails once the product underflows. :attr:`needs_rebuild` turns
+    True after ``rebuild_after`` removals or on underflow, and the owner
+    then calls :meth:`rebuild` with the current members.
+
+    Parameters
+    ----------
+    n_samples : int
+        Length of every curve.
+    rebuild_after : int, optional
+        Number of removals tolerated before a rebuild is requested.
+    """
+
+    def __init__(
+            self,
+            n_samples: int,
+            rebuild_after: int = DEFAULT_REBUILD_AFTER
+    ):
+        self.rebuild_after = rebuild_after
+        self.rebuild(np.empty((0, n_samples)))
+
+    @staticmethod
+    def _factors(values):
+        values = np.asarray(values, dtype=np.float64)
+        zero = values == 0
+        factors = np.where(zero | np.isnan(values), 1.0, values)
+        return factors, zero
+
+    def rebuild(self, rows):
+        """Recompute from scratch from ``rows`` of shape (k, n)."""
+        rows = np.asarray(rows, dtype=np.float64)
+        zero = rows == 0
+        self.zeros = zero.sum(axis=0, dtype=np.int64)
+        self.product = np.prod(np.where(zero | np.isnan(rows), 1.0, rows),
+                               axis=0)
+        self.count = rows.shape[0]
+        self.removals = 0
+
+    def add(self, values):
+        factors, zero = self._factors(values)
+        self.product *= factors
+        self.zeros += zero
+        self.count += 1
+
+    def remove(self, values):
+        factors, zero = self._factors(values)
+        self.product /= factors
+        self.zeros -= zero
+        self.count -= 1
+        self.removals += 1
+
+    def replace(self, old, new):
+        """Swap one member curve for another in a single pass."""
+        old_factors, old_zero = self._factors(old)
+        new_factors, new_zero = self._factors(new)
+        self.product *= new_factors / old_factors
+        self.zeros += new_zero.astype(np.int64) - old_zero
+        self.removals += 1
+
+    @property
+    def n_samples(self) -> int:
+        return self.product.size
+
+    @property
+    def needs_rebuild(self) -> bool:
+        if self.removals >= self.rebuild_after:
+            return True
+        # An underflowed or overflowed product cannot be divided back out
+        product = self.product
+        return bool(np.any(((product == 0) & (self.zeros == 0))
+                           | ~np.isfinite(product)))
+
+    def value(self) -> np.ndarray:
+        return np.where(self.zeros > 0, 0.0, self.product)
+
+
+class RunningOpticalDensity:
+    """
+    Summed optical density of a changing set of curves, with the same
+    interface as :class:`RunningProduct`.
+
+    Curves are passed in OD. Fully blocking samples (``inf``) are counted
+    instead of added, so a blocking curve can be removed again; missing
+    samples count as OD 0, like ``np.nanprod`` in the linear domain.
+    """
+
+    def __init__(
+            self,
+            n_samples: int,
+            rebuild_after: int = DEFAULT_REBUILD_AFTER
+    ):
+        self.rebuild_after = rebuild_after
+        self.rebuild(np.empty((0, n_samples)))
+
+    @staticmethod
+    def _terms(values):
+        values = np.asarray(values, dtype=np.float64)
+        blocked = values == np.inf
+        terms = np.where(blocked | np.isnan(values), 0.0, values)
+        return terms, blocked
+
+    def rebuild(self, rows):
+        """Recompute from scratch from ``rows`` of shape (k, n)."""
+        rows = np.asarray(rows, dtype=np.float64)
+        blocked = rows == np.inf
+        self.blocked = blocked.sum(axis=0, dtype=np.int64)
+        self.total = np.where(blocked | np.isnan(rows), 0.0, rows).sum(axis=0)
+        self.count = rows.shape[0]
+        self.removals = 0
+
+    def add(self, values):
+        terms, blocked = self._terms(values)
+        self.total += terms
+        self.blocked += blocked
+        self.count += 1
+
+    def remove(self, values):
+        terms, blocked = self._terms(values)
+        self.total -= terms
+        self.blocked -= blocked
+        self.count -= 1
+        self.removals += 1
+
+    def replace(self, old, new):
+        old_terms, old_blocked = self._terms(old)
+        new_terms, new_blocked = self._terms(new)
+        self.total += new_terms - old_terms
+        self.blocked += new_blocked.astype(np.int64) - old_blocked
+        self.removals += 1
+
+    @property
+    def n_samples(self) -> int:
+        return self.total.size
+
+    @property
+    def needs_rebuild(self) -> bool:
+        # Subtraction only accumulates rounding error, there is no underflow
+        return (self.removals >= self.rebuild_after
+                or not np.all(np.isfinite(self.total)))
+
+    def od(self) -> np.ndarray:
+        return np.where(self.blocked > 0, np.inf, self.total)
+
+    def value(self) -> np.ndarray:
+        """Linear transmission of the stack."""
+        return from_optical_density(self.od())
+
+
+class ThroughputGroup:
+    """
+    Running throughput of every column whose name matches ``target``
+    (a regular expression), stored in the column ``output``.
+
+    ``domain`` is ``"linear"`` to multiply the stored values as they are,
+    or ``"od"`` to sum the members' optical densities, converted from
+    each column's unit.
+    """
+
+    def __init__(
+            self,
+            target: str,
+            output: str,
+            n_samples: int,
+            domain: str = "linear"
+    ):
+        if domain not in DOMAINS:
+            raise ValueError(f"Unknown throughput domain: {domain}")
+        self.target = target
+        self.output = output
+        self.domain = domain
+        self.pattern = re.compile(target)
+        self.members = []
+        self.product = DOMAINS[domain](n_samples)
+
+    def matches(self, name: str) -> bool:
+        return self.pattern.search(name) is not None
+
+    def terms(self, values, unit: str = None) -> np.ndarray:
+        """Curve ``values`` in ``unit`` as the factor the group combines."""
+        if self.domain == "od":
+            return to_optical_density(values, unit)
+        return values
+
+
+DOMAINS = {"linear": RunningProduct, "od": RunningOpticalDensity}
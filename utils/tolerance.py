@@ -0,0 +1,314 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+'''
+Monte Carlo tolerance analysis
+
+Every component curve gets N perturbed realizations: a scale error and a
+wavelength shift drawn once per realization, and a relative scatter
+drawn per sample. The throughput of realization s is the product of the
+perturbed curves.
+
+The work is done in blocks of wavelength samples. For one block the N
+realizations of every component are generated as an (N, block) array
+and multiplied together, so percentile curves are exact while memory is
+bounded by N x block, whatever the axis length. Integrated fluxes are
+accumulated per block with a matrix product against the integration
+weights of the block's samples, which the block builds itself. Blocks are
+independent and can be spread over a process pool.
+'''
+
+DEFAULT_PERCENTILES = (2.5, 16.0, 50.0, 84.0, 97.5)
+# Target size of one (N, block) float64 array
+DEFAULT_BLOCK_BYTES = 32 * 1024 ** 2
+
+
+class ComponentTolerance:
+    """
+    One-sigma tolerances of a component curve.
+
+    Parameters
+    ----------
+    scatter : float, optional
+        Relative sample-to-sample scatter of the curve.
+    shift : float, optional
+        Wavelength shift, in the axis unit.
+    scale : float, optional
+        Relative error of the overall level.
+    """
+
+    def __init__(
+            self,
+            scatter: float = 0.0,
+            shift: float = 0.0,
+            scale: float = 0.0
+    ):
+        if min(scatter, shift, scale) < 0:
+            raise ValueError("Tolerances must not be negative.")
+        self.scatter = float(scatter)
+        self.shift = float(shift)
+        self.scale = float(scale)
+
+    def __repr__(self):
+        return (f"ComponentTolerance(scatter={self.scatter}, "
+                f"shift={self.shift}, scale={self.scale})")
+
+
+class ToleranceResult:
+    """
+    Outcome of :func:`monte_carlo_throughput`.
+
+    Attributes
+    ----------
+    axis : np.ndarray
+        Wavelength axis.
+    nominal : np.ndarray
+        Unperturbed throughput.
+    percentiles : np.ndarray
+        Throughput percentiles, shape (len(levels), n).
+    levels : tuple
+        Percentile levels of the rows of ``percentiles``.
+    mean, std : np.ndarray
+        Throughput mean and standard deviation over the realizations.
+    integrated : np.ndarray
+        Integrated flux of every realization, shape (N, len(windows)).
+    windows : np.ndarray
+        (start, stop) integration windows, shape (m, 2).
+    """
+
+    def __init__(self, axis, nominal, levels, percentiles, mean, std,
+                 integrated, windows):
+        self.axis = axis
+        self.nominal = nominal
+        self.levels = tuple(levels)
+        self.percentiles = percentiles
+        self.mean = mean
+        self.std = std
+        self.integrated = integrated
+        self.windows = windows
+
+    @property
+    def n_realizations(self) -> int:
+        return self.integrated.shape[0]
+
+    def percentile_frame(self) -> pd.DataFrame:
+        """Nominal, mean, std and percentile curves indexed by wavelength."""
+        frame = pd.DataFrame(
+            self.percentiles.T,
+            index=pd.Index(self.axis, name="wavelength"),
+            columns=[f"p{level:g}" for level in self.levels])
+        frame.insert(0, "std", self.std)
+        frame.insert(0, "mean", self.mean)
+        frame.insert(0, "nominal", self.nominal)
+        return frame
+
+    def integrated_frame(self) -> pd.DataFrame:
+        """Integrated flux per realization, one column per window."""
+        columns = pd.MultiIndex.from_arrays(
+            [self.windows[:, 0], self.windows[:, 1]], names=["start", "stop"])
+        return pd.DataFrame(self.integrated, columns=columns)
+
+    def integrated_summary(self) -> pd.DataFrame:
+        """Mean, std and percentiles of the integrated flux per window."""
+        frame = self.integrated_frame()
+        summary = pd.DataFrame({"mean": frame.mean(), "std": frame.std()})
+        for level in self.levels:
+            summary[f"p{level:g}"] = np.percentile(
+                self.integrated, level, axis=0)
+        return summary
+
+
+def window_weights(
+        axis: np.ndarray,
+        windows,
+        start: int = 0,
+        stop: int = None
+) -> np.ndarray:
+    """
+    Weights ``W`` of shape (m, n) such that ``W @ y`` is the trapezoid
+    integral of the piecewise linear curve ``y`` over every window, like
+    :meth:`utils.band_integration.CumulativeIntegral.integrate`.
+
+    With ``start`` and ``stop`` only the columns of those samples are
+    built, shape (m, stop - start), from the intervals next to them.
+    """
+    axis = np.asarray(axis, dtype=np.float64)
+    windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+    stop = axis.size if stop is None else stop
+    # Intervals first..last-1 touch the samples first..last
+    first, last = max(start - 1, 0), min(stop, axis.size - 1)
+    left, right = axis[first:last], axis[first + 1:last + 1]
+    step = right - left
+    weights = np.zeros((windows.shape[0], last - first + 1))
+    for w, (lo, hi) in enumerate(windows):
+        a = np.clip(lo, left, right)
+        b = np.clip(hi, left, right)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Integrals of the two hat functions of every interval over [a, b]
+            to_right = np.where(step > 0, (b - a) * (
+                right - 0.5 * (a + b)) / step, 0.0)
+            to_left = np.where(step > 0, (b - a) * (
+                0.5 * (a + b) - left) / step, 0.0)
+        weights[w, :-1] += to_right
+        weights[w, 1:] += to_left
+    return weights[:, start - first:stop - first]
+
+
+def _draw_realizations(rng, tolerances, n_realizations):
+    # Per-realization scalars, shape (k, N) each
+    scales = np.array([1.0 + t.scale * rng.standard_normal(n_realizations)
+                       for t in tolerances]).reshape(-1, n_realizations)
+    shifts = np.array([t.shift * rng.standard_normal(n_realizations)
+                       for t in tolerances]).reshape(-1, n_realizations)
+    return scales, shifts
+
+
+# Inputs shared by every block, set once per worker process
+_shared = {}
+
+
+def _init_shared(axis, curves, tolerances, scales, shifts, windows, flux):
+    _shared.update(axis=axis, curves=curves, tolerances=tolerances,
+                   scales=scales, shifts=shifts, windows=windows, flux=flux)
+
+
+def _run_block(task):
+    start, stop, levels, seed = task
+    axis = _shared["axis"]
+    curves = _shared["curves"]
+    scales = _shared["scales"]
+    shifts = _shared["shifts"]
+    rng = np.random.default_rng(seed)
+    block_axis = axis[start:stop]
+    n_realizations = scales.shape[1]
+
+    throughput = np.ones((n_realizations, stop - start))
+    covered = np.ones(throughput.shape, dtype=bool)
+    for curve, tolerance, scale, shift in zip(
+            curves, _shared["tolerances"], scales, shifts):
+        if tolerance.shift:
+            values = np.interp(block_axis[None, :] - shift[:, None], axis,
+                               curve, left=np.nan, right=np.nan)
+        else:
+            values = np.broadcast_to(curve[start:stop],
+                                     throughput.shape).copy()
+        values *= scale[:, None]
+        if tolerance.scatter:
+            values *= 1.0 + tolerance.scatter * rng.standard_normal(
+                values.shape)
+        np.clip(values, 0.0, None, out=values)
+        # Missing samples count as 1, like generate_throughput
+        missing = np.isnan(values)
+        covered &= ~missing
+        np.copyto(values, 1.0, where=missing)
+        throughput *= values
+
+    # Each block builds the integration weights of its own samples
+    weights = window_weights(axis, _shared["windows"], start, stop)
+    if _shared["flux"] is not None:
+        weights *= _shared["flux"][start:stop]
+    # Nothing is transmitted outside a component's span, as in the band
+    # integrals of TelescopeModel.band_integrator
+    integrated = np.where(covered, throughput, 0.0) @ weights.T
+    return (np.percentile(throughput, levels, axis=0),
+            throughput.mean(axis=0), throughput.std(axis=0), integrated)
+
+
+def monte_carlo_throughput(
+        axis,
+        curves,
+        tolerances: list,
+        n_realizations: int = 1000,
+        windows=None,
+        flux=None,
+        levels=DEFAULT_PERCENTILES,
+        seed=None,
+        block_size: int = None,
+        n_workers: int = 1
+) -> ToleranceResult:
+    """
+    Throughput distribution of a stack of component curves.
+
+    Parameters
+    ----------
+    axis : array-like
+        Increasing wavelength axis of length n.
+    curves : array-like
+        Component curves as fractions, shape (k, n). NaN marks samples a
+        curve does not cover; they count as 1 in the throughput curves and
+        as 0 in the integrals.
+    tolerances : list
+        One :class:`ComponentTolerance` (or None for an exact curve) per
+        component.
+    n_realizations : int, optional
+        Number of Monte Carlo realizations N.
+    windows : array-like, optional
+        (start, stop) pairs to integrate over, in the axis unit. Defaults
+        to the whole axis.
+    flux : array-like, optional
+        Source flux on ``axis``; the integrals are then of throughput
+        times flux.
+    levels : sequence, optional
+        Percentile levels of the throughput curves and integrals.
+    seed : int, optional
+        Seed for reproducible draws. Results depend on the seed and the
+        block size, not on ``n_workers``.
+    block_size : int, optional
+        Wavelength samples per block. By default a block of N realizations
+        takes about 32 MiB.
+    n_workers : int, optional
+        Processes the blocks are spread over; 1 runs in the calling
+        process.
+    """
+    axis = np.asarray(axis, dtype=np.float64)
+    curves = np.asarray(curves, dtype=np.float64).reshape(-1, axis.size)
+    if len(tolerances) != curves.shape[0]:
+        raise ValueError("Expected one tolerance per component curve.")
+    if axis.size < 2:
+        raise ValueError("Tolerance analysis needs at least two samples.")
+    tolerances = [t or ComponentTolerance() for t in tolerances]
+    if windows is None:
+        windows = [(axis[0], axis[-1])]
+    windows = np.asarray(windows, dtype=np.float64).reshape(-1, 2)
+    if flux is not None:
+        flux = np.nan_to_num(np.asarray(flux, dtype=np.float64))
+    if block_size is None:
+        block_size = max(1, DEFAULT_BLOCK_BYTES // (8 * n_realizations))
+
+    seeds = np.random.SeedSequence(seed)
+    scalar_seed, block_seeds = seeds.spawn(2)
+    scales, shifts = _draw_realizations(np.random.default_rng(scalar_seed),
+                                        tolerances, n_realizations)
+    starts = range(0, axis.size, block_size)
+    tasks = [(start, min(start + block_size, axis.size), levels, block_seed)
+             for start, block_seed in zip(
+                 starts, block_seeds.spawn(len(starts)))]
+
+    shared = (axis, curves, tolerances, scales, shifts, windows, flux)
+    n_workers = min(n_workers or 1, len(tasks))
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 initializer=_init_shared,
+                                 initargs=shared) as executor:
+            blocks = list(executor.map(_run_block, tasks))
+    else:
+        _init_shared(*shared)
+        try:
+            blocks = [_run_block(task) for task in tasks]
+        finally:
+            _shared.clear()
+
+    nominal = np.prod(np.where(np.isnan(curves), 1.0,
+                               np.clip(curves, 0.0, None)), axis=0)
+    return ToleranceResult(
+        axis,
+        nominal,
+        levels,
+        np.concatenate([b[0] for b in blocks], axis=1),
+        np.concatenate([b[1] for b in blocks]),
+        np.concatenate([b[2] for b in blocks]),
+        np.sum([b[3] for b in blocks], axis=0),
+        windows,
+    )
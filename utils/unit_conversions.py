@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
 
-from definitions import *
+from definitions import UNIT_TO_METERS
+from utils.instrumentation import instrumented
 
 
+@instrumented("convert_unit")
 def convert_unit(
     values: pd.DataFrame | np.ndarray,
     from_unit: str,
@@ -40,6 +42,7 @@ def normalize_wavelengths(
     return convert_unit(wavelengths, unit)
 
 
+@instrumented("detect_wavelength_unit")
 def detect_wavelength_unit(
         wavelengths: pd.DataFrame | np.ndarray
 ):
@@ -105,6 +108,7 @@ def normalize_spectrum_axis(source_index, target_index):
     return source
 
 
+@instrumented("normalize_index_to_standard")
 def normalize_index_to_standard(index, standard_unit):
     idx = pd.Index(index).astype(float)
     detected = detect_wavelength_unit(idx)